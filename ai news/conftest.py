@@ -0,0 +1,26 @@
+"""
+pytest 共用夾具：讓爬蟲通過本地回放服務運行，不訪問真實網絡
+"""
+import pytest
+import news_scraper
+import rate_limiter
+from replay_harness import ReplayServer
+
+@pytest.fixture(scope="session")
+def replay_server():
+    """整個測試會話共用的本地 Google News 替身"""
+    with ReplayServer() as server:
+        yield server
+
+@pytest.fixture
+def offline_scraper(replay_server, monkeypatch):
+    """
+    將 fetch_news 的請求地址指向回放服務
+    本地回放不需要限速，每個測試使用全新的限速與熔斷狀態。
+    """
+    monkeypatch.setattr(news_scraper, "GOOGLE_NEWS_URL", replay_server.url_template)
+    monkeypatch.setattr(rate_limiter, "DEFAULT_RATE", 10000.0)
+    monkeypatch.setattr(rate_limiter, "DEFAULT_BURST", 10000)
+    rate_limiter.reset_guards()
+    yield replay_server
+    rate_limiter.reset_guards()
@@ -4,6 +4,8 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
 import json
+from story_cluster import cluster_stories
+from link_resolver import canonical_link
 
 def send_email_notification(news_data, topic, recipient_email, sender_email, sender_password):
     """
@@ -16,14 +18,21 @@ def send_email_notification(news_data, topic, recipient_email, sender_email, sen
     """
     subject = f"每日新聞摘要 - {topic}"
     
+    # 合併不同媒體對同一事件的報導
+    stories = cluster_stories(news_data)
+    
     # 構建郵件內容
     body = f"<h2>今日 {topic} 新聞摘要</h2>\n"
-    body += f"<p>共找到 {len(news_data)} 條相關新聞：</p>\n<hr>\n"
+    body += f"<p>共找到 {len(news_data)} 條相關新聞，合併為 {len(stories)} 個事件：</p>\n<hr>\n"
     
-    for idx, news in enumerate(news_data, start=1):
+    for idx, news in enumerate(stories, start=1):
         body += f"<h3>{idx}. {news['title']}</h3>\n"
         body += f"<p><strong>摘要：</strong>{news['snippet']}</p>\n"
-        body += f"<p><a href='{news['link']}'>閱讀全文</a></p>\n<hr>\n"
+        body += f"<p><strong>來源：</strong>{'、'.join(news['sources'])}</p>\n"
+        body += f"<p><a href='{canonical_link(news)}'>閱讀全文</a>"
+        for related in news['related']:
+            body += f" | <a href='{canonical_link(related)}'>{related.get('source', '其他報導')}</a>"
+        body += "</p>\n<hr>\n"
     
     # 創建郵件
     msg = MIMEMultipart()
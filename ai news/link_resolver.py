@@ -0,0 +1,197 @@
+"""
+Google News 跳轉鏈接解析
+保存的 link 都是 news.google.com/read/... 跳轉地址。此模塊在後台用 HEAD 請求
+並發跟隨跳轉，取得媒體原文地址（canonical_link），結果寫入本地緩存文件，
+之後的去重、聚類和顯示都直接使用原文地址。
+"""
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import requests
+from rate_limiter import HostGuard, TokenBucket, CircuitBreaker, CircuitOpenError
+
+# === 配置 ===
+CACHE_FILE = "resolved_links.json"
+MAX_WORKERS = 4           # 並發請求數
+RESOLVE_RATE = 4.0        # 每秒最多解析的鏈接數
+RESOLVE_BURST = 4
+REQUEST_TIMEOUT = 5
+REDIRECT_HOST = "news.google.com"
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+
+def canonical_link(news):
+    """
+    取得新聞的原文地址，尚未解析時返回原始 link
+    :param news: 新聞數據 (dict)
+    :return: URL (str)
+    """
+    return news.get("canonical_link") or news.get("link", "")
+
+class LinkResolver:
+    """帶持久化緩存的跳轉鏈接解析器"""
+
+    def __init__(self, cache_file=CACHE_FILE, max_workers=MAX_WORKERS, guard=None):
+        """
+        :param cache_file: 緩存文件路徑
+        :param max_workers: 並發請求數
+        :param guard: 請求限速與熔斷（默認按 RESOLVE_RATE 限速，與抓取新聞的預算分開）
+        """
+        self.cache_file = cache_file
+        self.max_workers = max_workers
+        self.guard = guard or HostGuard(
+            REDIRECT_HOST,
+            TokenBucket(rate=RESOLVE_RATE, burst=RESOLVE_BURST),
+            CircuitBreaker()
+        )
+        self._file_version = self._cache_file_version()
+        self.cache = self._load_cache()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+
+    def _cache_file_version(self):
+        """緩存文件的修改時間和大小，文件不存在時返回 None"""
+        try:
+            stat = os.stat(self.cache_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _merge_from_disk(self):
+        """把其他進程寫入緩存文件的解析結果合併到內存（內存中已有的鏈接保持不變）"""
+        version = self._cache_file_version()
+        disk = self._load_cache()
+        with self._lock:
+            for link, url in disk.items():
+                self.cache.setdefault(link, url)
+            self._file_version = version
+
+    def _load_cache(self):
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[Warning] 無法讀取鏈接緩存 {self.cache_file}: {e}")
+            return {}
+
+    def save_cache(self):
+        """寫入緩存文件（先寫臨時文件再替換，避免寫到一半被其他進程讀到）
+
+        每次寫入使用獨立的臨時文件，並且同一時間只有一個線程在寫，
+        後台解析的多個線程同時保存也不會互相覆蓋或找不到臨時文件。
+        寫入前先合併文件中其他進程（GUI 或定時任務）保存的結果，不會把它們覆蓋掉。
+        """
+        with self._save_lock:
+            self._merge_from_disk()
+            with self._lock:
+                data = dict(self.cache)
+            directory = os.path.dirname(os.path.abspath(self.cache_file))
+            fd, temp_file = tempfile.mkstemp(dir=directory, prefix=".resolved_links.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(temp_file, self.cache_file)
+            except BaseException:
+                os.unlink(temp_file)
+                raise
+            self._file_version = self._cache_file_version()
+
+    def apply_cached(self, articles):
+        """
+        為已解析過的新聞填入 canonical_link，不發送任何請求
+        緩存文件被其他進程更新過時會先重新讀取
+        :param articles: 新聞數據列表（原地修改）
+        :return: 傳入的列表
+        """
+        if self._cache_file_version() != self._file_version:
+            self._merge_from_disk()
+        with self._lock:
+            for news in articles:
+                resolved = self.cache.get(news.get("link"))
+                if resolved:
+                    news["canonical_link"] = resolved
+        return articles
+
+    def _resolve_one(self, link):
+        try:
+            self.guard.before_request()
+        except CircuitOpenError:
+            return None
+        try:
+            response = requests.head(link, headers=HEADERS, allow_redirects=True, timeout=REQUEST_TIMEOUT)
+        except requests.exceptions.RequestException:
+            self.guard.record_error()
+            return None
+
+        self.guard.record_response(response.status_code, response.headers.get("Retry-After"))
+        if response.status_code >= 400 or response.url == link or urlparse(response.url).netloc == REDIRECT_HOST:
+            return None
+        return response.url
+
+    def resolve_many(self, articles):
+        """
+        並發解析新聞鏈接，結果寫入 canonical_link 和緩存文件
+        :param articles: 新聞數據列表（原地修改）
+        :return: 新解析成功的數量
+        """
+        self.apply_cached(articles)
+        pending = []
+        seen = set()
+        for news in articles:
+            link = news.get("link")
+            if link and "canonical_link" not in news and link not in seen:
+                seen.add(link)
+                pending.append(link)
+        if not pending:
+            return 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            resolved = dict(zip(pending, executor.map(self._resolve_one, pending)))
+
+        resolved = {link: url for link, url in resolved.items() if url}
+        if resolved:
+            with self._lock:
+                self.cache.update(resolved)
+            self.apply_cached(articles)
+            try:
+                self.save_cache()
+            except OSError as e:
+                print(f"[Warning] 無法保存鏈接緩存: {e}")
+        return len(resolved)
+
+    def resolve_in_background(self, articles, callback=None):
+        """
+        在後台線程解析鏈接
+        :param articles: 新聞數據列表（原地修改）
+        :param callback: 完成後調用，參數為新解析成功的數量
+        :return: 後台線程
+        """
+        def run():
+            count = self.resolve_many(articles)
+            if callback:
+                callback(count)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+_default_resolver = None
+_default_lock = threading.Lock()
+
+def get_default_resolver():
+    """
+    取得共享的鏈接解析器（GUI 和定時任務各自進程內共用，通過緩存文件互通）
+    :return: LinkResolver
+    """
+    global _default_resolver
+    with _default_lock:
+        if _default_resolver is None:
+            _default_resolver = LinkResolver()
+        return _default_resolver
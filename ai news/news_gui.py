@@ -6,7 +6,10 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 import threading
 import webbrowser
-from news_scraper import fetch_news, save_to_json
+from news_scraper import fetch_news, save_to_json, NewsFetchError
+from news_index import get_default_index
+from story_cluster import cluster_stories, expand_stories
+from link_resolver import get_default_resolver, canonical_link
 from datetime import datetime
 import requests
 from io import BytesIO
@@ -58,6 +61,10 @@ class NewsApp:
         self.news_images = {}
         self.sort_order = "newest"
         self.favorites = self.load_favorites()
+        self.news_index = get_default_index()
+        self.link_resolver = get_default_resolver()
+        # 在後台預先建立本地索引，首次搜索時不必等待解析所有新聞文件
+        threading.Thread(target=self.refresh_local_index, daemon=True).start()
         self.weather_data = None
         
         self.apply_theme()
@@ -593,13 +600,47 @@ class NewsApp:
             self.search_entry.config(fg='grey')
     
     def search_news(self):
-        """從頂部搜索欄搜索新聞"""
+        """從頂部搜索欄搜索新聞：先在後台搜索本地已保存的結果，再聯網更新"""
         topic = self.search_entry.get().strip()
         if topic and topic != "搜索新聞主題...":
-            self.fetch_news_thread(topic)
+            theme = self.themes['dark' if self.dark_mode else 'light']
+            self.status_label.config(text=f"🔍 正在搜索本地「{topic}」相關新聞...", fg=theme['accent'])
+            thread = threading.Thread(target=self.search_local_thread, args=(topic,))
+            thread.daemon = True
+            thread.start()
         else:
             messagebox.showwarning("警告", "請輸入搜索主題")
     
+    def search_local_thread(self, topic):
+        """在後台線程搜索本地新聞，完成後回到界面線程顯示"""
+        local_results = cluster_stories(self.search_local(topic))
+        self.root.after(0, self.show_local_results, topic, local_results)
+    
+    def show_local_results(self, topic, local_results):
+        """顯示本地搜索結果並聯網更新（界面線程）"""
+        if local_results:
+            self.current_news = local_results
+            self.current_topic = topic
+            self.clear_news()
+            self.display_news(local_results, topic)
+        self.fetch_news_thread(topic, local_results)
+    
+    def refresh_local_index(self):
+        """增量更新本地新聞索引（會讀取新聞文件，請在後台線程調用）"""
+        try:
+            self.news_index.refresh()
+        except Exception as e:
+            print(f"[Warning] 本地索引更新失敗: {e}")
+    
+    def search_local(self, topic):
+        """在本地已保存的新聞中搜索（會更新索引，請在後台線程調用）"""
+        self.refresh_local_index()
+        try:
+            return self.news_index.search(topic, limit=15)
+        except Exception as e:
+            print(f"[Warning] 本地搜索失敗: {e}")
+            return []
+    
     def fetch_custom_topic(self):
         """從左側面板自定義主題搜索"""
         topic = self.custom_topic_entry.get().strip()
@@ -627,32 +668,61 @@ class NewsApp:
         for idx, news in enumerate(self.current_news, start=1):
             self.create_news_card(news, idx)
     
-    def fetch_news_thread(self, topic):
+    def fetch_news_thread(self, topic, local_results=None):
         """在新線程中抓取新聞，避免界面凍結"""
         theme = self.themes['dark' if self.dark_mode else 'light']
-        self.status_label.config(text=f"🔄 正在抓取「{topic}」相關新聞...", fg=theme['accent'])
-        self.clear_news()
+        if local_results:
+            self.status_label.config(
+                text=f"📚 本地找到 {len(local_results)} 條「{topic}」相關新聞，正在聯網更新...",
+                fg=theme['accent']
+            )
+        else:
+            self.status_label.config(text=f"🔄 正在抓取「{topic}」相關新聞...", fg=theme['accent'])
+            self.clear_news()
         
-        thread = threading.Thread(target=self.fetch_and_display, args=(topic,))
+        thread = threading.Thread(target=self.fetch_and_display, args=(topic, local_results))
         thread.daemon = True
         thread.start()
     
-    def fetch_and_display(self, topic):
-        """抓取並顯示新聞"""
+    def fetch_and_display(self, topic, local_results=None):
+        """抓取並顯示新聞，有本地結果時合併顯示（聯網結果在前）"""
         try:
             news_data = fetch_news(topic, max_articles=15)
             
+            if local_results:
+                local_news = expand_stories(local_results)
+                links = {news['link'] for news in news_data}
+                news_data = news_data + [news for news in local_news if news['link'] not in links]
+            
+            # 合併不同媒體對同一事件的報導
+            self.link_resolver.apply_cached(news_data)
+            news_data = cluster_stories(news_data)
+            
             if news_data:
                 self.current_news = news_data
                 self.current_topic = topic
-                self.root.after(0, self.display_news, news_data, topic)
+                self.root.after(0, self.redisplay_news, news_data, topic)
+                # 後台解析跳轉鏈接，閱讀和分享時直接使用原文地址
+                self.link_resolver.resolve_in_background(
+                    news_data + [related for story in news_data for related in story['related']]
+                )
             else:
                 self.root.after(0, self.show_error, topic)
+        except NewsFetchError as e:
+            error_msg = f"抓取「{topic}」失敗: {str(e)}"
+            if local_results:
+                error_msg += "（顯示本地結果）"
+            self.root.after(0, self.update_status_error, error_msg)
         except Exception as e:
             error_msg = f"抓取新聞時發生錯誤: {str(e)}"
             print(f"[Error] {error_msg}")
             self.root.after(0, self.update_status_error, error_msg)
     
+    def redisplay_news(self, news_data, topic):
+        """清空後重新顯示新聞"""
+        self.clear_news()
+        self.display_news(news_data, topic)
+    
     def update_status_error(self, message):
         """更新狀態為錯誤信息"""
         theme = self.themes['dark' if self.dark_mode else 'light']
@@ -716,7 +786,7 @@ class NewsApp:
     def share_news(self, news):
         """分享新聞（複製鏈接到剪貼板）"""
         self.root.clipboard_clear()
-        self.root.clipboard_append(news['link'])
+        self.root.clipboard_append(canonical_link(news))
         messagebox.showinfo("分享", "新聞鏈接已複製到剪貼板！")
     
     def load_image_from_url(self, url, size=(140, 100)):
@@ -1042,7 +1112,10 @@ class NewsApp:
         info_frame = tk.Frame(text_frame, bg=theme['card_bg'])
         info_frame.pack(fill=tk.X)
         
-        source = news.get('source', '未知')
+        sources = news.get('sources') or [news.get('source', '未知')]
+        source = "、".join(sources[:3])
+        if len(sources) > 3:
+            source += f" 等 {len(sources)} 家媒體"
         source_label = tk.Label(
             info_frame,
             text=f"📡 {source}",
@@ -1079,7 +1152,7 @@ class NewsApp:
             activeforeground='white',
             relief=tk.FLAT,
             cursor='hand2',
-            command=lambda url=news['link']: webbrowser.open(url)
+            command=lambda n=news: webbrowser.open(canonical_link(n))
         )
         read_btn.pack(side=tk.LEFT, padx=3, ipady=4, ipadx=10)
         
@@ -1123,7 +1196,7 @@ class NewsApp:
             text=f"❌ 未找到「{topic}」相關新聞",
             fg=theme['hot']
         )
-        messagebox.showerror("錯誤", f"未找到「{topic}」相關新聞或發生網絡錯誤")
+        messagebox.showerror("錯誤", f"未找到「{topic}」相關新聞")
     
     def clear_news(self):
         """清空新聞顯示"""
@@ -1136,7 +1209,7 @@ class NewsApp:
             messagebox.showwarning("警告", "沒有可保存的新聞")
             return
         
-        filename = save_to_json(self.current_news, self.current_topic)
+        filename = save_to_json(expand_stories(self.current_news), self.current_topic)
         messagebox.showinfo("成功", f"新聞已保存到：\n{filename}")
 
 def main():
@@ -0,0 +1,180 @@
+"""
+本地新聞全文索引
+對已保存的新聞（標題、摘要、來源）建立倒排索引，中日韓文字按雙字切分，
+使用 BM25 排序，供 GUI 搜索欄離線查詢。
+"""
+import glob
+import heapq
+import json
+import math
+import os
+import re
+import threading
+
+# === 配置 ===
+NEWS_FILE_PATTERN = "*_news_*.json"  # save_to_json 生成的文件名格式
+FIELD_WEIGHTS = {"title": 3.0, "snippet": 1.0, "source": 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+_TOKEN_RE = re.compile(f"[{_CJK}]+|[0-9a-z]+")
+_CJK_RE = re.compile(f"[{_CJK}]")
+
+def tokenize(text, for_query=False):
+    """
+    將文本切分為索引詞
+    英文和數字按單詞切分；中日韓文字按相鄰雙字切分，建索引時額外保留單字，
+    使單字查詢也能命中。
+    :param text: 原始文本 (str)
+    :param for_query: 是否為查詢切分（查詢時多字詞只用雙字）
+    :return: 詞列表
+    """
+    tokens = []
+    for run in _TOKEN_RE.findall(text.lower()):
+        if not _CJK_RE.match(run):
+            tokens.append(run)
+            continue
+        if len(run) == 1:
+            tokens.append(run)
+            continue
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        if not for_query:
+            tokens.extend(run)
+    return tokens
+
+class NewsIndex:
+    """
+    新聞倒排索引
+    以 link 和原文地址（canonical_link）去重；記錄已索引文件的修改時間，refresh() 只讀取新增或變更的文件。
+    """
+
+    def __init__(self, directory="."):
+        """
+        :param directory: 保存新聞 JSON 的目錄
+        """
+        self.directory = directory
+        self.articles = []
+        self.doc_lengths = []
+        self.postings = {}
+        self.links = set()
+        self.total_length = 0.0
+        self._file_mtimes = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.articles)
+
+    def add_articles(self, articles):
+        """
+        將新聞加入索引，link 或原文地址已存在的新聞會被跳過
+        :param articles: 新聞數據列表
+        :return: 新增的數量
+        """
+        added = 0
+        with self._lock:
+            for news in articles:
+                link = news.get("link")
+                canonical = news.get("canonical_link")
+                if not link or link in self.links or (canonical and canonical in self.links):
+                    continue
+
+                doc_id = len(self.articles)
+                term_freqs = {}
+                for field, weight in FIELD_WEIGHTS.items():
+                    for token in tokenize(news.get(field) or ""):
+                        term_freqs[token] = term_freqs.get(token, 0.0) + weight
+
+                for token, tf in term_freqs.items():
+                    self.postings.setdefault(token, {})[doc_id] = tf
+                length = sum(term_freqs.values())
+                self.articles.append(news)
+                self.doc_lengths.append(length)
+                self.total_length += length
+                self.links.add(link)
+                if canonical:
+                    self.links.add(canonical)
+                added += 1
+        return added
+
+    def add_file(self, path, articles=None):
+        """
+        索引一個新聞 JSON 文件
+        :param path: 文件路徑
+        :param articles: 文件內容（調用方已在內存中時可直接傳入，省去重新讀取）
+        :return: 新增的數量
+        """
+        if articles is None:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    articles = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[Warning] 無法索引 {path}: {e}")
+                return 0
+        if not isinstance(articles, list):
+            return 0
+
+        added = self.add_articles(articles)
+        try:
+            self._file_mtimes[os.path.abspath(path)] = os.path.getmtime(path)
+        except OSError:
+            pass
+        return added
+
+    def refresh(self):
+        """
+        增量掃描目錄，只索引新增或修改過的新聞文件（例如定時任務在其他進程寫入的文件）
+        :return: 新增的數量
+        """
+        added = 0
+        for path in glob.glob(os.path.join(self.directory, NEWS_FILE_PATTERN)):
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            if self._file_mtimes.get(os.path.abspath(path)) == mtime:
+                continue
+            added += self.add_file(path)
+        return added
+
+    def search(self, query, limit=15):
+        """
+        BM25 排序搜索
+        :param query: 查詢文本 (str)
+        :param limit: 最多返回的數量 (int)
+        :return: 按相關度排序的新聞列表
+        """
+        terms = set(tokenize(query, for_query=True))
+        with self._lock:
+            count = len(self.articles)
+            if not terms or not count:
+                return []
+
+            avg_length = self.total_length / count
+            scores = {}
+            for term in terms:
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+            # 分數相同時較新索引的新聞排在前面
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+            return [self.articles[doc_id] for doc_id, _ in top]
+
+_default_index = None
+_default_lock = threading.Lock()
+
+def get_default_index():
+    """
+    取得當前目錄的共享索引（save_to_json 和 GUI 共用）
+    :return: NewsIndex
+    """
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = NewsIndex()
+        return _default_index
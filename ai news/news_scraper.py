@@ -2,6 +2,8 @@ import requests
 from bs4 import BeautifulSoup
 import json
 from datetime import datetime
+from rate_limiter import get_guard, CircuitOpenError
+from news_index import get_default_index
 
 # === 配置 ===
 GOOGLE_NEWS_URL = "https://news.google.com/search?q={query}&hl=zh-TW&gl=TW&ceid=TW:zh-Hant"
@@ -15,24 +17,48 @@ HEADERS = {
     "Upgrade-Insecure-Requests": "1"
 }
 
+class NewsFetchError(Exception):
+    """抓取失敗（網絡錯誤、非 200 響應或上游熔斷），與「沒有新聞」區分開"""
+
 def fetch_news(topic, max_articles=10):
     """
     從 Google News 搜索指定主題的新聞
+    請求經過按主機共享的限速器和熔斷器，上游不健康時快速失敗。
     :param topic: 搜索主題 (str)
     :param max_articles: 最多抓取的新聞數量 (int)
     :return: 包含新聞標題、鏈接和摘要的列表
+    :raises NewsFetchError: 請求失敗或上游暫時不可用
     """
     url = GOOGLE_NEWS_URL.format(query=topic)
+    guard = get_guard(url)
+    try:
+        guard.before_request()
+    except CircuitOpenError as e:
+        print(f"[Warning] 跳過請求: {e}")
+        raise NewsFetchError(str(e)) from e
+
     try:
         response = requests.get(url, headers=HEADERS, timeout=10)
-        if response.status_code != 200:
-            print(f"[Error] 無法訪問 Google News: {response.status_code}")
-            return []
     except requests.exceptions.RequestException as e:
+        guard.record_error()
         print(f"[Error] 請求失敗: {e}")
-        return []
+        raise NewsFetchError(f"請求失敗: {e}") from e
 
-    soup = BeautifulSoup(response.text, 'html.parser')
+    guard.record_response(response.status_code, response.headers.get('Retry-After'))
+    if response.status_code != 200:
+        print(f"[Error] 無法訪問 Google News: {response.status_code}")
+        raise NewsFetchError(f"無法訪問 Google News: {response.status_code}")
+
+    return parse_news(response.text, max_articles)
+
+def parse_news(html, max_articles=10):
+    """
+    解析 Google News 搜索結果頁面
+    :param html: 搜索結果頁面的 HTML (str)
+    :param max_articles: 最多解析的新聞數量 (int)
+    :return: 包含新聞標題、鏈接和摘要的列表
+    """
+    soup = BeautifulSoup(html, 'html.parser')
     news_list = []
 
     # Google News 使用 <article> 標籤包含新聞
@@ -140,6 +166,9 @@ def save_to_json(data, topic):
     with open(filename, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=4)
     print(f"[Info] 新聞摘要已保存到 {filename}")
+
+    # 增量更新本地搜索索引
+    get_default_index().add_file(filename, data)
     return filename
 
 def display_news(news_data):
@@ -164,7 +193,12 @@ def main():
     
     print(f"[Info] 正在搜尋與 '{topic}' 相關的新聞...")
 
-    news_data = fetch_news(topic)
+    try:
+        news_data = fetch_news(topic)
+    except NewsFetchError:
+        print("[Error] 抓取新聞失敗，請稍後再試。")
+        return
+
     if not news_data:
         print("[Error] 未找到相關新聞或發生錯誤。")
         return
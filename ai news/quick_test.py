@@ -1,11 +1,15 @@
 """快速測試新聞爬蟲"""
-from news_scraper import fetch_news, display_news, save_to_json
+from news_scraper import fetch_news, display_news, save_to_json, NewsFetchError
 
 print("=== 快速測試新聞爬蟲 ===\n")
 
 # 測試抓取科技新聞
 print("正在抓取科技新聞...")
-news_data = fetch_news("科技", max_articles=5)
+try:
+    news_data = fetch_news("科技", max_articles=5)
+except NewsFetchError as e:
+    print(f"抓取失敗: {e}")
+    news_data = []
 
 if news_data:
     print(f"\n成功抓取 {len(news_data)} 條新聞！\n")
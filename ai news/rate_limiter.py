@@ -0,0 +1,242 @@
+"""
+請求限速與熔斷
+按主機共享的令牌桶限速器（遇到 429 / Retry-After 自動降速），
+以及熔斷器（上游持續失敗時快速失敗，並定期放行探測請求）。
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# === 配置 ===
+DEFAULT_RATE = 1.0        # 每秒請求數
+DEFAULT_BURST = 3         # 令牌桶容量（允許的突發請求數）
+MIN_RATE = 0.1            # 被限流後降速的下限
+RECOVERY_STEP = 0.1       # 每次成功請求後恢復的速率
+MAX_RETRY_AFTER = 120     # Retry-After 最多等待的秒數
+MAX_WAIT = 10             # 請求前最多阻塞等待的秒數（降速後的正常間隔），更長時直接拒絕
+FAILURE_THRESHOLD = 3     # 連續失敗多少次後熔斷
+RESET_TIMEOUT = 60        # 熔斷多少秒後放行一個探測請求
+
+class CircuitOpenError(Exception):
+    """熔斷器處於打開狀態，請求被直接拒絕"""
+
+    def __init__(self, host, retry_in):
+        super().__init__(f"{host} 暫時不可用，{retry_in:.0f} 秒後重試")
+        self.host = host
+        self.retry_in = retry_in
+
+def parse_retry_after(value):
+    """
+    解析 Retry-After 響應頭
+    :param value: 秒數或 HTTP 日期 (str)
+    :return: 需要等待的秒數 (float)，無法解析時返回 None
+    """
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        seconds = (retry_at - datetime.now(timezone.utc)).total_seconds()
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+class TokenBucket:
+    """
+    自適應令牌桶
+    被限流時速率減半（不低於 min_rate），每次成功後逐步恢復到初始速率。
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, min_rate=MIN_RATE,
+                 recovery_step=RECOVERY_STEP, clock=time.monotonic, sleep=time.sleep):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min(min_rate, rate)
+        self.recovery_step = recovery_step
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(burst)
+        self.updated = clock()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self.updated = max(self.updated, now)
+
+    def acquire(self, max_wait=None):
+        """
+        取得一個令牌，必要時阻塞等待
+        :param max_wait: 最多等待的秒數，None 表示不限
+        :return: 取得令牌時返回 0；需要等待超過 max_wait 時不等待，返回需要等待的秒數
+        """
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._refill(now)
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return 0.0
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            if max_wait is not None and wait > max_wait:
+                return wait
+            self.sleep(wait)
+
+    def throttled(self, retry_after=None):
+        """
+        上游返回限流響應時調用
+        :param retry_after: 上游要求等待的秒數，None 表示未指定
+        """
+        with self._lock:
+            now = self.clock()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+                self.updated = self.blocked_until
+                self.tokens = 1.0
+
+    def succeeded(self):
+        """請求成功時調用，逐步恢復速率"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.recovery_step)
+
+class CircuitBreaker:
+    """
+    熔斷器
+    closed: 正常放行；open: 直接拒絕；half_open: 放行一個探測請求，
+    探測成功則恢復，失敗則重新打開。
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        判斷是否放行請求
+        :return: True 表示放行
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def retry_in(self):
+        """距離下一次探測還有多少秒"""
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (self.clock() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+            self._probe_in_flight = False
+
+class HostGuard:
+    """單個主機的限速器與熔斷器組合"""
+
+    def __init__(self, host, bucket=None, breaker=None, max_wait=MAX_WAIT):
+        """
+        :param host: 主機名
+        :param bucket: 令牌桶限速器
+        :param breaker: 熔斷器
+        :param max_wait: 請求前最多阻塞等待的秒數
+        """
+        self.host = host
+        self.bucket = bucket or TokenBucket()
+        self.breaker = breaker or CircuitBreaker()
+        self.max_wait = max_wait
+
+    def before_request(self):
+        """
+        發送請求前調用：熔斷時拋出 CircuitOpenError，否則按速率等待
+        上游要求的 Retry-After 等待超過 max_wait 時同樣拋出 CircuitOpenError，
+        後續的主題或線程立即失敗，不會各自阻塞到限流結束
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(self.host, self.breaker.retry_in())
+        wait = self.bucket.acquire(max_wait=self.max_wait)
+        if wait:
+            raise CircuitOpenError(self.host, wait)
+
+    def record_response(self, status_code, retry_after=None):
+        """
+        收到響應後調用
+        :param status_code: HTTP 狀態碼
+        :param retry_after: Retry-After 響應頭原始值
+        """
+        if status_code in (429, 503):
+            self.bucket.throttled(parse_retry_after(retry_after))
+            self.breaker.record_failure()
+        elif status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.bucket.succeeded()
+            self.breaker.record_success()
+
+    def record_error(self):
+        """連接失敗或超時時調用"""
+        self.breaker.record_failure()
+
+_guards = {}
+_guards_lock = threading.Lock()
+
+def get_guard(url):
+    """
+    取得 URL 所屬主機的共享 HostGuard（scheduler 和 GUI 共用同一實例）
+    :param url: 請求地址
+    :return: HostGuard
+    """
+    host = urlparse(url).netloc
+    with _guards_lock:
+        if host not in _guards:
+            _guards[host] = HostGuard(
+                host,
+                TokenBucket(rate=DEFAULT_RATE, burst=DEFAULT_BURST),
+                CircuitBreaker(failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT),
+                max_wait=MAX_WAIT
+            )
+        return _guards[host]
+
+def reset_guards():
+    """清空所有主機的限速與熔斷狀態"""
+    with _guards_lock:
+        _guards.clear()
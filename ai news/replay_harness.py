@@ -0,0 +1,237 @@
+"""
+離線回放工具
+將 Google News 搜索頁面錄製為本地樣本，並通過本地 HTTP 服務回放，
+讓爬蟲測試和性能基準不依賴網絡、結果可重現。
+
+用法：
+    python replay_harness.py record 科技 財經    # 錄製真實頁面到 fixtures/
+    python replay_harness.py serve 8765           # 在本地端口回放樣本
+"""
+import os
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import requests
+from news_scraper import GOOGLE_NEWS_URL, HEADERS
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def fixture_path(topic, fixture_dir=FIXTURE_DIR):
+    """
+    取得主題對應的樣本文件路徑
+    :param topic: 搜索主題 (str)
+    :param fixture_dir: 樣本目錄
+    :return: 樣本文件路徑
+    """
+    return os.path.join(fixture_dir, f"{topic}.html")
+
+def load_fixture(topic, fixture_dir=FIXTURE_DIR):
+    """
+    讀取已錄製的搜索頁面
+    :param topic: 搜索主題 (str)
+    :param fixture_dir: 樣本目錄
+    :return: 頁面 HTML (str)
+    """
+    with open(fixture_path(topic, fixture_dir), "r", encoding="utf-8") as f:
+        return f.read()
+
+def record_fixture(topic, fixture_dir=FIXTURE_DIR):
+    """
+    從 Google News 抓取一次真實搜索頁面並保存為樣本
+    :param topic: 搜索主題 (str)
+    :param fixture_dir: 樣本目錄
+    :return: 樣本文件路徑
+    """
+    url = GOOGLE_NEWS_URL.format(query=topic)
+    response = requests.get(url, headers=HEADERS, timeout=10)
+    response.raise_for_status()
+
+    os.makedirs(fixture_dir, exist_ok=True)
+    path = fixture_path(topic, fixture_dir)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(response.text)
+    print(f"[Info] 已錄製「{topic}」搜索頁面到 {path}（{len(response.text)} 字符）")
+    return path
+
+class ReplayServer:
+    """
+    本地 Google News 替身服務
+    按 q 參數返回 fixtures/ 中對應的頁面，找不到樣本時返回 404；
+    通過 add_redirect() 註冊的路徑返回 302 跳轉。
+    """
+
+    def __init__(self, fixture_dir=FIXTURE_DIR, host="127.0.0.1", port=0, latency=0.0):
+        """
+        :param fixture_dir: 樣本目錄
+        :param host: 監聽地址
+        :param port: 監聽端口（0 表示自動分配）
+        :param latency: 每個請求注入的延遲（秒），用於模擬網絡往返
+        """
+        self.fixture_dir = fixture_dir
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.request_count = 0
+        self._pages = {}
+        self._queued = {}
+        self._redirects = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """服務根地址"""
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def url_template(self):
+        """與 news_scraper.GOOGLE_NEWS_URL 格式相同、指向本地服務的 URL 模板"""
+        return f"{self.base_url}/search?q={{query}}&hl=zh-TW&gl=TW&ceid=TW:zh-Hant"
+
+    def queue_response(self, topic, status, headers=None):
+        """
+        讓該主題的下一個請求返回指定狀態碼（按調用順序排隊），用於模擬限流和故障
+        :param topic: 搜索主題 (str)
+        :param status: HTTP 狀態碼 (int)
+        :param headers: 額外響應頭 (dict)
+        """
+        with self._lock:
+            self._queued.setdefault(topic, []).append((status, headers or {}))
+
+    def add_redirect(self, path, location):
+        """
+        讓指定路徑返回 302 跳轉，用於模擬 news.google.com/read/... 跳轉鏈接
+        :param path: 請求路徑，例如 /read/abc
+        :param location: 跳轉目標 URL
+        """
+        with self._lock:
+            self._redirects[path] = location
+
+    def _next_queued(self, topic):
+        with self._lock:
+            queued = self._queued.get(topic)
+            return queued.pop(0) if queued else None
+
+    def _get_page(self, topic):
+        """讀取並緩存樣本頁面，避免回放時的磁盤 I/O 干擾基準數據"""
+        with self._lock:
+            if topic not in self._pages:
+                try:
+                    self._pages[topic] = load_fixture(topic, self.fixture_dir).encode("utf-8")
+                except OSError:
+                    self._pages[topic] = None
+            return self._pages[topic]
+
+    def _make_handler(self):
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_HEAD(self):
+                self.do_GET(head=True)
+
+            def do_GET(self, head=False):
+                with replay._lock:
+                    replay.request_count += 1
+                    location = replay._redirects.get(urlparse(self.path).path)
+                if replay.latency:
+                    time.sleep(replay.latency)
+
+                if location:
+                    self.send_response(302)
+                    self.send_header("Location", location)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                if urlparse(self.path).path != "/search":
+                    # 跳轉後的原文頁面
+                    self.send_response(200)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                query = parse_qs(urlparse(self.path).query)
+                topic = query.get("q", [""])[0]
+                queued = replay._next_queued(topic)
+                if queued:
+                    status, headers = queued
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                body = replay._get_page(topic)
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if not head:
+                    self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """在後台線程啟動服務"""
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止服務"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("record", "serve"):
+        print(__doc__)
+        return
+
+    if sys.argv[1] == "record":
+        topics = sys.argv[2:]
+        if not topics:
+            print("[Error] 請指定要錄製的主題")
+            return
+        for topic in topics:
+            try:
+                record_fixture(topic)
+            except requests.exceptions.RequestException as e:
+                print(f"[Error] 錄製「{topic}」失敗: {e}")
+        return
+
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8765
+    server = ReplayServer(port=port).start()
+    print(f"[Info] 回放服務已啟動: {server.url_template}")
+    print("[Info] 按 Ctrl+C 停止")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
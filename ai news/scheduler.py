@@ -1,7 +1,8 @@
 import schedule
 import time
-from news_scraper import fetch_news, save_to_json
+from news_scraper import fetch_news, save_to_json, NewsFetchError
 from email_notifier import send_email_notification
+from link_resolver import get_default_resolver
 
 # === 配置 ===
 TOPICS = ["科技", "財經", "體育"]  # 可自定義主題列表
@@ -17,9 +18,17 @@ def daily_news_job():
     
     for topic in TOPICS:
         print(f"[Info] 正在抓取 '{topic}' 相關新聞...")
-        news_data = fetch_news(topic)
+        try:
+            news_data = fetch_news(topic)
+        except NewsFetchError as e:
+            # 上游熔斷時後續主題會立即失敗，不再逐個等待超時
+            print(f"[Error] '{topic}' 抓取失敗: {e}")
+            continue
         
         if news_data:
+            # 解析跳轉鏈接，保存原文地址
+            get_default_resolver().resolve_many(news_data)
+            
             # 保存為 JSON
             save_to_json(news_data, topic)
             
@@ -0,0 +1,139 @@
+"""
+近似重複新聞聚類
+同一事件常被多家媒體以略有不同的標題報導。對標題的字符 shingle
+計算 MinHash 簽名，用 LSH 分桶找出候選對，再以 Jaccard 相似度確認，
+把近似重複的新聞合併為一個事件（附帶來源列表）。原文地址相同的新聞直接合併。
+"""
+import hashlib
+import re
+
+# === 配置 ===
+SHINGLE_SIZE = 2              # 字符 shingle 長度（中文詞多為雙字）
+NUM_HASHES = 64               # MinHash 簽名長度
+BANDS = 32                    # LSH 分帶數，每帶 NUM_HASHES // BANDS 個值
+SIMILARITY_THRESHOLD = 0.25   # Jaccard 相似度達到此值視為同一事件（過低會合併同主題的不同事件）
+
+_ROWS = NUM_HASHES // BANDS
+_MAX_HASH = (1 << 64) - 1
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+def shingles(news):
+    """
+    取得新聞標題的字符 shingle 集合（忽略標點和空白）
+    摘要多是截斷的標題加上各篇共用的套話，會讓無關的新聞顯得相似，因此不參與比較。
+    :param news: 新聞數據 (dict)
+    :return: shingle 集合
+    """
+    text = _NON_WORD_RE.sub("", (news.get("title") or "").lower())
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+def _hash(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+
+def minhash(shingle_set):
+    """
+    計算 MinHash 簽名
+    使用單次哈希分箱（one permutation hashing）加旋轉填充空箱，
+    每個 shingle 只哈希一次，成本與 shingle 數量成線性關係。
+    :param shingle_set: shingle 集合
+    :return: 長度為 NUM_HASHES 的簽名 (tuple)
+    """
+    bins = [None] * NUM_HASHES
+    for shingle in shingle_set:
+        value = _hash(shingle)
+        index = value % NUM_HASHES
+        value //= NUM_HASHES
+        if bins[index] is None or value < bins[index]:
+            bins[index] = value
+    if all(value is None for value in bins):
+        return tuple(bins)
+
+    # 空箱借用右側最近非空箱的值，並按距離偏移，避免不同空箱取到相同值
+    signature = list(bins)
+    for i in range(NUM_HASHES):
+        if signature[i] is not None:
+            continue
+        distance = 1
+        while bins[(i + distance) % NUM_HASHES] is None:
+            distance += 1
+        signature[i] = bins[(i + distance) % NUM_HASHES] + distance * (_MAX_HASH // NUM_HASHES)
+    return tuple(signature)
+
+def jaccard(a, b):
+    """兩個集合的 Jaccard 相似度"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def cluster_stories(articles):
+    """
+    將近似重複的新聞合併為事件
+    :param articles: 新聞數據列表
+    :return: 事件列表，按首次出現的順序排列。每個事件是第一篇新聞的副本，
+             另加 sources（來源列表）和 related（被合併的其他新聞）
+    """
+    shingle_sets = [shingles(news) for news in articles]
+    parent = list(range(len(articles)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # 原文地址相同的必然是同一篇報導
+    first_by_url = {}
+    for i, news in enumerate(articles):
+        canonical = news.get("canonical_link")
+        if canonical:
+            j = first_by_url.setdefault(canonical, i)
+            if j != i:
+                parent[i] = j
+
+    buckets = {}
+    for i, shingle_set in enumerate(shingle_sets):
+        if not shingle_set:
+            continue
+        signature = minhash(shingle_set)
+        for band in range(BANDS):
+            key = (band, signature[band * _ROWS:(band + 1) * _ROWS])
+            members = buckets.setdefault(key, [])
+            for j in members:
+                root_i, root_j = find(i), find(j)
+                if root_i != root_j and jaccard(shingle_set, shingle_sets[j]) >= SIMILARITY_THRESHOLD:
+                    parent[max(root_i, root_j)] = min(root_i, root_j)
+            # 桶內每個事件只保留一個代表，重複報導很多時比較次數不會平方增長
+            if all(find(j) != find(i) for j in members):
+                members.append(i)
+
+    groups = {}
+    for i in range(len(articles)):
+        groups.setdefault(find(i), []).append(articles[i])
+
+    stories = []
+    for root in sorted(groups):
+        group = groups[root]
+        story = dict(group[0])
+        sources = []
+        for news in group:
+            source = news.get("source", "Google News")
+            if source not in sources:
+                sources.append(source)
+        story["sources"] = sources
+        story["related"] = group[1:]
+        stories.append(story)
+    return stories
+
+def expand_stories(stories):
+    """
+    將事件列表還原為新聞列表（保存 JSON 時使用）
+    :param stories: cluster_stories 的返回值
+    :return: 新聞數據列表
+    """
+    articles = []
+    for story in stories:
+        articles.append({key: value for key, value in story.items() if key not in ("sources", "related")})
+        articles.extend(story.get("related", []))
+    return articles
@@ -0,0 +1,105 @@
+"""
+新聞爬蟲性能基準（離線）
+所有請求都由本地回放服務處理，數據來自 fixtures/ 中錄製的頁面。
+
+運行並保存基準：
+    pytest test_benchmark.py --benchmark-autosave
+與上一次基準比較：
+    pytest test_benchmark.py --benchmark-compare
+"""
+import json
+import pytest
+import news_scraper
+from news_scraper import fetch_news, parse_news, save_to_json, NewsFetchError
+from news_index import NewsIndex
+from replay_harness import load_fixture
+from story_cluster import cluster_stories
+
+pytest.importorskip("pytest_benchmark")
+
+TOPICS = ["科技", "財經", "體育", "健康"]
+
+def test_parse_throughput(benchmark):
+    """純解析吞吐量：不含網絡往返"""
+    html = load_fixture("科技")
+    news_data = benchmark(parse_news, html, 100)
+
+    benchmark.extra_info["articles"] = len(news_data)
+    benchmark.extra_info["html_bytes"] = len(html.encode("utf-8"))
+    assert len(news_data) == 25
+    assert all(news["link"].startswith("https://news.google.com/read/") for news in news_data)
+
+def test_fetch_news(benchmark, offline_scraper):
+    """完整抓取路徑：本地 HTTP 請求 + 解析"""
+    news_data = benchmark(fetch_news, "科技", 15)
+
+    benchmark.extra_info["articles"] = len(news_data)
+    assert len(news_data) == 15
+    assert news_data[0]["source"] != "Google News"
+
+def test_fetch_news_fallback(benchmark, offline_scraper):
+    """頁面沒有 <article> 標籤時的後備解析路徑"""
+    news_data = benchmark(fetch_news, "fallback", 100)
+
+    benchmark.extra_info["articles"] = len(news_data)
+    assert len(news_data) == 25
+    assert all(news["source"] == "Google News" for news in news_data)
+    assert all(news["snippet"] != "無摘要" for news in news_data)
+
+def test_fetch_multi_topic(benchmark, offline_scraper):
+    """多主題批量抓取，對應定時任務的一輪執行"""
+    def run_batch():
+        return {topic: fetch_news(topic, max_articles=15) for topic in TOPICS}
+
+    results = benchmark(run_batch)
+
+    benchmark.extra_info["topics"] = len(results)
+    benchmark.extra_info["articles"] = sum(len(news) for news in results.values())
+    assert all(results.values())
+
+def test_save_to_json(benchmark, tmp_path, monkeypatch):
+    """JSON 持久化（含更新本地索引）"""
+    monkeypatch.chdir(tmp_path)
+    # 使用獨立的索引，不受其他測試影響，也不把夾具數據留在共享索引中
+    index = NewsIndex(str(tmp_path))
+    monkeypatch.setattr(news_scraper, "get_default_index", lambda: index)
+    news_data = parse_news(load_fixture("科技"), 100)
+
+    filename = benchmark(save_to_json, news_data, "科技")
+
+    with open(tmp_path / filename, "r", encoding="utf-8") as f:
+        assert json.load(f) == news_data
+    assert len(index) == len(news_data)
+
+def test_local_search(benchmark):
+    """本地全文搜索：約一萬條已保存新聞"""
+    index = NewsIndex()
+    for topic in TOPICS:
+        news_data = parse_news(load_fixture(topic), 100)
+        for copy in range(120):
+            index.add_articles([dict(news, link=f"{news['link']}#{copy}") for news in news_data])
+
+    results = benchmark(index.search, "台積電 輝達", 15)
+
+    benchmark.extra_info["indexed"] = len(index)
+    assert len(results) == 15
+    assert any("台積電" in news["title"] for news in results)
+
+def test_cluster_stories(benchmark):
+    """近似重複聚類：約八千條新聞，每個事件有上百篇改寫報導"""
+    articles = []
+    for topic in TOPICS:
+        articles += parse_news(load_fixture(topic), 100)
+    archive = [dict(news, title=f"{news['title']} {copy}", link=f"{news['link']}#{copy}")
+               for copy in range(100) for news in articles]
+
+    stories = benchmark.pedantic(cluster_stories, args=(archive,), rounds=3)
+
+    benchmark.extra_info["articles"] = len(archive)
+    benchmark.extra_info["stories"] = len(stories)
+    assert len(stories) < len(articles)
+
+def test_missing_fixture_raises(offline_scraper):
+    """沒有錄製的主題返回 404，fetch_news 應拋出 NewsFetchError 而不是返回空列表"""
+    with pytest.raises(NewsFetchError):
+        fetch_news("不存在的主題")
@@ -0,0 +1,98 @@
+"""
+測試跳轉鏈接解析
+"""
+import json
+import threading
+from link_resolver import LinkResolver, canonical_link
+from news_index import NewsIndex
+from story_cluster import cluster_stories
+
+def make_news(title, link, source="Google News"):
+    return {"title": title, "link": link, "snippet": "無摘要", "source": source, "image": None,
+            "scraped_at": "2025-12-08 10:00:00"}
+
+def test_resolve_many_follows_redirects_and_caches(replay_server, tmp_path):
+    base = replay_server.base_url
+    replay_server.add_redirect("/read/a", f"http://localhost:{replay_server.port}/publisher/a")
+    replay_server.add_redirect("/read/b", f"http://localhost:{replay_server.port}/publisher/b")
+    articles = [
+        make_news("台積電2奈米量產進度超前", f"{base}/read/a"),
+        make_news("央行理監事會決議利率不變", f"{base}/read/b"),
+        make_news("大谷翔平單季50轟50盜", f"{base}/read/unknown"),
+    ]
+    cache_file = tmp_path / "resolved_links.json"
+
+    resolver = LinkResolver(cache_file=str(cache_file))
+    assert resolver.resolve_many(articles) == 2
+
+    assert canonical_link(articles[0]) == f"http://localhost:{replay_server.port}/publisher/a"
+    assert canonical_link(articles[2]) == f"{base}/read/unknown"
+    assert json.loads(cache_file.read_text(encoding="utf-8"))[f"{base}/read/b"].endswith("/publisher/b")
+
+    # 新進程從緩存文件讀取，不再發送請求
+    fresh = [make_news("台積電2奈米量產進度超前", f"{base}/read/a")]
+    before = replay_server.request_count
+    LinkResolver(cache_file=str(cache_file)).apply_cached(fresh)
+    assert fresh[0]["canonical_link"].endswith("/publisher/a")
+    assert replay_server.request_count == before
+
+def test_concurrent_saves_leave_a_complete_cache(tmp_path):
+    cache_file = tmp_path / "resolved_links.json"
+    resolver = LinkResolver(cache_file=str(cache_file))
+    resolver.cache = {f"https://news.google.com/read/{i}": f"https://example.com/{i}" for i in range(200)}
+    errors = []
+
+    def save():
+        try:
+            resolver.save_cache()
+        except OSError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert json.loads(cache_file.read_text(encoding="utf-8")) == resolver.cache
+    assert [p.name for p in tmp_path.iterdir()] == ["resolved_links.json"]
+
+def test_resolvers_sharing_a_cache_file_keep_each_others_links(tmp_path):
+    cache_file = str(tmp_path / "resolved_links.json")
+    gui = LinkResolver(cache_file=cache_file)
+    scheduler = LinkResolver(cache_file=cache_file)
+
+    gui.cache["https://news.google.com/read/gui"] = "https://example.com/gui"
+    gui.save_cache()
+    scheduler.cache["https://news.google.com/read/scheduler"] = "https://example.com/scheduler"
+    scheduler.save_cache()
+
+    # 後保存的進程沒有覆蓋先保存的結果
+    assert json.loads((tmp_path / "resolved_links.json").read_text(encoding="utf-8")) == {
+        "https://news.google.com/read/gui": "https://example.com/gui",
+        "https://news.google.com/read/scheduler": "https://example.com/scheduler",
+    }
+
+    # GUI 不必重啟就能用上定時任務解析的鏈接
+    articles = [make_news("央行理監事會決議利率不變", "https://news.google.com/read/scheduler")]
+    gui.apply_cached(articles)
+    assert articles[0]["canonical_link"] == "https://example.com/scheduler"
+
+def test_same_publisher_url_is_one_story():
+    first = make_news("台積電2奈米量產進度超前", "https://news.google.com/read/a", "經濟日報")
+    second = make_news("晶圓代工龍頭新製程報捷", "https://news.google.com/read/b", "Yahoo奇摩新聞")
+    first["canonical_link"] = second["canonical_link"] = "https://money.udn.com/story/1"
+
+    stories = cluster_stories([first, second])
+
+    assert len(stories) == 1
+    assert stories[0]["sources"] == ["經濟日報", "Yahoo奇摩新聞"]
+
+def test_index_dedupes_by_publisher_url():
+    first = make_news("台積電2奈米量產進度超前", "https://news.google.com/read/a")
+    second = make_news("台積電2奈米量產進度超前", "https://news.google.com/read/b")
+    first["canonical_link"] = second["canonical_link"] = "https://money.udn.com/story/1"
+
+    index = NewsIndex()
+    assert index.add_articles([first, second]) == 1
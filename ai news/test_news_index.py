@@ -0,0 +1,65 @@
+"""
+測試本地新聞全文索引
+"""
+import json
+import os
+import news_index
+from news_index import NewsIndex, tokenize
+from news_scraper import parse_news, save_to_json
+from replay_harness import load_fixture
+
+def make_news(title, link, snippet="無摘要", source="Google News"):
+    return {"title": title, "link": link, "snippet": snippet, "source": source, "image": None,
+            "scraped_at": "2025-12-08 10:00:00"}
+
+def test_tokenize_cjk_bigrams_and_words():
+    assert tokenize("台積電AI晶片", for_query=True) == ["台積", "積電", "ai", "晶片"]
+    assert "電" in tokenize("台積電")
+    assert tokenize("OpenAI 燒錢", for_query=True) == ["openai", "燒錢"]
+    assert tokenize("ニュース", for_query=True) == ["ニュ", "ュー", "ース"]
+
+def test_search_ranks_title_matches_first():
+    index = NewsIndex()
+    index.add_articles([
+        make_news("央行理監事會決議利率不變", "a", snippet="台積電股價走高"),
+        make_news("台積電2奈米量產進度超前", "b"),
+        make_news("大谷翔平單季50轟50盜", "c"),
+    ])
+
+    results = index.search("台積電")
+    assert [news["link"] for news in results] == ["b", "a"]
+    assert index.search("棒球") == []
+    assert index.search("谷")[0]["link"] == "c"
+
+def test_add_articles_skips_duplicate_links():
+    index = NewsIndex()
+    news = make_news("台積電2奈米量產進度超前", "b")
+    assert index.add_articles([news, news]) == 1
+    assert index.add_articles([news]) == 0
+    assert len(index) == 1
+
+def test_refresh_only_reads_new_files(tmp_path):
+    index = NewsIndex(str(tmp_path))
+    path = tmp_path / "科技_news_2025-12-08.json"
+    path.write_text(json.dumps([make_news("台積電2奈米量產進度超前", "b")], ensure_ascii=False), encoding="utf-8")
+
+    assert index.refresh() == 1
+    assert index.refresh() == 0
+
+    other = tmp_path / "財經_news_2025-12-08.json"
+    other.write_text(json.dumps([make_news("央行理監事會決議利率不變", "a")], ensure_ascii=False), encoding="utf-8")
+    assert index.refresh() == 1
+    assert index.search("央行")[0]["link"] == "a"
+
+def test_save_to_json_updates_default_index(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(news_index, "_default_index", None)
+    news_data = parse_news(load_fixture("財經"), 100)
+
+    filename = save_to_json(news_data, "財經")
+
+    index = news_index.get_default_index()
+    assert len(index) == len(news_data)
+    assert index.search("比特幣")[0]["title"].startswith("比特幣")
+    assert index.refresh() == 0
+    assert os.path.exists(filename)
@@ -0,0 +1,135 @@
+"""
+測試限速器與熔斷器
+"""
+import pytest
+import rate_limiter
+from rate_limiter import TokenBucket, CircuitBreaker, HostGuard, CircuitOpenError, parse_retry_after
+from news_scraper import fetch_news, NewsFetchError
+
+class FakeClock:
+    """可手動推進的時鐘，sleep 只推進時間不真正等待"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+def test_bucket_allows_burst_then_paces():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, burst=2, clock=clock, sleep=clock.sleep)
+
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.slept == []
+
+    bucket.acquire()
+    assert clock.slept == [pytest.approx(0.5)]
+
+def test_bucket_halves_rate_and_honours_retry_after():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, burst=2, clock=clock, sleep=clock.sleep)
+
+    bucket.throttled(retry_after=5)
+    assert bucket.rate == 1.0
+
+    start = clock.now
+    bucket.acquire()
+    assert clock.now - start == pytest.approx(5)
+
+def test_bucket_recovers_after_success():
+    bucket = TokenBucket(rate=1.0, min_rate=0.1, recovery_step=0.25)
+    for _ in range(10):
+        bucket.throttled()
+    assert bucket.rate == pytest.approx(0.1)
+
+    for _ in range(10):
+        bucket.succeeded()
+    assert bucket.rate == 1.0
+
+def test_parse_retry_after():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("99999") == rate_limiter.MAX_RETRY_AFTER
+    assert parse_retry_after("Thu, 01 Jan 1970 00:00:00 GMT") == 0.0
+    assert parse_retry_after("garbage") is None
+    assert parse_retry_after(None) is None
+
+def test_breaker_opens_and_probes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.retry_in() == pytest.approx(30)
+
+    clock.now += 30
+    assert breaker.allow()
+    assert not breaker.allow()  # 同一時間只放行一個探測請求
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+def test_guard_fails_fast_when_open():
+    clock = FakeClock()
+    guard = HostGuard(
+        "news.google.com",
+        TokenBucket(clock=clock, sleep=clock.sleep),
+        CircuitBreaker(failure_threshold=1, reset_timeout=60, clock=clock)
+    )
+    guard.record_error()
+
+    with pytest.raises(CircuitOpenError):
+        guard.before_request()
+
+def test_guard_fails_fast_during_long_retry_after():
+    clock = FakeClock()
+    guard = HostGuard(
+        "news.google.com",
+        TokenBucket(clock=clock, sleep=clock.sleep),
+        CircuitBreaker(failure_threshold=3, clock=clock),
+        max_wait=10
+    )
+    guard.record_response(429, "60")
+
+    # 熔斷器仍是關閉狀態，但不會阻塞 60 秒
+    with pytest.raises(CircuitOpenError) as excinfo:
+        guard.before_request()
+    assert excinfo.value.retry_in == pytest.approx(60)
+    assert clock.slept == []
+
+    clock.now += 60
+    guard.before_request()
+
+def test_fetch_news_429_raises_then_next_call_succeeds(offline_scraper):
+    offline_scraper.queue_response("科技", 429, {"Retry-After": "0"})
+
+    with pytest.raises(NewsFetchError):
+        fetch_news("科技")
+    assert len(fetch_news("科技", max_articles=5)) == 5
+
+def test_fetch_news_circuit_opens_on_repeated_failures(offline_scraper, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "FAILURE_THRESHOLD", 2)
+    rate_limiter.reset_guards()
+    for _ in range(2):
+        offline_scraper.queue_response("財經", 503)
+        with pytest.raises(NewsFetchError):
+            fetch_news("財經")
+
+    before = offline_scraper.request_count
+    with pytest.raises(NewsFetchError, match="暫時不可用"):
+        fetch_news("體育")
+    assert offline_scraper.request_count == before
@@ -1,7 +1,7 @@
 """
 測試新聞爬蟲功能
 """
-from news_scraper import fetch_news
+from news_scraper import fetch_news, NewsFetchError
 
 def test_news_scraper():
     print("=" * 60)
@@ -12,7 +12,11 @@ def test_news_scraper():
     print(f"\n搜索主題: {topic}")
     print("-" * 60)
     
-    news_data = fetch_news(topic, max_articles=5)
+    try:
+        news_data = fetch_news(topic, max_articles=5)
+    except NewsFetchError as e:
+        print(f"\n❌ 抓取失敗: {e}")
+        news_data = []
     
     if news_data:
         print(f"\n✅ 成功找到 {len(news_data)} 條新聞\n")
@@ -0,0 +1,63 @@
+"""
+測試近似重複新聞聚類
+"""
+from news_scraper import parse_news
+from replay_harness import load_fixture
+from story_cluster import cluster_stories, expand_stories, shingles, minhash, NUM_HASHES
+
+def make_news(title, source, snippet="無摘要"):
+    return {"title": title, "link": f"https://news.google.com/read/{title}", "snippet": snippet,
+            "source": source, "image": None, "scraped_at": "2025-12-08 10:00:00"}
+
+def test_shingles_ignore_punctuation_and_missing_snippet():
+    assert shingles(make_news("台積電！2奈米", "A")) == {"台積", "積電", "電2", "2奈", "奈米"}
+    assert shingles(make_news("", "A")) == set()
+
+def test_minhash_is_deterministic():
+    signature = minhash(shingles(make_news("台積電2奈米量產進度超前", "A")))
+    assert len(signature) == NUM_HASHES
+    assert signature == minhash(shingles(make_news("台積電2奈米量產進度超前", "B")))
+
+def test_near_duplicates_grouped_with_sources():
+    stories = cluster_stories([
+        make_news("中職總冠軍賽第七戰 統一獅逆轉封王", "聯合新聞網"),
+        make_news("央行理監事會決議利率不變", "經濟日報"),
+        make_news("統一獅第七戰逆轉 拿下中職總冠軍", "自由時報"),
+        make_news("統一獅第七戰逆轉 拿下中職總冠軍", "聯合新聞網"),
+    ])
+
+    assert len(stories) == 2
+    assert stories[0]["title"] == "中職總冠軍賽第七戰 統一獅逆轉封王"
+    assert stories[0]["sources"] == ["聯合新聞網", "自由時報"]
+    assert len(stories[0]["related"]) == 2
+    assert stories[1]["sources"] == ["經濟日報"]
+    assert stories[1]["related"] == []
+
+def test_same_topic_different_stories_stay_apart():
+    stories = cluster_stories([
+        make_news("三星HBM4送樣輝達 記憶體大戰再升溫", "iThome"),
+        make_news("SK海力士HBM4率先送樣輝達 三星急起直追", "聯合新聞網"),
+    ])
+
+    assert len(stories) == 2
+
+def test_fixture_stories_across_topics():
+    articles = []
+    for topic in ["科技", "財經", "體育", "健康"]:
+        articles += parse_news(load_fixture(topic), 100)
+
+    stories = cluster_stories(articles)
+
+    assert len(stories) < len(articles)
+    titles = {story["title"]: story for story in stories}
+    assert len(titles["台積電2奈米量產進度超前 蘋果與輝達搶先下單"]["related"]) == 1
+    assert titles["油價連兩週下跌 中油宣布汽柴油各降0.2元"]["related"][0]["title"].startswith("中油")
+    assert "大谷翔平達成50轟50盜 史上第一人" not in titles
+    assert "SK海力士HBM4率先送樣輝達 三星急起直追" in titles
+
+def test_expand_stories_restores_articles():
+    articles = [
+        make_news("中職總冠軍賽第七戰 統一獅逆轉封王", "聯合新聞網"),
+        make_news("統一獅第七戰逆轉 拿下中職總冠軍", "自由時報"),
+    ]
+    assert expand_stories(cluster_stories(articles)) == articles
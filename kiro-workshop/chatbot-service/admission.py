@@ -0,0 +1,266 @@
+"""Admission control for chat turns.
+
+Every turn that runs the agent needs one of ``max_concurrency`` slots. When
+they are all taken the turn waits in a short queue. If the queue is full, or
+no slot frees up within ``queue_timeout`` seconds, the turn is turned away at
+once (503 with Retry-After) instead of adding to the load on Bedrock and the
+backend. Each session may also start only so many turns per minute; more are
+refused with 429.
+"""
+import asyncio
+import math
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional
+from metrics import Counter
+from protocol import error_body
+from tracing import tracer
+
+# Why a turn was refused
+RATE_LIMITED = 'rate_limited'
+QUEUE_FULL = 'queue_full'
+QUEUE_TIMEOUT = 'queue_timeout'
+REJECTION_REASONS = (RATE_LIMITED, QUEUE_FULL, QUEUE_TIMEOUT)
+
+# Default limits for a service built without a configuration
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_SESSION_BURST = 10
+
+# Rate limit buckets kept before idle, refilled ones are dropped
+MAX_TRACKED_SESSIONS = 10000
+
+
+class AdmissionRejected(Exception):
+    """A chat turn was refused; answer with ``status`` and a Retry-After header."""
+
+    def __init__(self, reason: str, retry_after: float):
+        """Initialize the rejection.
+
+        Args:
+            reason: One of :data:`REJECTION_REASONS`
+            retry_after: Seconds until a retry may succeed
+        """
+        if reason == RATE_LIMITED:
+            self.status, self.code = 429, "RATE_LIMITED"
+            message = "Too many messages for this conversation. Please wait a moment."
+        else:
+            self.status, self.code = 503, "SERVER_BUSY"
+            message = "The assistant is busy right now. Please try again in a few seconds."
+        super().__init__(message)
+        self.reason = reason
+        self.message = message
+        self.retry_after = max(1, math.ceil(retry_after))
+
+    def to_dict(self) -> dict:
+        """Error response body."""
+        return error_body(self.code, self.message)
+
+    def to_event(self) -> dict:
+        """Stream ``error`` event, for a turn refused after its stream started."""
+        return {"type": "error", "message": self.message, "code": self.code, "retryAfter": self.retry_after}
+
+
+class SessionRateLimiter:
+    """Token bucket per session: ``per_minute`` turns a minute, in bursts of up to ``burst``."""
+
+    def __init__(self, per_minute: float, burst: int = DEFAULT_SESSION_BURST):
+        """Initialize the limiter.
+
+        Args:
+            per_minute: Sustained turns per minute allowed for one session
+            burst: Turns a session may send back to back
+        """
+        self.rate = per_minute / 60
+        self.burst = max(1, burst)
+        # Session id -> [tokens, time of last update]
+        self._buckets: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, session_id: str) -> float:
+        """Take a turn from a session's allowance.
+
+        Returns:
+            0 if the turn may go ahead, otherwise seconds until it would
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(session_id)
+            if bucket is None:
+                if len(self._buckets) >= MAX_TRACKED_SESSIONS:
+                    self._prune(now)
+                bucket = self._buckets[session_id] = [float(self.burst), now]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens >= 1:
+                bucket[0] = tokens - 1
+                return 0.0
+            bucket[0] = tokens
+            return (1 - tokens) / self.rate
+
+    def _prune(self, now: float):
+        # A bucket that has refilled is the same as a new one
+        refill = self.burst / self.rate
+        for session_id in [s for s, (tokens, updated) in self._buckets.items() if now - updated >= refill]:
+            del self._buckets[session_id]
+
+
+class AdmissionController:
+    """Bounded agent concurrency with a short, deadline-limited wait queue and per-session rate limits.
+
+    Use :meth:`slot` from threads and :meth:`slot_async` from an event loop
+    (the ASGI server); each has ``max_concurrency`` slots.
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, max_queue: Optional[int] = None,
+                 queue_timeout: Optional[float] = None, session_rate: float = 0,
+                 session_burst: int = DEFAULT_SESSION_BURST):
+        """Initialize the controller.
+
+        Args:
+            max_concurrency: Agent invocations running at once
+            max_queue: Turns allowed to wait for a slot (None for no limit)
+            queue_timeout: Seconds a turn may wait for a slot (None to wait indefinitely)
+            session_rate: Turns per minute per session (0 for no limit)
+            session_burst: Turns a session may send back to back
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.rate_limiter = SessionRateLimiter(session_rate, session_burst) if session_rate else None
+        self.rejections = Counter(('reason',))
+        self.active = 0
+        self.queued = 0
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._async_slots = asyncio.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds a refused client is asked to wait."""
+        return self.queue_timeout or 1
+
+    def check_rate(self, session_id: str):
+        """Count a turn against its session's rate limit.
+
+        Raises:
+            AdmissionRejected: If the session is over its limit
+        """
+        if self.rate_limiter is None:
+            return
+        wait = self.rate_limiter.acquire(session_id)
+        if wait:
+            self._reject(RATE_LIMITED, wait)
+
+    def check_capacity(self):
+        """Refuse a turn up front if it would find the queue full.
+
+        Streams call this before the response starts, so a saturated service
+        can still answer them with a status code.
+
+        Raises:
+            AdmissionRejected: If every slot is taken and the queue is full
+        """
+        with self._lock:
+            full = (self.max_queue is not None and self.active >= self.max_concurrency
+                    and self.queued >= self.max_queue)
+        if full:
+            self._reject(QUEUE_FULL, self.retry_after)
+
+    @contextmanager
+    def slot(self):
+        """Hold an agent slot for the duration of the block, waiting in the queue if needed.
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait times out
+        """
+        if not self._slots.acquire(blocking=False):
+            self._enqueue()
+            try:
+                with tracer.start_as_current_span('admission.wait'):
+                    acquired = self._slots.acquire(timeout=self.queue_timeout)
+            finally:
+                self._dequeue()
+            if not acquired:
+                self._reject(QUEUE_TIMEOUT, self.retry_after)
+        self._started()
+        try:
+            yield
+        finally:
+            self._finished()
+            self._slots.release()
+
+    @asynccontextmanager
+    async def slot_async(self):
+        """Async version of :meth:`slot`."""
+        if self._async_slots.locked():
+            self._enqueue()
+            try:
+                with tracer.start_as_current_span('admission.wait'):
+                    await asyncio.wait_for(self._async_slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._reject(QUEUE_TIMEOUT, self.retry_after)
+            finally:
+                self._dequeue()
+        else:
+            await self._async_slots.acquire()
+        self._started()
+        try:
+            yield
+        finally:
+            self._finished()
+            self._async_slots.release()
+
+    def stats(self) -> dict:
+        """Slots in use, queue depth and rejections by reason."""
+        with self._lock:
+            active, queued = self.active, self.queued
+        return {
+            "active": active,
+            "max_concurrency": self.max_concurrency,
+            "queued": queued,
+            "max_queue": self.max_queue,
+            "rejections": {reason: int(self.rejections.value(reason)) for reason in REJECTION_REASONS}
+        }
+
+    def _enqueue(self):
+        with self._lock:
+            full = self.max_queue is not None and self.queued >= self.max_queue
+            if not full:
+                self.queued += 1
+        if full:
+            self._reject(QUEUE_FULL, self.retry_after)
+
+    def _dequeue(self):
+        with self._lock:
+            self.queued -= 1
+
+    def _started(self):
+        with self._lock:
+            self.active += 1
+
+    def _finished(self):
+        with self._lock:
+            self.active -= 1
+
+    def _reject(self, reason: str, retry_after: float):
+        self.rejections.inc(reason)
+        raise AdmissionRejected(reason, retry_after)
+
+
+def create_admission_controller(config) -> AdmissionController:
+    """Create the admission controller described by a configuration.
+
+    Args:
+        config: Config with the concurrency, queue and rate limit settings
+
+    Returns:
+        AdmissionController
+    """
+    return AdmissionController(
+        max_concurrency=config.max_concurrent_agents,
+        max_queue=config.admission_queue_size,
+        queue_timeout=config.admission_queue_timeout,
+        session_rate=config.session_rate_limit,
+        session_burst=config.session_rate_burst
+    )
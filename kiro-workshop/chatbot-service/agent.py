@@ -2,9 +2,12 @@
 import logging
 import boto3
 from strands import Agent
-from strands.models import BedrockModel
-from config import Config
+from strands.models import BedrockModel, Model
+from strands.tools.executors._executor import ToolExecutor
+from typing import List, Optional
+from config import Config, get_config
 from tools import list_products, get_recommendations, add_to_cart, remove_from_cart, view_cart
+from tools.executor import ReadParallelToolExecutor
 
 logger = logging.getLogger(__name__)
 
@@ -35,51 +38,113 @@ SYSTEM_PROMPT = """You are a helpful shopping assistant for an e-commerce store.
 Remember: Your goal is to make shopping easy and enjoyable for customers!"""
 
 
-def create_agent(config: Config) -> Agent:
+TOOLS = [
+    list_products,
+    get_recommendations,
+    add_to_cart,
+    remove_from_cart,
+    view_cart
+]
+
+
+def create_model(config: Optional[Config] = None) -> BedrockModel:
+    """Create the Bedrock Nova Pro model.
+    
+    The model holds no conversation state and can be shared by all agents.
+    
+    Args:
+        config: Configuration object with AWS credentials and settings
+            (defaults to the process-wide config)
+        
+    Returns:
+        Configured BedrockModel
+    """
+    config = config or get_config()
+    
+    # Create boto3 session with credentials
+    boto_session = boto3.Session(**config.get_boto_session_config())
+    
+    bedrock_model = BedrockModel(
+        model_id=config.model_id,
+        boto_session=boto_session,
+        temperature=config.temperature,
+        max_tokens=config.max_tokens,
+        streaming=True
+    )
+    
+    logger.info(f"Initialized BedrockModel with model_id={config.model_id}")
+    return bedrock_model
+
+
+def create_agent(config: Optional[Config] = None, model: Optional[Model] = None,
+                 messages: Optional[List[dict]] = None,
+                 tool_executor: Optional[ToolExecutor] = None) -> Agent:
     """Create and configure the Strands Agent with Bedrock Nova Pro.
     
     Args:
         config: Configuration object with AWS credentials and settings
+            (defaults to the process-wide config)
+        model: Model to use (defaults to a new BedrockModel)
+        messages: Conversation history to start from
+        tool_executor: How tool calls are run (defaults to a
+            ReadParallelToolExecutor with the configured concurrency)
         
     Returns:
         Configured Strands Agent
     """
-    logger.info("Creating Strands Agent with Bedrock Nova Pro")
-    
     try:
-        # Create boto3 session with credentials
-        boto_session = boto3.Session(**config.get_boto_session_config())
-        
-        # Create Bedrock model
-        bedrock_model = BedrockModel(
-            model_id=config.model_id,
-            boto_session=boto_session,
-            temperature=config.temperature,
-            max_tokens=config.max_tokens,
-            streaming=True
-        )
-        
-        logger.info(f"Initialized BedrockModel with model_id={config.model_id}")
-        
-        # Create agent with tools
+        if tool_executor is None:
+            tool_executor = ReadParallelToolExecutor((config or get_config()).tool_concurrency)
         agent = Agent(
-            model=bedrock_model,
+            model=model or create_model(config),
+            messages=messages,
             system_prompt=SYSTEM_PROMPT,
-            tools=[
-                list_products,
-                get_recommendations,
-                add_to_cart,
-                remove_from_cart,
-                view_cart
-            ],
+            tools=TOOLS,
+            tool_executor=tool_executor,
+            callback_handler=None,
             name="ShoppingAssistant"
         )
-        
-        logger.info("Successfully created Strands Agent with 5 tools")
-        logger.info("Registered tools: list_products, get_recommendations, add_to_cart, remove_from_cart, view_cart")
-        
+        logger.debug(f"Created Strands Agent with {len(TOOLS)} tools")
         return agent
         
     except Exception as e:
         logger.error(f"Failed to create agent: {e}", exc_info=True)
         raise
+
+
+class AgentFactory:
+    """Creates one short-lived agent per conversation turn.
+    
+    A Strands Agent keeps the conversation in ``agent.messages`` and refuses
+    concurrent invocations, so sharing one agent between sessions mixes their
+    histories and serializes every request. Each turn instead gets its own
+    agent seeded with that session's history. Agents are cheap to build
+    (well under a millisecond); the Bedrock model and its connection pool
+    are created once and shared, as is the stateless tool executor.
+    """
+    
+    def __init__(self, config: Optional[Config] = None, model: Optional[Model] = None,
+                 tool_executor: Optional[ToolExecutor] = None):
+        """Initialize the factory.
+        
+        Args:
+            config: Configuration object (defaults to the process-wide config)
+            model: Shared model (defaults to a new BedrockModel)
+            tool_executor: Shared tool executor (defaults to a
+                ReadParallelToolExecutor with the configured concurrency)
+        """
+        logger.info("Creating Strands Agent factory with Bedrock Nova Pro")
+        self.model = model or create_model(config)
+        self.tool_executor = tool_executor or ReadParallelToolExecutor((config or get_config()).tool_concurrency)
+        logger.info(f"Registered tools: {', '.join(t.tool_name for t in TOOLS)}")
+    
+    def __call__(self, messages: Optional[List[dict]] = None) -> Agent:
+        """Create an agent for one turn.
+        
+        Args:
+            messages: The session's conversation history (copied, not shared)
+            
+        Returns:
+            New Strands Agent
+        """
+        return create_agent(model=self.model, messages=list(messages or []), tool_executor=self.tool_executor)
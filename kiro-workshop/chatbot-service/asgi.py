@@ -0,0 +1,264 @@
+"""ASGI HTTP server for the chatbot service.
+
+Serves the same API as :mod:`server`, but on an event loop: chat turns run
+the agent with ``invoke_async``/``stream_async``, so the model stream and the
+async tools share the server's loop instead of each request holding a thread.
+
+Run it with :func:`run_asgi_server` (``SERVER_MODE=asgi``, the default), or
+directly with uvicorn::
+
+    uvicorn asgi:build_app --factory --port 5001
+"""
+import logging
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional, Tuple
+import uvicorn
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from strands.models import Model
+from admission import AdmissionRejected, create_admission_controller
+from agent import AgentFactory
+from chatbot_service import ChatbotService
+from config import Config, get_config
+from context_window import ContextWindow
+from logging_setup import AccessLogMiddleware, setup_logging
+from metrics import PROMETHEUS_CONTENT_TYPE
+from protocol import (
+    CORS_HEADERS, CORS_METHODS, CORS_ORIGINS, SSE_HEADERS,
+    ChatRequestError, error_body, format_sse, validate_chat_request, wants_json_metrics
+)
+from session_manager import SessionManager
+from session_store import create_session_store
+from response_cache import ResponseCache
+from tools.backend_client import close_backend_client
+from tracing import TracingMiddleware, create_span_exporter, flush_tracing, setup_tracing
+
+logger = logging.getLogger(__name__)
+
+# Error codes for HTTP errors raised by routing
+HTTP_ERROR_CODES = {
+    404: ("NOT_FOUND", "Endpoint not found"),
+    405: ("METHOD_NOT_ALLOWED", "HTTP method not allowed for this endpoint"),
+}
+
+
+def create_asgi_app(chatbot_service: ChatbotService) -> Starlette:
+    """Create the ASGI application.
+
+    On shutdown the app stops the session manager (closing its store) and
+    closes the backend connection pool.
+
+    Args:
+        chatbot_service: ChatbotService instance
+
+    Returns:
+        Configured Starlette app
+    """
+    async def read_chat_request(request: Request) -> Tuple[str, Optional[str]]:
+        data = None
+        if request.headers.get('content-type', '').startswith('application/json'):
+            try:
+                data = await request.json()
+            except ValueError:
+                data = None
+        return validate_chat_request(data)
+
+    async def health_check(request: Request) -> JSONResponse:
+        """Health check endpoint."""
+        return JSONResponse({
+            "status": "healthy",
+            "service": "shopping-assistant-chatbot",
+            "version": "1.0.0",
+            "timestamp": datetime.now().isoformat()
+        })
+
+    async def metrics(request: Request) -> Response:
+        """Service metrics in Prometheus text format, or JSON if asked for."""
+        if wants_json_metrics(request.query_params.get('format'), request.headers.get('accept')):
+            return JSONResponse(chatbot_service.get_metrics())
+        return Response(chatbot_service.get_prometheus_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+    async def chat(request: Request) -> JSONResponse:
+        """Process chat messages."""
+        message, session_id = await read_chat_request(request)
+
+        try:
+            reply, session_id = await chatbot_service.process_message_async(message, session_id)
+        except AdmissionRejected:
+            raise
+        except Exception as e:
+            logger.error(f"Error processing chat request: {e}", exc_info=True)
+            return JSONResponse(error_body(
+                "PROCESSING_ERROR",
+                "An error occurred while processing your message. Please try again."
+            ), status_code=500)
+
+        request.state.session_id = session_id
+        return JSONResponse({
+            "reply": reply,
+            "sessionId": session_id,
+            "timestamp": datetime.now().isoformat()
+        })
+
+    async def chat_stream(request: Request):
+        """Process a chat message, streaming tokens and tool events as they arrive."""
+        message, session_id = await read_chat_request(request)
+
+        try:
+            session_id, events = await chatbot_service.stream_message_async(message, session_id)
+        except AdmissionRejected:
+            raise
+        except Exception as e:
+            logger.error(f"Error processing chat stream request: {e}", exc_info=True)
+            return JSONResponse(error_body(
+                "PROCESSING_ERROR",
+                "An error occurred while processing your message. Please try again."
+            ), status_code=500)
+
+        request.state.session_id = session_id
+
+        async def generate():
+            # A client disconnect cancels this generator, which cancels the agent
+            try:
+                yield format_sse("session", {"type": "session", "sessionId": session_id})
+                async for event in events:
+                    yield format_sse(event["type"], event)
+            finally:
+                await events.aclose()
+
+        return StreamingResponse(generate(), media_type='text/event-stream', headers=SSE_HEADERS)
+
+    async def chat_request_error(request: Request, exc: ChatRequestError) -> JSONResponse:
+        logger.warning(f"Invalid chat request: {exc.message}")
+        return JSONResponse(exc.to_dict(), status_code=exc.status)
+
+    async def admission_rejected(request: Request, exc: AdmissionRejected) -> JSONResponse:
+        logger.warning(f"Refused chat request: {exc.reason}")
+        return JSONResponse(exc.to_dict(), status_code=exc.status, headers={'Retry-After': str(exc.retry_after)})
+
+    async def http_error(request: Request, exc: HTTPException) -> JSONResponse:
+        code, message = HTTP_ERROR_CODES.get(exc.status_code, ("BAD_REQUEST", str(exc.detail)))
+        logger.warning(f"{request.method} {request.url.path}: {exc.status_code} {exc.detail}")
+        return JSONResponse(error_body(code, message), status_code=exc.status_code)
+
+    async def internal_error(request: Request, exc: Exception) -> JSONResponse:
+        logger.error(f"Internal server error: {exc}", exc_info=exc)
+        return JSONResponse(error_body(
+            "INTERNAL_ERROR",
+            "An internal error occurred. Please try again later."
+        ), status_code=500)
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        yield
+        logger.info("Shutting down chatbot service")
+        chatbot_service.session_manager.stop()
+        close_backend_client()
+        flush_tracing()
+
+    logger.info(f"Configured CORS for origins: {', '.join(CORS_ORIGINS)}")
+
+    return Starlette(
+        routes=[
+            Route('/api/health', health_check, methods=['GET']),
+            Route('/api/metrics', metrics, methods=['GET']),
+            Route('/api/chat', chat, methods=['POST']),
+            Route('/api/chat/stream', chat_stream, methods=['POST']),
+        ],
+        middleware=[
+            Middleware(AccessLogMiddleware),
+            Middleware(TracingMiddleware),
+            Middleware(
+                CORSMiddleware,
+                allow_origins=CORS_ORIGINS,
+                allow_methods=CORS_METHODS,
+                allow_headers=CORS_HEADERS
+            )
+        ],
+        exception_handlers={
+            ChatRequestError: chat_request_error,
+            AdmissionRejected: admission_rejected,
+            HTTPException: http_error,
+            Exception: internal_error,
+        },
+        lifespan=lifespan
+    )
+
+
+def build_chatbot_service(config: Config, model: Optional[Model] = None) -> ChatbotService:
+    """Build the chatbot service and its session manager from a configuration.
+
+    Args:
+        config: Configuration to build from
+        model: Model for the agents (defaults to a new BedrockModel)
+
+    Returns:
+        Configured ChatbotService
+    """
+    session_manager = SessionManager(
+        timeout_minutes=config.session_timeout_minutes,
+        context_window=ContextWindow(config.history_max_tokens, config.summary_max_tokens),
+        store=create_session_store(config)
+    )
+    return ChatbotService(
+        AgentFactory(config, model=model),
+        session_manager,
+        admission=create_admission_controller(config),
+        response_cache=(
+            ResponseCache(config.response_cache_size, config.response_cache_ttl)
+            if config.response_cache_size else None
+        )
+    )
+
+
+def build_app() -> Starlette:
+    """Build the service and its ASGI app from the current configuration.
+
+    This is the uvicorn app factory; each worker process calls it once.
+
+    Returns:
+        Configured Starlette app
+    """
+    config = get_config()
+    setup_logging(config.log_level, config.log_format, config.log_sample_rate)
+    setup_tracing(create_span_exporter(config.trace_exporter, config.trace_file))
+    return create_asgi_app(build_chatbot_service(config))
+
+
+def run_asgi_server(host: str = '0.0.0.0', port: int = 5001, workers: int = 1,
+                    keep_alive: int = 5, graceful_shutdown: int = 30):
+    """Run the ASGI server with uvicorn.
+
+    Args:
+        host: Host to bind to
+        port: Port to listen on
+        workers: Number of worker processes
+        keep_alive: Seconds to keep idle client connections open
+        graceful_shutdown: Seconds to let in-flight requests finish on shutdown
+    """
+    if workers > 1 and get_config().session_store == 'memory':
+        logger.warning(
+            f"Running {workers} workers with SESSION_STORE=memory: sessions are kept per worker, "
+            "so a conversation must stay on one worker"
+        )
+    logger.info(f"Starting ASGI server on {host}:{port} with {workers} worker(s)")
+    uvicorn.run(
+        "asgi:build_app",
+        factory=True,
+        host=host,
+        port=port,
+        workers=workers,
+        timeout_keep_alive=keep_alive,
+        timeout_graceful_shutdown=graceful_shutdown,
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        log_config=None,
+        # AccessLogMiddleware writes the access log
+        access_log=False
+    )
@@ -1,27 +1,159 @@
 """Main chatbot service orchestration."""
+import asyncio
+import contextvars
 import logging
+import queue
+import threading
 import time
-from typing import Optional, Tuple
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from opentelemetry import trace
 from strands import Agent
+from admission import DEFAULT_MAX_CONCURRENCY, REJECTION_REASONS, AdmissionController, AdmissionRejected
+from context_window import with_summary
+from logging_setup import SAMPLED
+from metrics import Counter, PrometheusText
+from response_cache import ResponseCache
 from session_manager import SessionManager
+from tools.backend_client import get_backend_pool_stats
+from tools.turn_cache import turn_scope
+from tracing import get_stage_metrics, tracer
 
 logger = logging.getLogger(__name__)
 
 
+# Prefix of the metric names in the Prometheus format
+METRICS_PREFIX = 'chatbot_'
+
+# Seconds a finished stream waits for its agent thread to stop after cancelling it
+STREAM_WORKER_JOIN_TIMEOUT = 5.0
+
+# Kinds of failed turns counted in the metrics: the agent run, or handling around it
+ERROR_KINDS = ('agent', 'service')
+
+AGENT_ERROR_REPLY = (
+    "I apologize, but I'm having trouble processing your request right now. "
+    "Please try again in a moment."
+)
+SERVICE_ERROR_REPLY = (
+    "I apologize, but something went wrong. "
+    "Please try again or start a new conversation."
+)
+
+
+class SessionLocks:
+    """One lock per active session, dropped when no request holds or waits for it.
+    
+    Use :meth:`hold` from threads (with the default ``threading.Lock``) or
+    :meth:`hold_async` from an event loop (with ``asyncio.Lock``).
+    """
+    
+    def __init__(self, lock_factory: Callable[[], Any] = threading.Lock):
+        """Initialize the lock table.
+        
+        Args:
+            lock_factory: Creates the per-session lock
+        """
+        self._lock_factory = lock_factory
+        self._locks: Dict[str, list] = {}
+        self._guard = threading.Lock()
+    
+    def _checkout(self, session_id: str) -> list:
+        with self._guard:
+            entry = self._locks.get(session_id)
+            if entry is None:
+                entry = self._locks[session_id] = [self._lock_factory(), 0]
+            entry[1] += 1
+            return entry
+    
+    def _checkin(self, session_id: str, entry: list):
+        with self._guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[session_id]
+    
+    @contextmanager
+    def hold(self, session_id: str):
+        """Hold the lock for a session for the duration of the block.
+        
+        Args:
+            session_id: Session to lock
+        """
+        entry = self._checkout(session_id)
+        try:
+            with tracer.start_as_current_span('session.lock'):
+                entry[0].acquire()
+            try:
+                yield
+            finally:
+                entry[0].release()
+        finally:
+            self._checkin(session_id, entry)
+    
+    @asynccontextmanager
+    async def hold_async(self, session_id: str):
+        """Async version of :meth:`hold` for locks created by ``asyncio.Lock``.
+        
+        Args:
+            session_id: Session to lock
+        """
+        entry = self._checkout(session_id)
+        try:
+            with tracer.start_as_current_span('session.lock'):
+                await entry[0].acquire()
+            try:
+                yield
+            finally:
+                entry[0].release()
+        finally:
+            self._checkin(session_id, entry)
+    
+    def __len__(self) -> int:
+        with self._guard:
+            return len(self._locks)
+
+
 class ChatbotService:
-    """Main service class for the shopping assistant chatbot."""
+    """Main service class for the shopping assistant chatbot.
+    
+    Every turn runs on its own agent built from the session's history.
+    Requests for the same session are serialized by a per-session lock;
+    different sessions run in parallel, up to ``max_concurrency`` agent
+    invocations at once. An :class:`AdmissionController` can also bound the
+    wait for an agent and rate-limit sessions; turns it refuses raise
+    :class:`AdmissionRejected` (or end a stream with an ``error`` event).
+    With a :class:`ResponseCache`, opening messages already answered for
+    the current catalog skip the agent entirely.
+    """
     
-    def __init__(self, agent: Agent, session_manager: SessionManager):
+    def __init__(self, agent_factory: Callable[[List[dict]], Agent], session_manager: SessionManager,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 response_cache: Optional[ResponseCache] = None,
+                 admission: Optional[AdmissionController] = None):
         """Initialize the chatbot service.
         
         Args:
-            agent: Configured Strands Agent
+            agent_factory: Creates an agent seeded with a conversation history
             session_manager: Session manager instance
+            max_concurrency: Maximum number of agent invocations running at once
+                (ignored when ``admission`` is given)
+            response_cache: Optional cache of first-turn replies
+            admission: Admission controller; defaults to ``max_concurrency``
+                slots with no queue limit, deadline or rate limit
         """
-        self.agent = agent
+        self.agent_factory = agent_factory
         self.session_manager = session_manager
-        logger.info("ChatbotService initialized")
+        self.admission = admission or AdmissionController(max_concurrency)
+        self.max_concurrency = self.admission.max_concurrency
+        self.response_cache = response_cache
+        self._session_locks = SessionLocks()
+        # Used by the async entry points (ASGI server), which run on one event loop
+        self._async_session_locks = SessionLocks(asyncio.Lock)
+        self.errors = Counter(('kind',))
+        logger.info(f"ChatbotService initialized (max {self.max_concurrency} concurrent agents)")
     
+    @tracer.start_as_current_span('chat.turn')
     def process_message(self, message: str, session_id: Optional[str] = None) -> Tuple[str, str]:
         """Process a user message and return the agent's response.
         
@@ -31,76 +163,534 @@ class ChatbotService:
             
         Returns:
             Tuple of (reply, session_id)
+            
+        Raises:
+            AdmissionRejected: If the turn is refused by admission control
         """
         start_time = time.time()
         
         try:
             # Get or create session
             session_id, session_data = self.session_manager.get_or_create_session(session_id)
+            trace.get_current_span().set_attribute('session.id', session_id)
+            self.admission.check_rate(session_id)
             
             # Log message receipt
-            logger.info(f"Received message from session {session_id} at {time.strftime('%Y-%m-%d %H:%M:%S')}")
-            logger.debug(f"Message content: {message[:100]}...")  # Log first 100 chars
-            
-            # Get conversation history
-            messages = session_data['messages']
+            logger.debug(f"Received message from session {session_id}: {message[:100]}")
             
-            # Add user message to history
-            messages.append({
-                "role": "user",
-                "content": [{"text": message}]
-            })
-            
-            # Invoke agent
-            logger.info(f"Invoking agent for session {session_id}")
-            try:
-                response = self.agent(messages=messages)
+            # Requests for one session take turns; other sessions are not blocked
+            with self._session_locks.hold(session_id):
+                # The messages to seed the agent with: the history as of this turn, led by any summary
+                prompt = self._load_history(session_id)
                 
-                # Extract reply text
-                reply = ""
-                if hasattr(response, 'content'):
-                    for content_block in response.content:
-                        if hasattr(content_block, 'text'):
-                            reply += content_block.text
-                elif isinstance(response, str):
-                    reply = response
-                else:
-                    reply = str(response)
+                cached = self._cached_reply(message, prompt)
+                if cached is not None:
+                    self._save_turn(session_id, message, cached)
+                    logger.info(f"Answered session {session_id} from the response cache", extra=SAMPLED)
+                    return cached, session_id
                 
-                # Add assistant response to history
-                messages.append({
-                    "role": "assistant",
-                    "content": [{"text": reply}]
-                })
-                
-                # Update session
-                self.session_manager.update_session(session_id, messages)
-                
-                # Calculate response time
-                response_time = time.time() - start_time
-                logger.info(f"Successfully processed message for session {session_id} in {response_time:.2f}s")
-                
-                return reply, session_id
-                
-            except Exception as e:
-                logger.error(f"Error invoking agent: {e}", exc_info=True)
-                
-                # Return user-friendly error message
-                error_reply = (
-                    "I apologize, but I'm having trouble processing your request right now. "
-                    "Please try again in a moment."
-                )
-                return error_reply, session_id
+                # Invoke agent
+                logger.debug(f"Invoking agent for session {session_id}")
+                try:
+                    with self.admission.slot(), turn_scope(), tracer.start_as_current_span('agent.invoke'):
+                        agent = self.agent_factory(prompt)
+                        response = agent(message)
+                    
+                    reply = self._extract_reply(response)
+                    self._cache_reply(message, prompt, reply, agent)
+                    
+                    # Add the exchange to the session history
+                    self._save_turn(session_id, message, reply)
+                    
+                    # Calculate response time
+                    response_time = time.time() - start_time
+                    logger.info(f"Processed message for session {session_id} in {response_time:.2f}s", extra=SAMPLED)
+                    
+                    return reply, session_id
+                    
+                except AdmissionRejected:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error invoking agent: {e}", exc_info=True)
+                    self.errors.inc('agent')
+                    
+                    # Return user-friendly error message
+                    return AGENT_ERROR_REPLY, session_id
                 
+        except AdmissionRejected:
+            raise
         except Exception as e:
             logger.error(f"Error in process_message: {e}", exc_info=True)
+            self.errors.inc('service')
             
             # Create new session if there was an error
             if not session_id:
                 session_id, _ = self.session_manager.get_or_create_session()
             
-            error_reply = (
-                "I apologize, but something went wrong. "
-                "Please try again or start a new conversation."
+            return SERVICE_ERROR_REPLY, session_id
+    
+    @tracer.start_as_current_span('chat.turn')
+    async def process_message_async(self, message: str, session_id: Optional[str] = None) -> Tuple[str, str]:
+        """Async version of :meth:`process_message` for use on an event loop.
+        
+        The agent, its async tools and the model stream all run on the
+        caller's loop; no thread is tied up for the duration of the turn.
+        Session store calls, which may wait on a database lock, run in a
+        worker thread so they never block the loop.
+        
+        Args:
+            message: User's message
+            session_id: Optional session ID
+            
+        Returns:
+            Tuple of (reply, session_id)
+            
+        Raises:
+            AdmissionRejected: If the turn is refused by admission control
+        """
+        start_time = time.time()
+        
+        try:
+            session_id, _ = await asyncio.to_thread(self.session_manager.get_or_create_session, session_id)
+            trace.get_current_span().set_attribute('session.id', session_id)
+            self.admission.check_rate(session_id)
+            logger.debug(f"Received message from session {session_id}: {message[:100]}")
+            
+            async with self._async_session_locks.hold_async(session_id):
+                prompt = await asyncio.to_thread(self._load_history, session_id)
+                
+                cached = self._cached_reply(message, prompt)
+                if cached is not None:
+                    await asyncio.to_thread(self._save_turn, session_id, message, cached)
+                    logger.info(f"Answered session {session_id} from the response cache", extra=SAMPLED)
+                    return cached, session_id
+                
+                logger.debug(f"Invoking agent for session {session_id}")
+                try:
+                    async with self.admission.slot_async():
+                        agent = self.agent_factory(prompt)
+                        with turn_scope(), tracer.start_as_current_span('agent.invoke'):
+                            response = await agent.invoke_async(message)
+                    
+                    reply = self._extract_reply(response)
+                    self._cache_reply(message, prompt, reply, agent)
+                    await asyncio.to_thread(self._save_turn, session_id, message, reply)
+                    
+                    response_time = time.time() - start_time
+                    logger.info(f"Processed message for session {session_id} in {response_time:.2f}s", extra=SAMPLED)
+                    
+                    return reply, session_id
+                    
+                except AdmissionRejected:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error invoking agent: {e}", exc_info=True)
+                    self.errors.inc('agent')
+                    return AGENT_ERROR_REPLY, session_id
+                
+        except AdmissionRejected:
+            raise
+        except Exception as e:
+            logger.error(f"Error in process_message_async: {e}", exc_info=True)
+            self.errors.inc('service')
+            
+            if not session_id:
+                session_id, _ = await asyncio.to_thread(self.session_manager.get_or_create_session)
+            
+            return SERVICE_ERROR_REPLY, session_id
+    
+    def stream_message(self, message: str, session_id: Optional[str] = None) -> Tuple[str, Iterator[dict]]:
+        """Process a user message, yielding the agent's output as it is generated.
+        
+        The returned iterator yields event dicts with a ``type`` of:
+        
+        - ``token``: a chunk of reply text (``text``)
+        - ``tool_call``: the agent started a tool call (``name``, ``toolUseId``)
+        - ``tool_result``: a tool call finished (``toolUseId``, ``status``)
+        - ``done``: the turn is complete and saved (``reply``, ``sessionId``, ``timestamp``)
+        - ``error``: the turn failed (``message``); nothing is saved. If no
+          agent slot freed up in time it also has ``code`` and ``retryAfter``
+        
+        The turn starts when iteration starts. Closing the iterator early
+        (e.g. the client disconnected) cancels the agent.
+        
+        Args:
+            message: User's message
+            session_id: Optional session ID
+            
+        Returns:
+            Tuple of (session_id, event iterator)
+            
+        Raises:
+            AdmissionRejected: If the session is over its rate limit or the
+                queue for agent slots is full
+        """
+        session_id, _ = self.session_manager.get_or_create_session(session_id)
+        self._admit_stream(session_id)
+        logger.debug(f"Received streaming message from session {session_id}")
+        return session_id, self._rejections_as_events(self._stream_turn(message, session_id))
+    
+    def _stream_turn(self, message: str, session_id: str) -> Iterator[dict]:
+        start_time = time.time()
+        with self._turn_span(session_id), self._session_locks.hold(session_id):
+            prompt = self._load_history(session_id)
+            
+            cached = self._cached_reply(message, prompt)
+            if cached is not None:
+                yield {"type": "token", "text": cached}
+                self._save_turn(session_id, message, cached)
+                logger.info(f"Answered session {session_id} from the response cache", extra=SAMPLED)
+                yield self._done_event(cached, session_id)
+                return
+            
+            with self.admission.slot(), tracer.start_as_current_span('agent.invoke'):
+                agent = self.agent_factory(prompt)
+                events: queue.Queue = queue.Queue()
+                cancel = threading.Event()
+                # The worker joins this turn's trace
+                worker = threading.Thread(
+                    target=contextvars.copy_context().run,
+                    args=(self._run_agent_stream, agent, message, events, cancel),
+                    name=f"agent-stream-{session_id[:8]}",
+                    daemon=True
+                )
+                worker.start()
+                
+                tokens: List[str] = []
+                tool_calls: set = set()
+                tool_results: set = set()
+                result = None
+                try:
+                    while True:
+                        kind, payload = events.get()
+                        if kind == 'end':
+                            break
+                        if kind == 'error':
+                            logger.error(f"Error streaming agent response: {payload}", exc_info=payload)
+                            self.errors.inc('agent')
+                            yield {"type": "error", "message": AGENT_ERROR_REPLY}
+                            return
+                        
+                        if 'result' in payload:
+                            result = payload['result']
+                        for event in self._translate_stream_event(payload, tool_calls, tool_results):
+                            if event['type'] == 'token':
+                                tokens.append(event['text'])
+                            yield event
+                finally:
+                    # Stop the agent if the client went away mid-stream
+                    cancel.set()
+                    worker.join(STREAM_WORKER_JOIN_TIMEOUT)
+                    if worker.is_alive():
+                        logger.warning(f"Agent thread {worker.name} still running "
+                                       f"{STREAM_WORKER_JOIN_TIMEOUT}s after cancel; leaving it behind")
+            
+            reply = self._extract_reply(result) if result is not None else "".join(tokens)
+            self._cache_reply(message, prompt, reply, agent)
+            self._save_turn(session_id, message, reply)
+        
+        logger.info(f"Streamed message for session {session_id} in {time.time() - start_time:.2f}s", extra=SAMPLED)
+        yield self._done_event(reply, session_id)
+    
+    async def stream_message_async(self, message: str,
+                             session_id: Optional[str] = None) -> Tuple[str, AsyncIterator[dict]]:
+        """Async version of :meth:`stream_message` for use on an event loop.
+        
+        Yields the same events as :meth:`stream_message`. Closing the iterator
+        early (``aclose``, or the task being cancelled) cancels the agent.
+        As in :meth:`process_message_async`, session store calls run in a
+        worker thread.
+        
+        Args:
+            message: User's message
+            session_id: Optional session ID
+            
+        Returns:
+            Tuple of (session_id, async event iterator)
+            
+        Raises:
+            AdmissionRejected: If the session is over its rate limit or the
+                queue for agent slots is full
+        """
+        session_id, _ = await asyncio.to_thread(self.session_manager.get_or_create_session, session_id)
+        self._admit_stream(session_id)
+        logger.debug(f"Received streaming message from session {session_id}")
+        return session_id, self._rejections_as_events_async(self._stream_turn_async(message, session_id))
+    
+    async def _stream_turn_async(self, message: str, session_id: str) -> AsyncIterator[dict]:
+        start_time = time.time()
+        with self._turn_span(session_id):
+            async with self._async_session_locks.hold_async(session_id):
+                prompt = await asyncio.to_thread(self._load_history, session_id)
+                
+                cached = self._cached_reply(message, prompt)
+                if cached is not None:
+                    yield {"type": "token", "text": cached}
+                    await asyncio.to_thread(self._save_turn, session_id, message, cached)
+                    logger.info(f"Answered session {session_id} from the response cache", extra=SAMPLED)
+                    yield self._done_event(cached, session_id)
+                    return
+                
+                async with self.admission.slot_async():
+                    agent = self.agent_factory(prompt)
+                    cancel = threading.Event()
+                    tokens: List[str] = []
+                    tool_calls: set = set()
+                    tool_results: set = set()
+                    result = None
+                    stream = agent.stream_async(message, cancel_signal=cancel)
+                    with turn_scope(), tracer.start_as_current_span('agent.invoke'):
+                        try:
+                            async for payload in stream:
+                                if 'result' in payload:
+                                    result = payload['result']
+                                for event in self._translate_stream_event(payload, tool_calls, tool_results):
+                                    if event['type'] == 'token':
+                                        tokens.append(event['text'])
+                                    yield event
+                        except Exception as e:
+                            logger.error(f"Error streaming agent response: {e}", exc_info=True)
+                            self.errors.inc('agent')
+                            yield {"type": "error", "message": AGENT_ERROR_REPLY}
+                            return
+                        finally:
+                            # Stop the agent if the client went away mid-stream
+                            cancel.set()
+                            await stream.aclose()
+                
+                reply = self._extract_reply(result) if result is not None else "".join(tokens)
+                self._cache_reply(message, prompt, reply, agent)
+                await asyncio.to_thread(self._save_turn, session_id, message, reply)
+        
+        logger.info(f"Streamed message for session {session_id} in {time.time() - start_time:.2f}s", extra=SAMPLED)
+        yield self._done_event(reply, session_id)
+    
+    def get_metrics(self) -> dict:
+        """Session, error, admission, response cache, backend pool and per-stage latency metrics.
+        
+        Returns:
+            Dict with ``sessions``, ``errors`` (failed turns by kind),
+            ``admission`` (slots, queue and rejections) and, if enabled or in
+            use, ``response_cache``, ``backend_pool`` and ``stages`` (latency
+            in seconds by tracing stage)
+        """
+        metrics = {
+            "sessions": self.session_manager.get_metrics(),
+            "errors": {kind: int(self.errors.value(kind)) for kind in ERROR_KINDS},
+            "admission": self.admission.stats()
+        }
+        if self.response_cache is not None:
+            metrics["response_cache"] = self.response_cache.stats()
+        pool = get_backend_pool_stats()
+        if pool is not None:
+            metrics["backend_pool"] = pool
+        stage_metrics = get_stage_metrics()
+        if stage_metrics is not None:
+            metrics["stages"] = stage_metrics.snapshot()
+        return metrics
+    
+    def get_prometheus_metrics(self) -> str:
+        """Service metrics in the Prometheus text exposition format.
+        
+        Covers sessions, HTTP requests by endpoint, failed turns, admission
+        control, tool calls, per-stage latency, the backend connection pool
+        and the response cache.
+        
+        Returns:
+            Exposition text for a Prometheus scrape
+        """
+        text = PrometheusText(METRICS_PREFIX)
+        sessions = self.session_manager.get_metrics()
+        text.gauge('active_sessions', "Sessions currently stored",
+                   {(): self.session_manager.get_session_count()})
+        text.gauge('session_messages_avg', "Average number of stored messages per session",
+                   {(): round(sessions['messages'] / sessions['sessions'], 2) if sessions['sessions'] else 0})
+        text.gauge('session_memory_bytes', "Serialized size of all stored sessions",
+                   {(): sessions['memory_bytes']})
+        text.counter('agent_errors_total', "Chat turns that failed, by where they failed",
+                     {(kind,): self.errors.value(kind) for kind in ERROR_KINDS}, ('kind',))
+        
+        admission = self.admission.stats()
+        text.gauge('agents_active', "Agent invocations running", {(): admission['active']})
+        text.gauge('agent_slots', "Agent invocations allowed to run at once", {(): admission['max_concurrency']})
+        text.gauge('admission_queue_depth', "Turns waiting for an agent slot", {(): admission['queued']})
+        text.counter('admission_rejections_total', "Turns refused by admission control, by reason",
+                     {(reason,): admission['rejections'][reason] for reason in REJECTION_REASONS}, ('reason',))
+        
+        stage_metrics = get_stage_metrics()
+        if stage_metrics is not None:
+            stages = stage_metrics.histograms()
+            text.counter('http_requests_total', "HTTP requests by method, endpoint and status",
+                         stage_metrics.requests.samples(), ('method', 'endpoint', 'status'))
+            text.histogram('http_request_duration_seconds', "HTTP request latency by endpoint",
+                           stage_metrics.endpoint_histograms(), ('method', 'endpoint'))
+            text.counter('tool_calls_total', "Tool calls by tool and outcome",
+                         stage_metrics.tool_calls.samples(), ('tool', 'status'))
+            text.histogram('tool_duration_seconds', "Tool call latency",
+                           {(stage[len('tool.'):],): h for stage, h in stages.items() if stage.startswith('tool.')},
+                           ('tool',))
+            text.histogram('stage_duration_seconds', "Latency of each stage of a chat turn",
+                           {(stage,): h for stage, h in stages.items()
+                            if stage != 'request' and not stage.startswith('tool.')},
+                           ('stage',))
+        
+        pool = get_backend_pool_stats()
+        if pool is not None:
+            text.gauge('backend_requests_in_flight', "Requests to the e-commerce backend in progress",
+                       {(): pool['in_flight']})
+            text.gauge('backend_pool_max_connections', "Connection limit of the backend pool",
+                       {(): pool['max_connections']})
+            text.gauge('backend_pool_utilization', "Share of backend pool connections in use (0-1)",
+                       {(): pool['utilization']})
+        
+        if self.response_cache is not None:
+            cache = self.response_cache.stats()
+            text.gauge('response_cache_entries', "Replies in the response cache", {(): cache['entries']})
+            text.counter('response_cache_hits_total', "Opening messages answered from the cache",
+                         {(): cache['hits']})
+            text.counter('response_cache_misses_total', "Opening messages not found in the cache",
+                         {(): cache['misses']})
+        return text.render()
+    
+    def _admit_stream(self, session_id: str):
+        """Refuse a stream before its response starts, while a status code can still say why."""
+        self.admission.check_rate(session_id)
+        self.admission.check_capacity()
+    
+    @staticmethod
+    def _rejections_as_events(events: Iterator[dict]) -> Iterator[dict]:
+        """End a stream with an ``error`` event if its wait for an agent slot times out."""
+        try:
+            yield from events
+        except AdmissionRejected as e:
+            logger.warning(f"Stream refused: {e.reason}")
+            yield e.to_event()
+    
+    @staticmethod
+    async def _rejections_as_events_async(events: AsyncIterator[dict]) -> AsyncIterator[dict]:
+        """Async version of :meth:`_rejections_as_events`."""
+        try:
+            async for event in events:
+                yield event
+        except AdmissionRejected as e:
+            logger.warning(f"Stream refused: {e.reason}")
+            yield e.to_event()
+        finally:
+            await events.aclose()
+    
+    def _cached_reply(self, message: str, prompt: Sequence[dict]) -> Optional[str]:
+        """Cached reply to an opening message, if any."""
+        if self.response_cache is None or len(prompt):
+            return None
+        return self.response_cache.get(message)
+    
+    def _cache_reply(self, message: str, prompt: Sequence[dict], reply: str, agent: Agent):
+        """Offer an opening turn's reply to the response cache.
+        
+        Replies written after a failed tool call (e.g. an apology for an
+        unreachable catalog) are not cached.
+        """
+        if self.response_cache is None or len(prompt):
+            return
+        blocks = [
+            block
+            for msg in getattr(agent, 'messages', None) or []
+            for block in msg.get('content', [])
+            if isinstance(block, dict)
+        ]
+        if any(block['toolResult'].get('status') == 'error' for block in blocks if 'toolResult' in block):
+            logger.debug("Not caching a reply written after a failed tool call")
+            return
+        tools_used = [block['toolUse'].get('name') for block in blocks if 'toolUse' in block]
+        self.response_cache.put(message, reply, tools_used)
+    
+    @staticmethod
+    def _turn_span(session_id: str):
+        """Span covering one turn, from the session lock to the saved reply."""
+        return tracer.start_as_current_span('chat.turn', attributes={'session.id': session_id})
+    
+    @staticmethod
+    def _done_event(reply: str, session_id: str) -> dict:
+        return {
+            "type": "done",
+            "reply": reply,
+            "sessionId": session_id,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    def _load_history(self, session_id: str) -> List[dict]:
+        """Load a session's stored messages as the agent sees them, prefixed with the session summary."""
+        with tracer.start_as_current_span('session.fetch'):
+            history = self.session_manager.get_session_messages(session_id)
+            return with_summary(history, self.session_manager.get_session_summary(session_id))
+    
+    def _save_turn(self, session_id: str, message: str, reply: str):
+        """Append a completed exchange to the session's history."""
+        exchange = [
+            {
+                "role": "user",
+                "content": [{"text": message}]
+            },
+            {
+                "role": "assistant",
+                "content": [{"text": reply}]
+            }
+        ]
+        with tracer.start_as_current_span('session.save'):
+            self.session_manager.append_messages(session_id, exchange)
+    
+    @staticmethod
+    def _run_agent_stream(agent: Agent, message: str, events: queue.Queue, cancel: threading.Event):
+        """Run ``agent.stream_async`` on a private event loop, forwarding events to a queue."""
+        async def pump():
+            async for event in agent.stream_async(message, cancel_signal=cancel):
+                if cancel.is_set():
+                    break
+                events.put(('event', event))
+        
+        try:
+            with turn_scope():
+                asyncio.run(pump())
+        except Exception as e:
+            events.put(('error', e))
+        finally:
+            events.put(('end', None))
+    
+    @staticmethod
+    def _translate_stream_event(event: Dict[str, Any], tool_calls: set, tool_results: set) -> Iterator[dict]:
+        """Convert a Strands stream event into zero or more client events."""
+        text = event.get('data')
+        if isinstance(text, str) and text:
+            yield {"type": "token", "text": text}
+        
+        tool_use = event.get('current_tool_use')
+        if isinstance(tool_use, dict):
+            tool_use_id = tool_use.get('toolUseId')
+            if tool_use_id and tool_use_id not in tool_calls:
+                tool_calls.add(tool_use_id)
+                yield {"type": "tool_call", "name": tool_use.get('name'), "toolUseId": tool_use_id}
+        
+        results = []
+        if isinstance(event.get('tool_result'), dict):
+            results.append(event['tool_result'])
+        message = event.get('message')
+        if isinstance(message, dict):
+            results.extend(
+                block['toolResult'] for block in message.get('content', [])
+                if isinstance(block, dict) and 'toolResult' in block
             )
-            return error_reply, session_id
+        for tool_result in results:
+            tool_use_id = tool_result.get('toolUseId')
+            if tool_use_id and tool_use_id not in tool_results:
+                tool_results.add(tool_use_id)
+                yield {"type": "tool_result", "toolUseId": tool_use_id, "status": tool_result.get('status')}
+    
+    @staticmethod
+    def _extract_reply(response) -> str:
+        """Extract the reply text from an agent result."""
+        if isinstance(response, str):
+            return response
+        message = getattr(response, 'message', None)
+        if isinstance(message, dict):
+            return "".join(block.get('text', '') for block in message.get('content', []))
+        return str(response)
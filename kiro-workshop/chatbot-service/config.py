@@ -1,7 +1,15 @@
-"""Configuration management for the chatbot service."""
+"""Configuration management for the chatbot service.
+
+The service builds one immutable :class:`Config` at startup and publishes it
+with :func:`set_config`. Tools and other hot-path code read it through
+:func:`get_config`, which is a plain module lookup. Sending SIGHUP re-reads
+the environment (and ``.env``) and swaps in a fresh config.
+"""
 import os
 import logging
-from typing import Optional
+import signal
+import threading
+from typing import Callable, List, Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -9,9 +17,24 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# HTTP servers: 'asgi' (uvicorn, production) or 'flask' (development server)
+SERVER_MODES = ('asgi', 'flask')
+
+# Session storage: 'memory' (this process only) or 'sqlite' (shared database file)
+SESSION_STORES = ('memory', 'sqlite')
+
+# Span exporters: 'none' (stage metrics only), 'console' (stdout) or 'file' (JSON lines)
+TRACE_EXPORTERS = ('none', 'console', 'file')
+
+# Log line formats: 'text' (human-readable) or 'json' (one object per line)
+LOG_FORMATS = ('text', 'json')
+
 
 class Config:
-    """Configuration class for chatbot service."""
+    """Configuration class for chatbot service.
+    
+    Instances are read-only once constructed; build a new one to change settings.
+    """
     
     def __init__(self):
         """Initialize configuration from environment variables."""
@@ -27,7 +50,31 @@ class Config:
         # Chatbot Service Configuration (Optional)
         self.chatbot_port = int(os.getenv('CHATBOT_PORT', '5001'))
         self.log_level = os.getenv('LOG_LEVEL', 'INFO')
+        self.log_format = os.getenv('LOG_FORMAT', 'text').lower()
+        self.log_sample_rate = float(os.getenv('LOG_SAMPLE_RATE', '0.1'))
         self.session_timeout_minutes = int(os.getenv('SESSION_TIMEOUT_MINUTES', '30'))
+        self.session_store = os.getenv('SESSION_STORE', 'memory').lower()
+        self.session_db_path = os.getenv('SESSION_DB_PATH', 'sessions.db')
+        self.max_concurrent_agents = int(os.getenv('MAX_CONCURRENT_AGENTS', '8'))
+        self.admission_queue_size = int(os.getenv('ADMISSION_QUEUE_SIZE', '16'))
+        self.admission_queue_timeout = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '5'))
+        self.session_rate_limit = float(os.getenv('SESSION_RATE_LIMIT', '30'))
+        self.session_rate_burst = int(os.getenv('SESSION_RATE_BURST', '10'))
+        self.tool_concurrency = int(os.getenv('TOOL_CONCURRENCY', '4'))
+        self.history_max_tokens = int(os.getenv('HISTORY_MAX_TOKENS', '4000'))
+        self.summary_max_tokens = int(os.getenv('SUMMARY_MAX_TOKENS', '400'))
+        self.response_cache_size = int(os.getenv('RESPONSE_CACHE_SIZE', '256'))
+        self.response_cache_ttl = int(os.getenv('RESPONSE_CACHE_TTL', '300'))
+        
+        # HTTP Server Configuration (Optional)
+        self.server_mode = os.getenv('SERVER_MODE', 'asgi').lower()
+        self.server_workers = int(os.getenv('SERVER_WORKERS', '1'))
+        self.keep_alive_seconds = int(os.getenv('KEEP_ALIVE_SECONDS', '5'))
+        self.graceful_shutdown_seconds = int(os.getenv('GRACEFUL_SHUTDOWN_SECONDS', '30'))
+        
+        # Tracing Configuration (Optional)
+        self.trace_exporter = os.getenv('TRACE_EXPORTER', 'none').lower()
+        self.trace_file = os.getenv('TRACE_FILE', 'traces.jsonl')
         
         # Bedrock Model Configuration
         self.model_id = 'us.amazon.nova-pro-v1:0'
@@ -36,6 +83,12 @@ class Config:
         
         # Validate required configuration
         self._validate()
+        self._frozen = True
+    
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False):
+            raise AttributeError(f"Config is read-only; cannot set '{name}'")
+        super().__setattr__(name, value)
         
     def _validate(self):
         """Validate that required configuration is present."""
@@ -52,6 +105,31 @@ class Config:
             error_msg = f"Missing required environment variables: {', '.join(missing)}"
             logger.error(error_msg)
             raise ValueError(error_msg)
+        
+        if self.session_store not in SESSION_STORES:
+            error_msg = f"SESSION_STORE must be one of: {', '.join(SESSION_STORES)}"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+        
+        if self.server_mode not in SERVER_MODES:
+            error_msg = f"SERVER_MODE must be one of: {', '.join(SERVER_MODES)}"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+        
+        if self.trace_exporter not in TRACE_EXPORTERS:
+            error_msg = f"TRACE_EXPORTER must be one of: {', '.join(TRACE_EXPORTERS)}"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+        
+        if self.log_format not in LOG_FORMATS:
+            error_msg = f"LOG_FORMAT must be one of: {', '.join(LOG_FORMATS)}"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+        
+        if not 0 <= self.log_sample_rate <= 1:
+            error_msg = "LOG_SAMPLE_RATE must be between 0 and 1"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
             
         logger.info("Configuration validated successfully")
         
@@ -75,16 +153,131 @@ class Config:
         logger.info(f"Model ID: {self.model_id}")
         logger.info(f"E-commerce API URL: {self.ecommerce_api_url}")
         logger.info(f"Chatbot Port: {self.chatbot_port}")
-        logger.info(f"Log Level: {self.log_level}")
+        logger.info(f"Log Level: {self.log_level} ({self.log_format}, {self.log_sample_rate:g} of high-volume events)")
         logger.info(f"Session Timeout: {self.session_timeout_minutes} minutes")
+        logger.info(f"Session Store: {self.session_store}"
+                    + (f" ({self.session_db_path})" if self.session_store == 'sqlite' else ""))
+        logger.info(f"Max Concurrent Agents: {self.max_concurrent_agents}")
+        logger.info(f"Admission Queue: {self.admission_queue_size} turns, {self.admission_queue_timeout:g} second deadline")
+        if self.session_rate_limit:
+            logger.info(f"Session Rate Limit: {self.session_rate_limit:g} turns/minute (burst {self.session_rate_burst})")
+        else:
+            logger.info("Session Rate Limit: disabled")
+        logger.info(f"Tool Concurrency: {self.tool_concurrency} read-only tools per step")
+        logger.info(f"History Budget: {self.history_max_tokens} tokens (summary {self.summary_max_tokens})")
+        if self.response_cache_size:
+            logger.info(f"Response Cache: {self.response_cache_size} replies for {self.response_cache_ttl} seconds")
+        else:
+            logger.info("Response Cache: disabled")
+        logger.info(f"Server Mode: {self.server_mode}")
+        if self.server_mode == 'asgi':
+            logger.info(f"Server Workers: {self.server_workers}")
+            logger.info(f"Keep-Alive: {self.keep_alive_seconds} seconds")
+            logger.info(f"Graceful Shutdown: {self.graceful_shutdown_seconds} seconds")
+        logger.info(f"Trace Exporter: {self.trace_exporter}"
+                    + (f" ({self.trace_file})" if self.trace_exporter == 'file' else ""))
         logger.info(f"AWS Access Key ID: {'*' * 16}{self.aws_access_key_id[-4:] if self.aws_access_key_id else 'NOT SET'}")
         logger.info("=====================================")
 
 
-def setup_logging(log_level: str = 'INFO'):
-    """Set up logging configuration."""
-    logging.basicConfig(
-        level=getattr(logging, log_level.upper()),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+_current_config: Optional[Config] = None
+_config_lock = threading.Lock()
+# One reload at a time; a SIGHUP during a reload runs another after it
+_reload_lock = threading.Lock()
+_reload_callbacks: List[Callable[[Config], None]] = []
+
+
+def get_config() -> Config:
+    """Get the process-wide configuration.
+    
+    The configuration is built on first use if :func:`set_config` has not been
+    called yet; afterwards this is a single attribute lookup.
+    
+    Returns:
+        Current Config instance
+    """
+    global _current_config
+    config = _current_config
+    if config is None:
+        with _config_lock:
+            if _current_config is None:
+                _current_config = Config()
+            config = _current_config
+    return config
+
+
+def set_config(config: Config):
+    """Publish a configuration as the process-wide instance.
+    
+    Args:
+        config: Config instance to use from now on
+    """
+    global _current_config
+    with _config_lock:
+        _current_config = config
+
+
+def on_config_reload(callback: Callable[[Config], None]):
+    """Register a callback invoked with the new config after each reload.
+    
+    Args:
+        callback: Function taking the new Config
+    """
+    _reload_callbacks.append(callback)
+
+
+def reload_config() -> Config:
+    """Re-read the environment and ``.env`` and publish a new configuration.
+    
+    If the new settings fail validation the current configuration stays active.
+    
+    Returns:
+        The configuration in effect after the reload attempt
+    """
+    with _reload_lock:
+        load_dotenv(override=True)
+        try:
+            config = Config()
+        except ValueError as e:
+            logger.error(f"Configuration reload failed, keeping current settings: {e}")
+            return get_config()
+        
+        set_config(config)
+        logging.getLogger().setLevel(getattr(logging, config.log_level.upper(), logging.INFO))
+        for callback in list(_reload_callbacks):
+            try:
+                callback(config)
+            except Exception as e:
+                logger.error(f"Error in config reload callback: {e}", exc_info=True)
+        
+        logger.info("Configuration reloaded")
+        return config
+
+
+def _reload_in_background(signum, frame):
+    """SIGHUP handler: hand the reload to a thread.
+    
+    The handler interrupts the main thread, which may be holding the config
+    lock or running the event loop, so it must not reload (take locks, log,
+    rebuild clients) itself.
+    """
+    threading.Thread(target=reload_config, name="config-reload", daemon=True).start()
+
+
+def install_reload_handler() -> bool:
+    """Reload the configuration when the process receives SIGHUP.
+    
+    The reload runs on a separate thread, not in the signal handler. Must be
+    called from the main thread. Platforms without SIGHUP (Windows) are left
+    unchanged.
+    
+    Returns:
+        True if the handler was installed
+    """
+    if not hasattr(signal, 'SIGHUP'):
+        logger.debug("SIGHUP not available; configuration reload disabled")
+        return False
+    
+    signal.signal(signal.SIGHUP, _reload_in_background)
+    logger.info("Send SIGHUP to reload configuration")
+    return True
@@ -0,0 +1,84 @@
+"""Shared test fixtures: a fake clock, a mock e-commerce backend and chat services run by a scripted model."""
+import httpx
+import pytest
+from strands import Agent
+from chatbot_service import ChatbotService
+from scripted_model import ScriptedModel, echo_responder
+from session_manager import SessionManager
+from tools import backend_client, catalog
+from tools.backend_client import BackendClient
+
+
+class FakeClock:
+    """Time source that only moves when a test moves it."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    """A :class:`FakeClock` starting at 1000."""
+    return FakeClock()
+
+
+def empty_backend(request):
+    return httpx.Response(200, json=[])
+
+
+@pytest.fixture
+def mock_backend(monkeypatch):
+    """Install a mock backend as the tools' shared client.
+
+    Call the fixture with an ``httpx.MockTransport`` handler (sync or async;
+    by default every request gets an empty list) and any ``BackendClient``
+    options. It returns the installed client. The catalog cache starts
+    empty, and every client is closed after the test.
+    """
+    clients = []
+    monkeypatch.setattr(backend_client, '_client', None)
+    monkeypatch.setattr(catalog, '_catalog', None)
+
+    def install(handler=empty_backend, **options) -> BackendClient:
+        client = BackendClient('http://backend.test', transport=httpx.MockTransport(handler), **options)
+        clients.append(client)
+        monkeypatch.setattr(backend_client, '_client', client)
+        monkeypatch.setattr(catalog, '_catalog', None)
+        return client
+
+    yield install
+    for client in clients:
+        client.close()
+
+
+@pytest.fixture
+def scripted_service():
+    """Build chat services whose agents run a :class:`ScriptedModel`.
+
+    Call the fixture with the model's responder, the agents' ``tools``,
+    ``model_options`` for the model (``latency``, ``token_delay``) and any
+    ``ChatbotService`` options. Every service's session manager is stopped
+    after the test.
+    """
+    services = []
+
+    def build(responder=None, tools=(), model_options=None, session_manager=None, **options) -> ChatbotService:
+        model = ScriptedModel(responder or echo_responder, **(model_options or {}))
+        tools = list(tools)
+
+        def factory(messages):
+            return Agent(model=model, messages=list(messages), tools=tools, callback_handler=None)
+
+        service = ChatbotService(factory, session_manager or SessionManager(), **options)
+        services.append(service)
+        return service
+
+    yield build
+    for service in services:
+        service.session_manager.stop()
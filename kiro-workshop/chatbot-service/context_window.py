@@ -0,0 +1,174 @@
+"""Token-budgeted conversation windows with a running summary of older turns."""
+import json
+import logging
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio for English text
+CHARS_PER_TOKEN = 4
+
+# Tokens added per message for role and formatting
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Length limits for the lines of the default summary
+SUMMARY_USER_CHARS = 120
+SUMMARY_REPLY_CHARS = 160
+
+SUMMARY_HEADER = "Summary of our earlier conversation:"
+SUMMARY_ACK = "Understood, I'll keep that in mind."
+
+# Builds a new summary from the previous one (or None) and the turns being dropped
+Summarizer = Callable[[Optional[str], List[dict]], str]
+
+
+def message_text(message: dict) -> str:
+    """Text of a message's text blocks."""
+    return "".join(
+        block.get('text', '') for block in message.get('content', [])
+        if isinstance(block, dict)
+    )
+
+
+def estimate_tokens(message: dict) -> int:
+    """Estimate the prompt tokens a message costs.
+
+    Text blocks count by length; tool calls and results count by the size of
+    their JSON.
+
+    Args:
+        message: Message in Strands format
+
+    Returns:
+        Estimated token count
+    """
+    chars = 0
+    for block in message.get('content', []):
+        if not isinstance(block, dict):
+            continue
+        if 'text' in block:
+            chars += len(block['text'])
+        else:
+            chars += len(json.dumps(block, default=str))
+    return -(-chars // CHARS_PER_TOKEN) + MESSAGE_OVERHEAD_TOKENS
+
+
+def estimate_text_tokens(text: str) -> int:
+    """Estimate the tokens in a plain string."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _is_turn_start(message: dict) -> bool:
+    # A user message with text, as opposed to one carrying tool results
+    return message.get('role') == 'user' and bool(message_text(message))
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def extractive_summarizer(max_tokens: int) -> Summarizer:
+    """Summarize turns as one line each, keeping the newest lines within a budget.
+
+    Args:
+        max_tokens: Token budget for the whole summary
+
+    Returns:
+        Summarizer function
+    """
+    def summarize(previous: Optional[str], messages: List[dict]) -> str:
+        lines = previous.split("\n") if previous else []
+        user_text = None
+        for message in messages:
+            if _is_turn_start(message):
+                user_text = message_text(message)
+            elif message.get('role') == 'assistant' and user_text is not None:
+                reply = message_text(message)
+                if reply:
+                    lines.append(
+                        f"- User: {_clip(user_text, SUMMARY_USER_CHARS)} "
+                        f"Assistant: {_clip(reply, SUMMARY_REPLY_CHARS)}"
+                    )
+                    user_text = None
+
+        # Forget the oldest lines first
+        while len(lines) > 1 and estimate_text_tokens("\n".join(lines)) > max_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+
+    return summarize
+
+
+class ContextWindow:
+    """Keeps a conversation within a token budget.
+
+    When the history grows past ``max_tokens``, whole turns are dropped from
+    the front (always keeping the latest turn) and folded into a running
+    summary. The summary is sent to the agent ahead of the remaining
+    messages, see :func:`with_summary`.
+    """
+
+    def __init__(self, max_tokens: int = 4000, summary_max_tokens: int = 400,
+                 summarizer: Optional[Summarizer] = None):
+        """Initialize the window.
+
+        Args:
+            max_tokens: Token budget for the messages kept verbatim
+            summary_max_tokens: Token budget for the summary of older turns
+            summarizer: Custom summarizer; defaults to :func:`extractive_summarizer`
+        """
+        self.max_tokens = max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.summarizer = summarizer or extractive_summarizer(summary_max_tokens)
+
+    def apply(self, messages: List[dict], summary: Optional[str]) -> Tuple[List[dict], Optional[str], int]:
+        """Trim a history to the token budget.
+
+        Args:
+            messages: Full history, oldest first
+            summary: Current summary of earlier turns, if any
+
+        Returns:
+            Tuple of (kept messages, updated summary, number of turns summarized)
+        """
+        costs = [estimate_tokens(m) for m in messages]
+        total = sum(costs)
+        if total <= self.max_tokens:
+            return messages, summary, 0
+
+        # Drop whole turns from the front, but never the latest one
+        starts = [i for i, m in enumerate(messages) if _is_turn_start(m)]
+        cut = 0
+        turns = 0
+        for start in starts[1:]:
+            if total <= self.max_tokens:
+                break
+            total -= sum(costs[cut:start])
+            cut = start
+            turns += 1
+
+        if cut == 0:
+            return messages, summary, 0
+
+        summary = self.summarizer(summary, messages[:cut])
+        logger.debug(f"Summarized {turns} turns ({cut} messages); {total} tokens kept")
+        return messages[cut:], summary, turns
+
+
+def with_summary(messages: List[dict], summary: Optional[str]) -> List[dict]:
+    """Prefix a history with its summary as a user/assistant exchange.
+
+    Args:
+        messages: Messages kept verbatim
+        summary: Summary of earlier turns, if any
+
+    Returns:
+        Messages to seed the agent with
+    """
+    if not summary:
+        return messages
+    return [
+        {"role": "user", "content": [{"text": f"{SUMMARY_HEADER}\n{summary}"}]},
+        {"role": "assistant", "content": [{"text": SUMMARY_ACK}]},
+    ] + list(messages)
@@ -0,0 +1,230 @@
+"""Load generator for the chat API.
+
+Virtual users hold one session each and walk through a short shopping
+conversation against ``/api/chat`` (or ``/api/chat/stream``), and the run
+reports p50/p95/p99 latency and requests per second.
+
+Without ``--url`` the whole stack runs in this process: the stand-in backend
+(:mod:`stub_backend`) and the ASGI chatbot service with the scripted model
+(:func:`scripted_model.shopping_responder`), so the real tools, session store
+and agent loop are exercised without AWS credentials:
+
+    python load_test.py --users 50 --turns 5 --backend-latency 0.02 --model-latency 0.2
+
+Against a running service:
+
+    python load_test.py --url http://localhost:5001 --users 20
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import threading
+import time
+from typing import List, Optional, Tuple
+import httpx
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+# One user's conversation; users repeat it if they take more turns
+CONVERSATION = [
+    "Show me electronics",
+    "Can you recommend something for my home office?",
+    "Please add 3 to my cart",
+    "What's in my cart?",
+    "Remove 3 from my cart",
+]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples (0 if empty)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    """Latency percentiles (milliseconds) and throughput of a run.
+
+    Args:
+        latencies: Seconds taken by each successful request
+        errors: Number of failed requests
+        elapsed: Wall-clock seconds for the whole run
+
+    Returns:
+        Dict with requests, errors, rps, and mean/p50/p95/p99/max in ms
+    """
+    requests = len(latencies) + errors
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1) if latencies else 0.0,
+    }
+
+
+async def _user(client: httpx.AsyncClient, path: str, turns: int,
+                latencies: List[float], failures: List[str]):
+    session_id = None
+    for turn in range(turns):
+        body = {"message": CONVERSATION[turn % len(CONVERSATION)]}
+        if session_id:
+            body["sessionId"] = session_id
+        start = time.perf_counter()
+        try:
+            response = await client.post(path, json=body)
+            if path.endswith('/stream'):
+                # The session id arrives in the final "done" event
+                text = response.text
+                ok = response.status_code == 200 and "event: done" in text
+                if ok and session_id is None:
+                    session_id = text.rsplit('"sessionId": "', 1)[-1].split('"', 1)[0]
+            else:
+                ok = response.status_code == 200
+                if ok:
+                    session_id = response.json().get("sessionId")
+        except httpx.HTTPError as e:
+            failures.append(f"{type(e).__name__}: {e}")
+            continue
+        if ok:
+            latencies.append(time.perf_counter() - start)
+        else:
+            failures.append(f"HTTP {response.status_code}")
+
+
+async def run_load(url: str, users: int = 10, turns: int = 5, stream: bool = False,
+                   timeout: float = 60.0) -> dict:
+    """Run `users` concurrent conversations of `turns` messages each.
+
+    Args:
+        url: Base URL of the chatbot service
+        users: Number of concurrent virtual users
+        turns: Messages each user sends
+        stream: Use ``/api/chat/stream`` instead of ``/api/chat``
+        timeout: Per-request timeout in seconds
+
+    Returns:
+        Summary from :func:`summarize`
+    """
+    path = "/api/chat/stream" if stream else "/api/chat"
+    latencies: List[float] = []
+    failures: List[str] = []
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(_user(client, path, turns, latencies, failures) for _ in range(users)))
+        elapsed = time.perf_counter() - start
+
+    if failures:
+        logger.warning(f"{len(failures)} requests failed, first: {failures[0]}")
+    return summarize(latencies, len(failures), elapsed)
+
+
+def serve_in_thread(app) -> Tuple[uvicorn.Server, threading.Thread, str]:
+    """Serve an ASGI app on a free local port from a background thread.
+
+    Returns:
+        Tuple of (server, thread, base URL); set ``server.should_exit`` and
+        join the thread to stop it
+    """
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, log_config=None, log_level='warning', timeout_keep_alive=30))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, name=f"uvicorn-{port}", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"Server on port {port} failed to start")
+        time.sleep(0.01)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+class LocalStack:
+    """Stand-in backend plus a chatbot service with the scripted model, in this process."""
+
+    def __init__(self, products: int = 100, backend_latency: float = 0.0,
+                 model_latency: float = 0.0, token_delay: float = 0.0):
+        """Configure the stack.
+
+        Args:
+            products: Catalog size of the stand-in backend
+            backend_latency: Seconds the backend waits before every response
+            model_latency: Seconds before the first token of every model call
+            token_delay: Seconds between streamed words
+        """
+        self.products = products
+        self.backend_latency = backend_latency
+        self.model_latency = model_latency
+        self.token_delay = token_delay
+        self.servers: List[Tuple[uvicorn.Server, threading.Thread]] = []
+        self.url: Optional[str] = None
+
+    def __enter__(self) -> 'LocalStack':
+        # Imported here so `--url` runs need none of the service's settings
+        from asgi import build_chatbot_service, create_asgi_app
+        from config import Config, set_config
+        from scripted_model import ScriptedModel, shopping_responder
+        from stub_backend import create_stub_backend
+        from tools.backend_client import close_backend_client
+
+        backend, thread, backend_url = serve_in_thread(create_stub_backend(self.products, self.backend_latency))
+        self.servers.append((backend, thread))
+
+        os.environ['ECOMMERCE_API_URL'] = backend_url
+        # The scripted model never calls AWS, but the configuration requires credentials
+        os.environ.setdefault('AWS_ACCESS_KEY_ID', 'load-test')
+        os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'load-test')
+        # Virtual users send their turns back to back, faster than a person would
+        os.environ.setdefault('SESSION_RATE_LIMIT', '0')
+        config = Config()
+        set_config(config)
+        close_backend_client()
+
+        model = ScriptedModel(shopping_responder, latency=self.model_latency, token_delay=self.token_delay)
+        chatbot, thread, self.url = serve_in_thread(create_asgi_app(build_chatbot_service(config, model=model)))
+        self.servers.append((chatbot, thread))
+        return self
+
+    def __exit__(self, *exc_info):
+        # Chatbot first, so its shutdown closes the backend client while the backend is up
+        for server, thread in reversed(self.servers):
+            server.should_exit = True
+            thread.join()
+        self.servers.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the chatbot /api/chat endpoint")
+    parser.add_argument('--url', help="chatbot service to test (default: start a local stack)")
+    parser.add_argument('--users', type=int, default=10, help="concurrent virtual users")
+    parser.add_argument('--turns', type=int, default=5, help="messages per user")
+    parser.add_argument('--stream', action='store_true', help="use /api/chat/stream")
+    parser.add_argument('--products', type=int, default=100, help="local backend catalog size")
+    parser.add_argument('--backend-latency', type=float, default=0.02, help="local backend delay per request (s)")
+    parser.add_argument('--model-latency', type=float, default=0.2, help="scripted model time to first token (s)")
+    parser.add_argument('--token-delay', type=float, default=0.0, help="scripted model delay between words (s)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.url:
+        report = asyncio.run(run_load(args.url, args.users, args.turns, args.stream))
+    else:
+        with LocalStack(args.products, args.backend_latency, args.model_latency, args.token_delay) as stack:
+            report = asyncio.run(run_load(stack.url, args.users, args.turns, args.stream))
+
+    print(f"{'requests':>9} {'errors':>7} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    print(f"{report['requests']:>9} {report['errors']:>7} {report['rps']:>7.1f} {report['p50_ms']:>8.1f} "
+          f"{report['p95_ms']:>8.1f} {report['p99_ms']:>8.1f} {report['max_ms']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
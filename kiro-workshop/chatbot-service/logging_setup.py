@@ -0,0 +1,183 @@
+"""Logging for the chatbot service, kept off the request path.
+
+:func:`setup_logging` routes every record through a ``QueueHandler``: the
+request thread only puts the record on a queue, and a ``QueueListener``
+thread formats and writes it. High-volume INFO events are logged with
+``extra=SAMPLED`` and only a fraction of them are kept (all of them at DEBUG
+level). Each HTTP request produces one access-log line with its timing
+(:func:`access_log`, written by :class:`AccessLogMiddleware` for the ASGI
+server and by the Flask request hooks).
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+# Mark a high-volume INFO event for sampling: logger.info(..., extra=SAMPLED)
+SAMPLED = {'sampled': True}
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Attributes every LogRecord has; anything else was passed in `extra`
+_RECORD_ATTRIBUTES = frozenset(logging.LogRecord('', 0, '', 0, '', None, None).__dict__) | {'message', 'asctime'}
+
+access_logger = logging.getLogger('access')
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of the records marked with :data:`SAMPLED`, unless DEBUG logging is on."""
+
+    def __init__(self, rate: float = 1.0):
+        """Initialize the filter.
+
+        Args:
+            rate: Fraction of sampled records to keep (0-1)
+        """
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, 'sampled', False) or record.levelno > logging.INFO or self.rate >= 1:
+            return True
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object, with any ``extra`` fields at the top level."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({k: v for k, v in record.__dict__.items() if k not in _RECORD_ATTRIBUTES})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Queues records with their arguments merged, leaving all other formatting to the writer thread.
+
+    The stock handler formats the record on the calling thread and drops
+    ``exc_info``, so the writer's formatter would never see the exception.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        # Arguments may be mutable or unpicklable objects; the text is what gets logged
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(log_level: str = 'INFO', log_format: str = 'text', sample_rate: float = 1.0):
+    """Send log records through a queue to a background writer thread.
+
+    Replaces any handlers on the root logger; calling it again restarts the
+    writer with the new settings.
+
+    Args:
+        log_level: Root logging level
+        log_format: 'text' or 'json' (one object per line)
+        sample_rate: Fraction of :data:`SAMPLED` INFO records to keep
+    """
+    global _listener
+    stop_logging()
+
+    output = logging.StreamHandler()
+    output.setFormatter(JsonFormatter() if log_format == 'json' else logging.Formatter(TEXT_FORMAT, DATE_FORMAT))
+    records = queue.SimpleQueue()
+    handler = _QueueHandler(records)
+    handler.addFilter(SamplingFilter(sample_rate))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(getattr(logging, log_level.upper()))
+
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging():
+    """Write out queued records and stop the writer thread."""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
+atexit.register(stop_logging)
+
+
+def access_log(method: str, path: str, status: Optional[int], duration: float,
+               ttfb: Optional[float] = None, session_id: Optional[str] = None):
+    """Write the access-log line for a finished request.
+
+    Args:
+        method: HTTP method
+        path: Request path
+        status: Response status (None if no response was sent)
+        duration: Seconds until the response, including any stream, finished
+        ttfb: Seconds until the response started
+        session_id: Chat session the request belonged to, if any
+    """
+    fields = {
+        'http_method': method,
+        'path': path,
+        'status': status,
+        'duration_ms': round(duration * 1000, 1),
+    }
+    if ttfb is not None:
+        fields['ttfb_ms'] = round(ttfb * 1000, 1)
+    if session_id:
+        fields['session_id'] = session_id
+    details = " ".join(f"{k}={v}" for k, v in fields.items() if k not in ('http_method', 'path', 'status'))
+    access_logger.info(f"{method} {path} {status} {details}", extra=fields)
+
+
+class AccessLogMiddleware:
+    """ASGI middleware that writes one access-log line per HTTP request.
+
+    Handlers can name the request's chat session with ``request.state.session_id``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        state = scope.setdefault('state', {})
+        response = {'status': None, 'ttfb': None}
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+                response['ttfb'] = time.perf_counter() - start
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            access_log(scope['method'], scope['path'], response['status'] or 500, time.perf_counter() - start,
+                       response['ttfb'], state.get('session_id'))
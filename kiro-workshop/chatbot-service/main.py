@@ -1,11 +1,19 @@
 """Main entry point for the chatbot service."""
 import logging
 import sys
-from config import Config, setup_logging
-from agent import create_agent
+from config import Config, set_config, install_reload_handler
+from logging_setup import setup_logging
+from agent import AgentFactory
+from context_window import ContextWindow
 from session_manager import SessionManager
+from session_store import create_session_store
+from response_cache import ResponseCache
 from chatbot_service import ChatbotService
+from admission import create_admission_controller
 from server import create_app, run_server
+from asgi import run_asgi_server
+from tools.backend_client import close_backend_client
+from tracing import create_span_exporter, flush_tracing, setup_tracing
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +25,11 @@ def main():
         config = Config()
         
         # Setup logging
-        setup_logging(config.log_level)
+        setup_logging(config.log_level, config.log_format, config.log_sample_rate)
+        
+        # Share the configuration with the tools; SIGHUP reloads it
+        set_config(config)
+        install_reload_handler()
         
         logger.info("=" * 50)
         logger.info("Starting Shopping Assistant Chatbot Service")
@@ -26,15 +38,45 @@ def main():
         # Log configuration
         config.log_config()
         
+        if config.server_mode == 'asgi':
+            # Each worker builds its own session manager, agents and service
+            logger.info("=" * 50)
+            logger.info(f"Chatbot service ready on http://localhost:{config.chatbot_port}")
+            logger.info("=" * 50)
+            
+            run_asgi_server(
+                host='0.0.0.0',
+                port=config.chatbot_port,
+                workers=config.server_workers,
+                keep_alive=config.keep_alive_seconds,
+                graceful_shutdown=config.graceful_shutdown_seconds
+            )
+            return
+        
+        # Record per-stage latency, exporting spans if configured
+        setup_tracing(create_span_exporter(config.trace_exporter, config.trace_file))
+        
         # Create session manager
-        session_manager = SessionManager(timeout_minutes=config.session_timeout_minutes)
+        session_manager = SessionManager(
+            timeout_minutes=config.session_timeout_minutes,
+            context_window=ContextWindow(config.history_max_tokens, config.summary_max_tokens),
+            store=create_session_store(config)
+        )
         logger.info(f"Session manager initialized with {config.session_timeout_minutes} minute timeout")
         
-        # Create agent
-        agent = create_agent(config)
+        # Create agent factory (one agent per turn, sharing a single model)
+        agent_factory = AgentFactory(config)
         
         # Create chatbot service
-        chatbot_service = ChatbotService(agent, session_manager)
+        chatbot_service = ChatbotService(
+            agent_factory,
+            session_manager,
+            admission=create_admission_controller(config),
+            response_cache=(
+                ResponseCache(config.response_cache_size, config.response_cache_ttl)
+                if config.response_cache_size else None
+            )
+        )
         
         # Create Flask app
         app = create_app(chatbot_service)
@@ -44,7 +86,10 @@ def main():
         logger.info(f"Chatbot service ready on http://localhost:{config.chatbot_port}")
         logger.info("=" * 50)
         
-        run_server(app, host='0.0.0.0', port=config.chatbot_port)
+        try:
+            run_server(app, host='0.0.0.0', port=config.chatbot_port)
+        finally:
+            session_manager.stop()
         
     except ValueError as e:
         logger.error(f"Configuration error: {e}")
@@ -53,6 +98,9 @@ def main():
     except Exception as e:
         logger.error(f"Failed to start chatbot service: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        close_backend_client()
+        flush_tracing()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,194 @@
+"""Lightweight metric types for the service's own instrumentation.
+
+:class:`PrometheusText` renders them in the Prometheus text exposition
+format for ``/api/metrics``.
+"""
+import bisect
+import math
+import threading
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+
+# Latency bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram of observed values (typically seconds).
+
+    Percentiles are estimated by linear interpolation within a bucket, as
+    Prometheus' ``histogram_quantile`` does.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """Initialize the histogram.
+
+        Args:
+            buckets: Increasing bucket upper bounds; values above the last go
+                into an overflow bucket
+        """
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        """Record one value."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated value below which a fraction `q` of observations fall (None if empty)."""
+        with self._lock:
+            counts = list(self._counts)
+            total = self.count
+            largest = self.max
+        if not total:
+            return None
+
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            if count and cumulative + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else largest
+                upper = min(upper, largest)
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return largest
+
+    def cumulative_counts(self) -> list:
+        """Observations at or below each bucket bound, then the total."""
+        with self._lock:
+            counts = list(self._counts)
+        total, cumulative = 0, []
+        for count in counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+    def snapshot(self) -> dict:
+        """Count, mean, percentiles and maximum, in the unit observed."""
+        def rounded(value):
+            return round(value, 4) if value is not None else None
+
+        return {
+            "count": self.count,
+            "mean": rounded(self.sum / self.count) if self.count else None,
+            "p50": rounded(self.quantile(0.5)),
+            "p95": rounded(self.quantile(0.95)),
+            "p99": rounded(self.quantile(0.99)),
+            "max": rounded(self.max) if self.count else None,
+        }
+
+
+class Counter:
+    """Monotonic counts, one per combination of label values."""
+
+    def __init__(self, labelnames: Sequence[str] = ()):
+        """Initialize the counter.
+
+        Args:
+            labelnames: Names of the labels each count is kept under
+        """
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount: float = 1):
+        """Add to the count for the given label values."""
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"Expected label values for {self.labelnames}, got {labelvalues}")
+        key = tuple(str(value) for value in labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *labelvalues) -> float:
+        """Current count for the given label values."""
+        with self._lock:
+            return self._values.get(tuple(str(value) for value in labelvalues), 0)
+
+    def samples(self) -> Dict[Tuple[str, ...], float]:
+        """Counts by label values."""
+        with self._lock:
+            return dict(self._values)
+
+
+# Content type of the Prometheus text exposition format
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class PrometheusText:
+    """Builder for the Prometheus text exposition format (version 0.0.4).
+
+    Each metric is given with its help text and samples keyed by label
+    values, in the order of ``labelnames``; unlabelled metrics use the key
+    ``()``.
+    """
+
+    def __init__(self, prefix: str = ''):
+        """Initialize the builder.
+
+        Args:
+            prefix: Prepended to every metric name
+        """
+        self.prefix = prefix
+        self._lines = []
+
+    def _header(self, name: str, kind: str, help_text: str) -> str:
+        name = self.prefix + name
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} {kind}")
+        return name
+
+    def _sample(self, name: str, labelnames: Sequence[str], labelvalues: Sequence[str], value: float):
+        if labelnames:
+            labels = ','.join(f'{k}="{_escape(str(v))}"' for k, v in zip(labelnames, labelvalues))
+            name = f"{name}{{{labels}}}"
+        self._lines.append(f"{name} {_format_value(value)}")
+
+    def gauge(self, name: str, help_text: str, samples: Mapping[tuple, float], labelnames: Sequence[str] = ()):
+        """Add a gauge."""
+        name = self._header(name, 'gauge', help_text)
+        for labelvalues, value in samples.items():
+            self._sample(name, labelnames, labelvalues, value)
+
+    def counter(self, name: str, help_text: str, samples: Mapping[tuple, float], labelnames: Sequence[str] = ()):
+        """Add a counter; ``name`` should end in ``_total``."""
+        name = self._header(name, 'counter', help_text)
+        for labelvalues, value in samples.items():
+            self._sample(name, labelnames, labelvalues, value)
+
+    def histogram(self, name: str, help_text: str, histograms: Mapping[tuple, Histogram],
+                  labelnames: Sequence[str] = ()):
+        """Add a histogram, with its ``_bucket``, ``_sum`` and ``_count`` series."""
+        name = self._header(name, 'histogram', help_text)
+        bucket_labels = tuple(labelnames) + ('le',)
+        for labelvalues, histogram in histograms.items():
+            bounds = histogram.buckets + (math.inf,)
+            for bound, count in zip(bounds, histogram.cumulative_counts()):
+                self._sample(f"{name}_bucket", bucket_labels, tuple(labelvalues) + (_format_value(float(bound)),), count)
+            self._sample(f"{name}_sum", labelnames, labelvalues, histogram.sum)
+            self._sample(f"{name}_count", labelnames, labelvalues, histogram.count)
+
+    def render(self) -> str:
+        """The exposition text."""
+        return "\n".join(self._lines) + "\n"
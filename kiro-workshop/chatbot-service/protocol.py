@@ -0,0 +1,109 @@
+"""Request validation and response formats shared by the HTTP servers."""
+import json
+from typing import Any, Optional, Tuple
+
+# Maximum accepted message length in characters
+MAX_MESSAGE_LENGTH = 2000
+
+# CORS settings for the frontend
+CORS_ORIGINS = ["http://localhost:3000", "http://localhost:3001"]
+CORS_METHODS = ["GET", "POST", "OPTIONS"]
+CORS_HEADERS = ["Content-Type", "Authorization"]
+
+# Headers for Server-Sent Event responses
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'
+}
+
+
+class ChatRequestError(Exception):
+    """A chat request failed validation."""
+
+    def __init__(self, code: str, message: str, status: int = 400):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status = status
+
+    def to_dict(self) -> dict:
+        """Error response body."""
+        return error_body(self.code, self.message)
+
+
+def error_body(code: str, message: str) -> dict:
+    """Build the standard error response body.
+
+    Args:
+        code: Machine-readable error code
+        message: Human-readable message
+
+    Returns:
+        Error response body
+    """
+    return {
+        "error": {
+            "code": code,
+            "message": message
+        }
+    }
+
+
+def validate_chat_request(data: Any) -> Tuple[str, Optional[str]]:
+    """Validate a chat request body.
+
+    Args:
+        data: Parsed JSON body, or None if the request was not JSON
+
+    Returns:
+        Tuple of (message, session_id)
+
+    Raises:
+        ChatRequestError: If the request is invalid
+    """
+    if not isinstance(data, dict):
+        raise ChatRequestError("INVALID_FORMAT", "Request must be JSON")
+
+    # Validate required fields
+    if 'message' not in data:
+        raise ChatRequestError("MISSING_FIELD", "Missing required field: message")
+
+    message = data['message']
+    session_id = data.get('sessionId')
+
+    # Validate message
+    if not message or not isinstance(message, str):
+        raise ChatRequestError("INVALID_MESSAGE", "Message must be a non-empty string")
+
+    if len(message) > MAX_MESSAGE_LENGTH:
+        raise ChatRequestError("MESSAGE_TOO_LONG", f"Message must be {MAX_MESSAGE_LENGTH} characters or less")
+
+    return message, session_id
+
+
+def wants_json_metrics(format_param: Optional[str], accept: Optional[str]) -> bool:
+    """Whether a metrics request asks for JSON rather than the Prometheus format.
+
+    Args:
+        format_param: The ``format`` query parameter, if given ('json' or 'prometheus')
+        accept: The Accept header
+
+    Returns:
+        True for JSON
+    """
+    if format_param:
+        return format_param.lower() == 'json'
+    return 'application/json' in (accept or '')
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event.
+
+    Args:
+        event: Event name
+        data: JSON-serializable payload
+
+    Returns:
+        SSE frame
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
@@ -0,0 +1,126 @@
+"""Cache of replies to opening questions that depend only on the catalog."""
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional, Tuple
+from tools.catalog import get_catalog
+
+logger = logging.getLogger(__name__)
+
+# Tools whose results depend only on the catalog snapshot
+CATALOG_TOOLS = frozenset({'list_products', 'get_recommendations'})
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    """Normalize a message for use as a cache key.
+
+    Case, Unicode width forms, repeated whitespace and trailing punctuation
+    are ignored, so "Show me  books?" and "show me books" share an entry.
+
+    Args:
+        message: User's message
+
+    Returns:
+        Normalized message
+    """
+    text = unicodedata.normalize('NFKC', message).casefold()
+    return _WHITESPACE.sub(" ", text).strip().rstrip("?!. ")
+
+
+class ResponseCache:
+    """LRU cache with a TTL for first-turn replies, keyed by message and catalog version.
+
+    Only replies produced without history, using no tools other than
+    :data:`CATALOG_TOOLS`, are stored, so a cached reply is what the agent
+    would say again given the same catalog. A new catalog version makes the
+    older entries unreachable; they age out through LRU and TTL.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300,
+                 version: Optional[Callable[[], int]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached replies
+            ttl: Seconds a reply may be served
+            version: Returns the current catalog version (0 if unknown);
+                defaults to the process-wide catalog's
+            clock: Monotonic time source
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version = version or (lambda: get_catalog().version)
+        self.clock = clock
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, message: str) -> Optional[str]:
+        """Get the cached reply to an opening message.
+
+        Args:
+            message: User's message
+
+        Returns:
+            Cached reply, or None on a miss
+        """
+        version = self.version()
+        key = (normalize_message(message), version)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key) if version else None
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, message: str, reply: str, tools_used: Iterable[str] = ()) -> bool:
+        """Store a reply if the turn that produced it is cacheable.
+
+        Args:
+            message: User's message
+            reply: Agent's reply
+            tools_used: Names of the tools the agent called during the turn
+
+        Returns:
+            True if the reply was stored
+        """
+        if not set(tools_used) <= CATALOG_TOOLS:
+            return False
+        # Read after the turn, in case the turn refreshed the catalog
+        version = self.version()
+        if not version:
+            return False
+
+        key = (normalize_message(message), version)
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, reply)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def stats(self) -> dict:
+        """Hit, miss and size figures."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,154 @@
+"""Scripted stand-in for the Bedrock model, for tests and local load runs."""
+import asyncio
+import json
+import re
+import uuid
+from typing import Any, AsyncIterable, Callable, Dict, List, Optional, Union
+from strands.models import Model
+
+# A responder returns reply text, a tool call as {"tool": name, "input": {...}},
+# or a list of tool calls to make in one step
+Response = Union[str, Dict[str, Any], List[Dict[str, Any]]]
+
+
+def last_tool_results(messages: List[dict]) -> List[str]:
+    """Text of the tool results in the latest message, if it carries any."""
+    if not messages:
+        return []
+    texts = []
+    for block in messages[-1].get('content', []):
+        result = block.get('toolResult') if isinstance(block, dict) else None
+        if result:
+            texts.append("".join(part.get('text', '') for part in result.get('content', [])))
+    return texts
+
+
+def last_user_text(messages: List[dict]) -> str:
+    """Text of the most recent user message that is not a tool result."""
+    for message in reversed(messages):
+        if message.get('role') != 'user':
+            continue
+        text = "".join(block.get('text', '') for block in message.get('content', []) if isinstance(block, dict))
+        if text:
+            return text
+    return ""
+
+
+def echo_responder(messages: List[dict]) -> Response:
+    """Reply with the tool output after a tool call, otherwise echo the user."""
+    results = last_tool_results(messages)
+    if results:
+        return "Here is what I found:\n" + "\n".join(results)
+    return f"You said: {last_user_text(messages)}"
+
+
+CATEGORIES = ('Electronics', 'Home', 'Furniture', 'Accessories', 'Sports', 'Books')
+
+_NUMBER = re.compile(r"\b\d+\b")
+
+
+def shopping_responder(messages: List[dict]) -> Response:
+    """Act like the shopping assistant: pick tools from keywords, then report their output.
+
+    "add 3" and "remove 3" change the cart, "cart" views it, "recommend" or
+    "suggest" asks for recommendations, and a category name or "show" lists
+    products.
+    """
+    results = last_tool_results(messages)
+    if results:
+        return "Here is what I found:\n" + "\n".join(results)
+
+    text = last_user_text(messages).lower()
+    numbers = _NUMBER.findall(text)
+    if 'remove' in text and numbers:
+        return {"tool": "remove_from_cart", "input": {"product_id": int(numbers[0])}}
+    if 'add' in text and numbers:
+        return {"tool": "add_to_cart", "input": {"product_id": int(numbers[0])}}
+
+    calls = []
+    if 'cart' in text:
+        calls.append({"tool": "view_cart", "input": {}})
+    if 'recommend' in text or 'suggest' in text:
+        calls.append({"tool": "get_recommendations", "input": {"preferences": text}})
+    category = next((c for c in CATEGORIES if c.lower() in text), None)
+    if category or 'show' in text:
+        calls.append({"tool": "list_products", "input": {"category": category} if category else {}})
+    if calls:
+        return calls
+    return "I can help you browse products, get recommendations and manage your cart."
+
+
+class ScriptedModel(Model):
+    """Strands model that streams scripted responses in the Bedrock event format.
+
+    Each model call asks ``responder`` for the next response given the
+    conversation so far. Text is streamed word by word; tool calls are emitted
+    as ``toolUse`` blocks with ``stopReason`` ``tool_use`` so the agent runs
+    the real tools and calls the model again with their results.
+    """
+
+    def __init__(self, responder: Callable[[List[dict]], Response] = echo_responder,
+                 latency: float = 0.0, token_delay: float = 0.0):
+        """Initialize the model.
+
+        Args:
+            responder: Returns the next response for a conversation
+            latency: Seconds before the first event of each call (time to first token)
+            token_delay: Seconds between streamed words
+        """
+        self.responder = responder
+        self.latency = latency
+        self.token_delay = token_delay
+        self.config: Dict[str, Any] = {'model_id': 'scripted'}
+        self.calls = 0
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.config
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        """Validate the responder's answer to ``prompt`` into ``output_model``.
+
+        The responder returns the output's fields as a dict or as JSON text;
+        anything that does not fit ``output_model`` raises its validation error.
+        """
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        response = self.responder(prompt)
+        if isinstance(response, str):
+            response = json.loads(response)
+        yield {"output": output_model.model_validate(response)}
+
+    async def stream(self, messages: List[dict], tool_specs: Optional[list] = None,
+                     system_prompt: Optional[str] = None, **kwargs: Any) -> AsyncIterable[Dict[str, Any]]:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        response = self.responder(messages)
+
+        yield {"messageStart": {"role": "assistant"}}
+        if isinstance(response, (dict, list)):
+            for call in ([response] if isinstance(response, dict) else response):
+                tool_use_id = f"tooluse_{uuid.uuid4().hex[:12]}"
+                yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": tool_use_id, "name": call['tool']}}}}
+                yield {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps(call.get('input', {}))}}}}
+                yield {"contentBlockStop": {}}
+            stop_reason = "tool_use"
+        else:
+            words = response.split(" ")
+            for i, word in enumerate(words):
+                if self.token_delay and i:
+                    await asyncio.sleep(self.token_delay)
+                yield {"contentBlockDelta": {"delta": {"text": word if i == 0 else " " + word}}}
+            yield {"contentBlockStop": {}}
+            stop_reason = "end_turn"
+        yield {"messageStop": {"stopReason": stop_reason}}
+        yield {
+            "metadata": {
+                "usage": {"inputTokens": 0, "outputTokens": 0, "totalTokens": 0},
+                "metrics": {"latencyMs": 0}
+            }
+        }
@@ -1,9 +1,19 @@
 """Flask HTTP server for the chatbot service."""
 import logging
+import time
 from datetime import datetime
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
+from opentelemetry import trace
 from typing import Optional
+from admission import AdmissionRejected
+from logging_setup import access_log
+from protocol import (
+    CORS_HEADERS, CORS_METHODS, CORS_ORIGINS, SSE_HEADERS,
+    ChatRequestError, format_sse, validate_chat_request, wants_json_metrics
+)
+from metrics import PROMETHEUS_CONTENT_TYPE
+from tracing import end_request_span, start_request_span
 
 logger = logging.getLogger(__name__)
 
@@ -22,27 +32,44 @@ def create_app(chatbot_service) -> Flask:
     # Configure CORS
     CORS(app, resources={
         r"/api/*": {
-            "origins": ["http://localhost:3000", "http://localhost:3001"],
-            "methods": ["GET", "POST", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"]
+            "origins": CORS_ORIGINS,
+            "methods": CORS_METHODS,
+            "allow_headers": CORS_HEADERS
         }
     })
     
-    logger.info("Configured CORS for origins: http://localhost:3000, http://localhost:3001")
+    logger.info(f"Configured CORS for origins: {', '.join(CORS_ORIGINS)}")
     
-    # Request logging middleware
+    # Request timing and tracing
     @app.before_request
-    def log_request():
-        logger.info(f"{request.method} {request.path} from {request.remote_addr}")
-        if request.method == "POST" and request.is_json:
-            logger.debug(f"Request body: {request.get_json()}")
+    def start_request():
+        g.request_start = time.perf_counter()
+        route = request.url_rule.rule if request.url_rule else None
+        g.request_span = start_request_span(request.method, request.path, route)
     
-    # Response logging middleware
+    # One access-log line per request, written once the response (including a stream) is sent
     @app.after_request
     def log_response(response):
-        logger.info(f"Response status: {response.status_code}")
+        g.response_status = response.status_code
+        start = g.get('request_start', time.perf_counter())
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'ttfb': time.perf_counter() - start,
+            'session_id': g.get('session_id')
+        }
+        response.call_on_close(lambda: access_log(duration=time.perf_counter() - start, **fields))
         return response
     
+    # Ends the request span once the response, including a stream, is sent
+    @app.teardown_request
+    def end_trace(error):
+        request_span = g.pop('request_span', None)
+        if request_span:
+            end_request_span(*request_span, status=g.pop('response_status', None),
+                             end=not g.pop('streaming', False))
+    
     # Error handling middleware
     @app.errorhandler(400)
     def bad_request(error):
@@ -54,6 +81,11 @@ def create_app(chatbot_service) -> Flask:
             }
         }), 400
     
+    @app.errorhandler(AdmissionRejected)
+    def admission_rejected(error):
+        logger.warning(f"Refused chat request: {error.reason}")
+        return jsonify(error.to_dict()), error.status, {"Retry-After": str(error.retry_after)}
+    
     @app.errorhandler(405)
     def method_not_allowed(error):
         logger.warning(f"Method not allowed: {error}")
@@ -85,59 +117,40 @@ def create_app(chatbot_service) -> Flask:
             "timestamp": datetime.now().isoformat()
         })
     
+    # Metrics endpoint
+    @app.route('/api/metrics', methods=['GET'])
+    def metrics():
+        """Service metrics in Prometheus text format, or JSON if asked for."""
+        if wants_json_metrics(request.args.get('format'), request.headers.get('Accept')):
+            return jsonify(chatbot_service.get_metrics())
+        return Response(chatbot_service.get_prometheus_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
+    
+    def parse_chat_request():
+        """Validate a chat request body.
+        
+        Returns:
+            Tuple of (message, session_id, error_response); error_response is None when valid
+        """
+        data = request.get_json(silent=True) if request.is_json else None
+        try:
+            message, session_id = validate_chat_request(data)
+        except ChatRequestError as e:
+            logger.warning(f"Invalid chat request: {e.message}")
+            return None, None, (jsonify(e.to_dict()), e.status)
+        return message, session_id, None
+    
     # Chat endpoint
     @app.route('/api/chat', methods=['POST'])
     def chat():
         """Process chat messages."""
         try:
-            # Validate request
-            if not request.is_json:
-                logger.warning("Request is not JSON")
-                return jsonify({
-                    "error": {
-                        "code": "INVALID_FORMAT",
-                        "message": "Request must be JSON"
-                    }
-                }), 400
-            
-            data = request.get_json()
-            
-            # Validate required fields
-            if 'message' not in data:
-                logger.warning("Missing 'message' field in request")
-                return jsonify({
-                    "error": {
-                        "code": "MISSING_FIELD",
-                        "message": "Missing required field: message"
-                    }
-                }), 400
-            
-            message = data['message']
-            session_id = data.get('sessionId')
-            
-            # Validate message
-            if not message or not isinstance(message, str):
-                logger.warning("Invalid message field")
-                return jsonify({
-                    "error": {
-                        "code": "INVALID_MESSAGE",
-                        "message": "Message must be a non-empty string"
-                    }
-                }), 400
-            
-            if len(message) > 2000:
-                logger.warning(f"Message too long: {len(message)} characters")
-                return jsonify({
-                    "error": {
-                        "code": "MESSAGE_TOO_LONG",
-                        "message": "Message must be 2000 characters or less"
-                    }
-                }), 400
-            
-            logger.info(f"Processing message for session: {session_id or 'new'}")
+            message, session_id, error = parse_chat_request()
+            if error:
+                return error
             
             # Process message
             reply, session_id = chatbot_service.process_message(message, session_id)
+            g.session_id = session_id
             
             # Return response
             response = {
@@ -146,9 +159,10 @@ def create_app(chatbot_service) -> Flask:
                 "timestamp": datetime.now().isoformat()
             }
             
-            logger.info(f"Successfully processed message for session: {session_id}")
             return jsonify(response)
             
+        except AdmissionRejected:
+            raise
         except Exception as e:
             logger.error(f"Error processing chat request: {e}", exc_info=True)
             return jsonify({
@@ -158,6 +172,45 @@ def create_app(chatbot_service) -> Flask:
                 }
             }), 500
     
+    # Streaming chat endpoint (Server-Sent Events)
+    @app.route('/api/chat/stream', methods=['POST'])
+    def chat_stream():
+        """Process a chat message, streaming tokens and tool events as they arrive."""
+        try:
+            message, session_id, error = parse_chat_request()
+            if error:
+                return error
+            
+            session_id, events = chatbot_service.stream_message(message, session_id)
+            g.session_id = session_id
+            
+        except AdmissionRejected:
+            raise
+        except Exception as e:
+            logger.error(f"Error processing chat stream request: {e}", exc_info=True)
+            return jsonify({
+                "error": {
+                    "code": "PROCESSING_ERROR",
+                    "message": "An error occurred while processing your message. Please try again."
+                }
+            }), 500
+        
+        # The stream outlives the view, so the request span ends with it
+        request_span, _ = g.request_span
+        g.streaming = True
+        
+        def generate():
+            with trace.use_span(request_span, end_on_exit=True):
+                yield format_sse("session", {"type": "session", "sessionId": session_id})
+                for event in events:
+                    yield format_sse(event["type"], event)
+        
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/event-stream',
+            headers=SSE_HEADERS
+        )
+    
     return app
 
 
@@ -170,4 +223,6 @@ def run_server(app: Flask, host: str = '0.0.0.0', port: int = 5001):
         port: Port to listen on
     """
     logger.info(f"Starting HTTP server on {host}:{port}")
+    # The app writes its own access log; keep werkzeug's for warnings and errors
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
     app.run(host=host, port=port, debug=False)
@@ -1,129 +1,200 @@
 """Session management for maintaining conversation context."""
+import json
 import logging
-import threading
 import time
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Callable, List, Optional, Sequence
 from uuid import uuid4
+from context_window import (
+    MESSAGE_OVERHEAD_TOKENS, SUMMARY_ACK, SUMMARY_HEADER, ContextWindow,
+    estimate_text_tokens, estimate_tokens
+)
+from logging_setup import SAMPLED
+from session_store import InMemorySessionStore, SessionStore
 
 logger = logging.getLogger(__name__)
 
 
 class SessionManager:
-    """Manages conversation sessions and context."""
+    """Manages conversation sessions and context.
     
-    def __init__(self, timeout_minutes: int = 30):
+    Sessions live in a :class:`SessionStore`, which also expires them after
+    ``timeout_minutes`` without activity. With a shared store (such as
+    :class:`session_store.SQLiteSessionStore`) any process can continue any
+    conversation.
+    
+    With a :class:`ContextWindow`, each session keeps only the recent turns
+    that fit its token budget; older turns are folded into a running summary
+    in ``session['context']['summary']``.
+    """
+    
+    def __init__(self, timeout_minutes: int = 30, context_window: Optional[ContextWindow] = None,
+                 store: Optional[SessionStore] = None):
         """Initialize session manager with timeout configuration.
         
         Args:
             timeout_minutes: Number of minutes before a session expires
+            context_window: Token budget policy for stored history; None keeps everything
+            store: Session storage; defaults to an in-memory store
         """
         self.timeout_minutes = timeout_minutes
-        self.sessions: Dict[str, dict] = {}
-        self._lock = threading.Lock()
-        self._cleanup_thread = None
-        self._stop_cleanup = threading.Event()
-        
-        # Start background cleanup task
-        self._start_cleanup_task()
-        
+        self.context_window = context_window
+        self.store = store or InMemorySessionStore(ttl_seconds=timeout_minutes * 60)
+    
     def get_or_create_session(self, session_id: Optional[str] = None) -> tuple[str, dict]:
         """Get existing session or create new one.
         
         Args:
             session_id: Optional session ID. If None, creates new session.
-            
+        
         Returns:
             Tuple of (session_id, session_data)
         """
-        with self._lock:
-            # Create new session if no ID provided or session doesn't exist
-            if not session_id or session_id not in self.sessions:
-                session_id = session_id or str(uuid4())
-                self.sessions[session_id] = {
-                    'session_id': session_id,
-                    'created_at': datetime.now(),
-                    'last_activity': datetime.now(),
-                    'messages': [],
-                    'context': {}
-                }
-                logger.info(f"Created new session: {session_id}")
-            else:
-                # Update last activity time
-                self.sessions[session_id]['last_activity'] = datetime.now()
-                logger.debug(f"Retrieved existing session: {session_id}")
-                
-            return session_id, self.sessions[session_id]
+        now = time.time()
+        session = self.store.load(session_id) if session_id else None
+        
+        if session is not None and self.store.touch(session_id, now):
+            # Update last activity time
+            session['last_activity'] = now
+            logger.debug(f"Retrieved existing session: {session_id}")
+            return session_id, session
+        
+        # Create new session if no ID provided or session doesn't exist
+        session_id = session_id or str(uuid4())
+        session = {
+            'session_id': session_id,
+            'created_at': now,
+            'last_activity': now,
+            'messages': [],
+            'context': {},
+            'stats': self._measure([], None, 0)
+        }
+        self.store.save(session)
+        logger.info(f"Created new session: {session_id}", extra=SAMPLED)
+        return session_id, session
     
     def update_session(self, session_id: str, messages: List[dict]):
         """Update session with new messages.
         
+        If the messages exceed the context window, the oldest turns are
+        summarized and only the rest are stored.
+        
         Args:
             session_id: The session ID to update
             messages: List of messages in Strands format
         """
-        with self._lock:
-            if session_id in self.sessions:
-                self.sessions[session_id]['messages'] = messages
-                self.sessions[session_id]['last_activity'] = datetime.now()
-                logger.debug(f"Updated session {session_id} with {len(messages)} messages")
-            else:
-                logger.warning(f"Attempted to update non-existent session: {session_id}")
+        self._update(session_id, lambda stored: messages)
+    
+    def append_messages(self, session_id: str, messages: List[dict]):
+        """Add messages to the end of a session's history.
+        
+        The history is extended as it is in the store at the time of the
+        write, so turns saved concurrently by other processes sharing the
+        store are kept. Older turns are summarized as in :meth:`update_session`.
+        
+        Args:
+            session_id: The session ID to update
+            messages: Messages to append, in Strands format
+        """
+        self._update(session_id, lambda stored: stored + list(messages))
+    
+    def _update(self, session_id: str, new_messages: Callable[[Sequence[dict]], List[dict]]):
+        """Replace a session's messages with ``new_messages(stored messages)``, atomically."""
+        def change(session: dict):
+            context = session['context']
+            messages = new_messages(session['messages'])
+            if self.context_window:
+                # The store runs this between its read and write of the session
+                messages, summary, turns = self.context_window.apply(messages, context.get('summary'))
+                if turns:
+                    context['summary'] = summary
+                    context['summarized_turns'] = context.get('summarized_turns', 0) + turns
+            
+            session['messages'] = messages
+            session['last_activity'] = time.time()
+            session['stats'] = self._measure(messages, context.get('summary'), context.get('summarized_turns', 0))
+        
+        session = self.store.update(session_id, change)
+        if session is None:
+            logger.warning(f"Attempted to update non-existent session: {session_id}")
+            return
+        logger.debug(
+            f"Updated session {session_id} with {len(session['messages'])} messages "
+            f"({session['stats']['prompt_tokens']} prompt tokens)"
+        )
     
     def get_session_messages(self, session_id: str) -> List[dict]:
         """Get messages for a session.
         
         Args:
             session_id: The session ID
-            
+        
         Returns:
             List of messages or empty list if session doesn't exist
         """
-        with self._lock:
-            if session_id in self.sessions:
-                return self.sessions[session_id]['messages'].copy()
-            return []
+        session = self.store.load(session_id)
+        return session['messages'] if session else []
     
-    def cleanup_expired_sessions(self):
-        """Remove sessions that have exceeded timeout."""
-        with self._lock:
-            now = datetime.now()
-            timeout_delta = timedelta(minutes=self.timeout_minutes)
-            expired_sessions = []
-            
-            for session_id, session_data in self.sessions.items():
-                last_activity = session_data['last_activity']
-                if now - last_activity > timeout_delta:
-                    expired_sessions.append(session_id)
-            
-            for session_id in expired_sessions:
-                del self.sessions[session_id]
-                logger.info(f"Cleaned up expired session: {session_id}")
-            
-            if expired_sessions:
-                logger.info(f"Cleaned up {len(expired_sessions)} expired sessions")
+    def get_session_summary(self, session_id: str) -> Optional[str]:
+        """Get the summary of a session's earlier turns.
+        
+        Args:
+            session_id: The session ID
+        
+        Returns:
+            Summary text, or None if nothing has been summarized yet
+        """
+        session = self.store.load(session_id)
+        return session['context'].get('summary') if session else None
+    
+    def get_session_stats(self, session_id: str) -> Optional[dict]:
+        """Get memory and prompt-size figures for a session.
+        
+        Args:
+            session_id: The session ID
+        
+        Returns:
+            Dict with ``messages``, ``prompt_tokens``, ``memory_bytes`` and
+            ``summarized_turns``, or None if the session doesn't exist
+        """
+        session = self.store.load(session_id)
+        return session['stats'] if session else None
+    
+    def get_metrics(self) -> dict:
+        """Get aggregate session metrics.
+        
+        Returns:
+            Dict of session count, stored messages, memory and prompt-size figures
+        """
+        stats = self.store.all_stats()
+        prompt_tokens = [s['prompt_tokens'] for s in stats]
+        return {
+            "sessions": len(stats),
+            "messages": sum(s['messages'] for s in stats),
+            "memory_bytes": sum(s['memory_bytes'] for s in stats),
+            "avg_prompt_tokens": round(sum(prompt_tokens) / len(stats), 1) if stats else 0,
+            "max_prompt_tokens": max(prompt_tokens, default=0),
+            "summarized_turns": sum(s['summarized_turns'] for s in stats)
+        }
     
-    def _start_cleanup_task(self):
-        """Start background thread for cleaning up expired sessions."""
-        def cleanup_loop():
-            while not self._stop_cleanup.is_set():
-                try:
-                    self.cleanup_expired_sessions()
-                except Exception as e:
-                    logger.error(f"Error in cleanup task: {e}")
-                
-                # Wait 5 minutes before next cleanup
-                self._stop_cleanup.wait(300)
-        
-        self._cleanup_thread = threading.Thread(target=cleanup_loop, daemon=True)
-        self._cleanup_thread.start()
-        logger.info("Started session cleanup background task")
+    @staticmethod
+    def _measure(messages: List[dict], summary: Optional[str], summarized_turns: int) -> dict:
+        """Size of what a session stores and what its next prompt will carry."""
+        prompt_tokens = sum(estimate_tokens(m) for m in messages)
+        memory_bytes = len(json.dumps(messages, separators=(',', ':'), ensure_ascii=False, default=str).encode())
+        if summary:
+            preamble = f"{SUMMARY_HEADER}\n{summary}{SUMMARY_ACK}"
+            prompt_tokens += estimate_text_tokens(preamble) + 2 * MESSAGE_OVERHEAD_TOKENS
+            memory_bytes += len(summary.encode())
+        return {
+            "messages": len(messages),
+            "prompt_tokens": prompt_tokens,
+            "memory_bytes": memory_bytes,
+            "summarized_turns": summarized_turns
+        }
     
     def stop(self):
-        """Stop the session manager and cleanup thread."""
-        self._stop_cleanup.set()
-        if self._cleanup_thread:
-            self._cleanup_thread.join(timeout=1)
+        """Stop the session manager and release the store."""
+        self.store.close()
         logger.info("Session manager stopped")
     
     def get_session_count(self) -> int:
@@ -132,5 +203,4 @@ class SessionManager:
         Returns:
             Number of active sessions
         """
-        with self._lock:
-            return len(self.sessions)
+        return self.store.count()
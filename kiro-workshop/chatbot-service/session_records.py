@@ -0,0 +1,155 @@
+"""Compact in-memory representation of sessions and their messages.
+
+A plain text message as a dict (``{"role": ..., "content": [{"text": ...}]}``)
+costs three containers; a :class:`TextMessage` is one slotted object with an
+interned role. Histories are handed out as read-only :class:`MessageView`
+sequences over a shared tuple instead of copied lists, and extending a
+view shares the existing records.
+"""
+import copy
+import sys
+from collections.abc import Sequence
+from typing import Iterable, Optional, Tuple, Union
+
+# Roles of stored messages, interned so every record shares one string
+ROLES = {role: sys.intern(role) for role in ('user', 'assistant')}
+
+# Order of the fields of SessionRecord.stats
+STATS_FIELDS = ('messages', 'prompt_tokens', 'memory_bytes', 'summarized_turns')
+
+
+class TextMessage:
+    """A message with a single text block."""
+
+    __slots__ = ('role', 'text')
+
+    def __init__(self, role: str, text: str):
+        self.role = ROLES.get(role) or sys.intern(role)
+        self.text = text
+
+    def to_dict(self) -> dict:
+        """The message in Strands format."""
+        return {"role": self.role, "content": [{"text": self.text}]}
+
+
+# Messages that are not plain text (tool use and results) are kept as dicts
+Message = Union[TextMessage, dict]
+
+
+def pack_message(message: dict) -> Message:
+    """Convert a Strands message to its compact form.
+
+    Args:
+        message: Message in Strands format
+
+    Returns:
+        A TextMessage, or a private copy of the dict for other messages
+    """
+    content = message.get('content')
+    if (isinstance(content, list) and len(content) == 1 and isinstance(content[0], dict)
+            and len(content[0]) == 1 and isinstance(content[0].get('text'), str)):
+        return TextMessage(message['role'], content[0]['text'])
+    return copy.deepcopy(message)
+
+
+def unpack_message(message: Message) -> dict:
+    """Convert a compact message back to a new Strands message dict."""
+    if isinstance(message, TextMessage):
+        return message.to_dict()
+    return copy.deepcopy(message)
+
+
+def pack_messages(messages: Iterable[dict]) -> Tuple[Message, ...]:
+    """Convert a history to a tuple of compact messages, sharing records with any view.
+
+    Args:
+        messages: List of Strands messages or a MessageView
+
+    Returns:
+        Tuple of compact messages
+    """
+    if isinstance(messages, MessageView):
+        return messages._items
+    return tuple(pack_message(m) for m in messages)
+
+
+class MessageView(Sequence):
+    """Read-only view of a stored history.
+
+    Items are returned as new Strands message dicts, so callers can change
+    them freely. Slicing and ``view + [messages]`` return new views that
+    share the stored records.
+    """
+
+    __slots__ = ('_items',)
+
+    def __init__(self, items: Tuple[Message, ...] = ()):
+        self._items = items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return MessageView(self._items[index])
+        return unpack_message(self._items[index])
+
+    def __iter__(self):
+        return (unpack_message(m) for m in self._items)
+
+    def __add__(self, other: Iterable[dict]) -> 'MessageView':
+        return MessageView(self._items + pack_messages(other))
+
+    def __radd__(self, other: Iterable[dict]) -> list:
+        return list(other) + list(self)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (MessageView, list, tuple)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"MessageView({list(self)!r})"
+
+
+class SessionRecord:
+    """A stored session.
+
+    ``context`` is None while empty and ``stats`` is a tuple in
+    :data:`STATS_FIELDS` order, so idle sessions cost a single object.
+    """
+
+    __slots__ = ('session_id', 'created_at', 'last_activity', 'messages', 'context', 'stats')
+
+    def __init__(self, session_id: str, created_at: float, last_activity: float,
+                 messages: Tuple[Message, ...], context: Optional[dict], stats: tuple):
+        self.session_id = session_id
+        self.created_at = created_at
+        self.last_activity = last_activity
+        self.messages = messages
+        self.context = context
+        self.stats = stats
+
+    @classmethod
+    def from_dict(cls, record: dict) -> 'SessionRecord':
+        """Build a record from the dict form used by :class:`session_store.SessionStore`."""
+        stats = record['stats']
+        return cls(
+            record['session_id'],
+            record['created_at'],
+            record['last_activity'],
+            pack_messages(record['messages']),
+            dict(record['context']) or None,
+            tuple(stats[field] for field in STATS_FIELDS)
+        )
+
+    def to_dict(self) -> dict:
+        """The record as a dict, with the history as a :class:`MessageView`."""
+        return {
+            'session_id': self.session_id,
+            'created_at': self.created_at,
+            'last_activity': self.last_activity,
+            'messages': MessageView(self.messages),
+            'context': dict(self.context) if self.context else {},
+            'stats': dict(zip(STATS_FIELDS, self.stats)),
+        }
@@ -0,0 +1,492 @@
+"""Storage backends for chat sessions.
+
+A :class:`SessionStore` keeps session records and expires them itself after
+``ttl_seconds`` without activity. :class:`InMemorySessionStore` serves a
+single process from lock-striped maps; :class:`SQLiteSessionStore` keeps sessions in a database file
+that several worker processes can share. :class:`FakeSessionStore` behaves
+like an external store (records are serialized on every save) with a
+controllable clock, for tests.
+
+Records are plain dicts with ``session_id``, ``created_at`` and
+``last_activity`` (epoch seconds), ``messages``, ``context`` and ``stats``.
+"""
+import heapq
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Tuple
+from session_records import SessionRecord
+
+logger = logging.getLogger(__name__)
+
+# Serialized records at least this large are zlib-compressed
+COMPRESS_THRESHOLD = 1024
+
+# Minimum seconds between deletes of expired rows (SQLite)
+PURGE_INTERVAL = 60
+
+# Lock stripes in the in-memory store
+DEFAULT_SHARDS = 16
+
+# Stale expiry-heap entries tolerated per shard before the heap is rebuilt
+HEAP_SLACK = 64
+
+# Single-letter codes for the roles of plain text messages
+_ROLE_CODES = {'user': 'u', 'assistant': 'a'}
+_CODE_ROLES = {code: role for role, code in _ROLE_CODES.items()}
+
+
+def _pack_message(message: dict):
+    # A message with a single text block becomes [role code, text]
+    content = message.get('content')
+    role = _ROLE_CODES.get(message.get('role'))
+    if role and isinstance(content, list) and len(content) == 1 and list(content[0]) == ['text']:
+        return [role, content[0]['text']]
+    return message
+
+
+def _unpack_message(packed) -> dict:
+    if isinstance(packed, list):
+        return {"role": _CODE_ROLES[packed[0]], "content": [{"text": packed[1]}]}
+    return packed
+
+
+def encode_record(record: dict) -> bytes:
+    """Serialize a session record compactly.
+
+    Plain text messages are stored as ``[role, text]`` pairs and large
+    records are compressed.
+
+    Args:
+        record: Session record
+
+    Returns:
+        Serialized record
+    """
+    doc = {
+        'i': record['session_id'],
+        'c': record['created_at'],
+        'a': record['last_activity'],
+        'm': [_pack_message(m) for m in record['messages']],
+        'x': record['context'],
+        's': record['stats'],
+    }
+    raw = json.dumps(doc, separators=(',', ':'), ensure_ascii=False, default=str).encode()
+    if len(raw) >= COMPRESS_THRESHOLD:
+        return b'Z' + zlib.compress(raw)
+    return b'J' + raw
+
+
+def decode_record(data: bytes) -> dict:
+    """Deserialize a record written by :func:`encode_record`.
+
+    Args:
+        data: Serialized record
+
+    Returns:
+        Session record
+    """
+    raw = zlib.decompress(data[1:]) if data[:1] == b'Z' else data[1:]
+    doc = json.loads(raw)
+    return {
+        'session_id': doc['i'],
+        'created_at': doc['c'],
+        'last_activity': doc['a'],
+        'messages': [_unpack_message(m) for m in doc['m']],
+        'context': doc['x'],
+        'stats': doc['s'],
+    }
+
+
+class SessionStore(ABC):
+    """Storage for session records with expiry after a period of inactivity."""
+
+    def __init__(self, ttl_seconds: float):
+        """Initialize the store.
+
+        Args:
+            ttl_seconds: Seconds without a save or touch before a session expires
+        """
+        self.ttl_seconds = ttl_seconds
+
+    @abstractmethod
+    def load(self, session_id: str) -> Optional[dict]:
+        """Get a session record.
+
+        The caller owns the returned record; changing it does not change
+        the store until it is saved.
+
+        Args:
+            session_id: The session ID
+
+        Returns:
+            Session record, or None if the session doesn't exist or expired
+        """
+
+    @abstractmethod
+    def save(self, record: dict):
+        """Store a session record and restart its expiry.
+
+        Args:
+            record: Session record
+        """
+
+    @abstractmethod
+    def update(self, session_id: str, change: Callable[[dict], None]) -> Optional[dict]:
+        """Change a session record in place and store it, atomically.
+
+        No other update or save of the session, from this process or any
+        other sharing the store, can land between the read and the write.
+
+        Args:
+            session_id: The session ID
+            change: Modifies the current record
+
+        Returns:
+            The stored record, or None if the session doesn't exist or expired
+        """
+
+    @abstractmethod
+    def touch(self, session_id: str, last_activity: float) -> bool:
+        """Record activity on a session and restart its expiry.
+
+        Args:
+            session_id: The session ID
+            last_activity: Time of the activity (epoch seconds)
+
+        Returns:
+            False if the session doesn't exist or expired
+        """
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        """Remove a session.
+
+        Args:
+            session_id: The session ID
+        """
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of live sessions."""
+
+    @abstractmethod
+    def all_stats(self) -> List[dict]:
+        """The ``stats`` of every live session."""
+
+    def close(self):
+        """Release resources held by the store."""
+
+
+class _Shard:
+    """One stripe of an :class:`InMemorySessionStore`."""
+
+    __slots__ = ('lock', 'entries', 'heap')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # session_id -> [expires_at, stored record]
+        self.entries: Dict[str, list] = {}
+        # (expires_at, session_id), possibly stale after a touch or save
+        self.heap: List[Tuple[float, str]] = []
+
+
+class InMemorySessionStore(SessionStore):
+    """Sessions in memory, local to this process.
+
+    Sessions are spread over ``shards`` independently locked maps, so
+    requests for different sessions rarely wait on each other. Each shard
+    keeps a min-heap of expiry times on the monotonic clock; expired
+    sessions are popped off it on the next access to the shard, at a cost
+    proportional to the number that expired.
+
+    Sessions are held as slotted :class:`SessionRecord` objects and loaded
+    histories are read-only views over them, see :mod:`session_records`.
+    """
+
+    def __init__(self, ttl_seconds: float, clock: Callable[[], float] = time.monotonic,
+                 shards: int = DEFAULT_SHARDS):
+        """Initialize the store.
+
+        Args:
+            ttl_seconds: Seconds without activity before a session expires
+            clock: Monotonic time source for expiry
+            shards: Number of lock stripes
+        """
+        super().__init__(ttl_seconds)
+        self.clock = clock
+        self._shards = [_Shard() for _ in range(shards)]
+
+    def _shard(self, session_id: str) -> _Shard:
+        return self._shards[hash(session_id) % len(self._shards)]
+
+    def _pack(self, record: dict):
+        return SessionRecord.from_dict(record)
+
+    def _unpack(self, stored) -> dict:
+        return stored.to_dict()
+
+    def load(self, session_id: str) -> Optional[dict]:
+        shard = self._shard(session_id)
+        now = self.clock()
+        with shard.lock:
+            self._expire(shard, now)
+            entry = shard.entries.get(session_id)
+            if entry is None:
+                return None
+            stored = entry[1]
+        return self._unpack(stored)
+
+    def save(self, record: dict):
+        session_id = record['session_id']
+        stored = self._pack(record)
+        shard = self._shard(session_id)
+        now = self.clock()
+        expires_at = now + self.ttl_seconds
+        with shard.lock:
+            self._expire(shard, now)
+            shard.entries[session_id] = [expires_at, stored]
+            self._schedule(shard, expires_at, session_id)
+
+    def update(self, session_id: str, change: Callable[[dict], None]) -> Optional[dict]:
+        shard = self._shard(session_id)
+        now = self.clock()
+        expires_at = now + self.ttl_seconds
+        with shard.lock:
+            self._expire(shard, now)
+            entry = shard.entries.get(session_id)
+            if entry is None:
+                return None
+            record = self._unpack(entry[1])
+            change(record)
+            shard.entries[session_id] = [expires_at, self._pack(record)]
+            self._schedule(shard, expires_at, session_id)
+        return record
+
+    def touch(self, session_id: str, last_activity: float) -> bool:
+        shard = self._shard(session_id)
+        now = self.clock()
+        expires_at = now + self.ttl_seconds
+        with shard.lock:
+            self._expire(shard, now)
+            entry = shard.entries.get(session_id)
+            if entry is None:
+                return False
+            entry[0] = expires_at
+            entry[1] = self._with_activity(entry[1], last_activity)
+            self._schedule(shard, expires_at, session_id)
+            return True
+
+    def _with_activity(self, stored, last_activity: float):
+        stored.last_activity = last_activity
+        return stored
+
+    def delete(self, session_id: str):
+        shard = self._shard(session_id)
+        with shard.lock:
+            # Its heap entries go stale and are skipped when they come up
+            shard.entries.pop(session_id, None)
+
+    def count(self) -> int:
+        now = self.clock()
+        total = 0
+        for shard in self._shards:
+            with shard.lock:
+                self._expire(shard, now)
+                total += len(shard.entries)
+        return total
+
+    def all_stats(self) -> List[dict]:
+        now = self.clock()
+        stored = []
+        for shard in self._shards:
+            with shard.lock:
+                self._expire(shard, now)
+                stored.extend(entry[1] for entry in shard.entries.values())
+        return [self._unpack(entry)['stats'] for entry in stored]
+
+    @staticmethod
+    def _schedule(shard: _Shard, expires_at: float, session_id: str):
+        # Called with the shard lock held
+        heapq.heappush(shard.heap, (expires_at, session_id))
+        if len(shard.heap) > 2 * len(shard.entries) + HEAP_SLACK:
+            # Drop the stale entries left behind by touches and deletes
+            shard.heap = [(entry[0], sid) for sid, entry in shard.entries.items()]
+            heapq.heapify(shard.heap)
+
+    @staticmethod
+    def _expire(shard: _Shard, now: float):
+        # Called with the shard lock held
+        heap = shard.heap
+        expired = 0
+        while heap and heap[0][0] <= now:
+            expires_at, session_id = heapq.heappop(heap)
+            entry = shard.entries.get(session_id)
+            if entry is not None and entry[0] == expires_at:
+                del shard.entries[session_id]
+                expired += 1
+        if expired:
+            logger.info(f"Expired {expired} sessions")
+
+
+class FakeSessionStore(InMemorySessionStore):
+    """In-process stand-in for an external store, for tests.
+
+    Records are serialized with :func:`encode_record` on every save, as an
+    external store would, so state that would not survive a round trip shows
+    up in tests. Drive expiry with ``advance``.
+    """
+
+    def __init__(self, ttl_seconds: float = 1800):
+        self.now = 0.0
+        super().__init__(ttl_seconds, clock=lambda: self.now)
+        self.saves = 0
+
+    def advance(self, seconds: float):
+        """Move the store's clock forward."""
+        self.now += seconds
+
+    def _pack(self, record: dict) -> bytes:
+        self.saves += 1
+        return encode_record(record)
+
+    def _unpack(self, stored: bytes) -> dict:
+        return decode_record(stored)
+
+    def _with_activity(self, stored: bytes, last_activity: float) -> bytes:
+        record = decode_record(stored)
+        record['last_activity'] = last_activity
+        return encode_record(record)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions in a SQLite database file shared by every process that opens it.
+
+    Each row carries its expiry time; reads ignore expired rows, and writes
+    delete them at most once per ``purge_interval`` seconds. The process
+    holds one connection, used by one thread at a time; :meth:`update` runs
+    in a ``BEGIN IMMEDIATE`` transaction, which also keeps other processes
+    out between its read and write.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, clock: Callable[[], float] = time.time,
+                 purge_interval: float = PURGE_INTERVAL):
+        """Initialize the store, creating the table if needed.
+
+        Args:
+            path: Database file
+            ttl_seconds: Seconds without activity before a session expires
+            clock: Wall-clock time source (shared across processes)
+            purge_interval: Minimum seconds between deletes of expired rows
+        """
+        super().__init__(ttl_seconds)
+        self.path = path
+        self.clock = clock
+        self.purge_interval = purge_interval
+        self._next_purge = 0.0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY,"
+            " data BLOB NOT NULL,"
+            " stats TEXT NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)")
+        logger.info(f"Using SQLite session store at {path}")
+
+    def _execute(self, sql: str, params: tuple = ()) -> int:
+        """Run a statement and return the number of rows it changed."""
+        with self._lock:
+            return self._db.execute(sql, params).rowcount
+
+    def _fetchone(self, sql: str, params: tuple = ()) -> Optional[tuple]:
+        with self._lock:
+            return self._db.execute(sql, params).fetchone()
+
+    def load(self, session_id: str) -> Optional[dict]:
+        row = self._fetchone(
+            "SELECT data FROM sessions WHERE session_id = ? AND expires_at > ?",
+            (session_id, self.clock())
+        )
+        return decode_record(row[0]) if row else None
+
+    def save(self, record: dict):
+        with self._lock:
+            self._write(record, self.clock())
+
+    def update(self, session_id: str, change: Callable[[dict], None]) -> Optional[dict]:
+        with self._lock:
+            # Take the database's write lock before reading, so no other process can save in between
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                now = self.clock()
+                row = self._db.execute(
+                    "SELECT data FROM sessions WHERE session_id = ? AND expires_at > ?", (session_id, now)
+                ).fetchone()
+                record = decode_record(row[0]) if row else None
+                if record is not None:
+                    change(record)
+                    self._write(record, now)
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+        return record
+
+    def _write(self, record: dict, now: float):
+        # Called with the lock held
+        self._db.execute(
+            "INSERT OR REPLACE INTO sessions (session_id, data, stats, expires_at) VALUES (?, ?, ?, ?)",
+            (record['session_id'], encode_record(record), json.dumps(record['stats']), now + self.ttl_seconds)
+        )
+        if now >= self._next_purge:
+            self._next_purge = now + self.purge_interval
+            deleted = self._db.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,)).rowcount
+            if deleted:
+                logger.info(f"Expired {deleted} sessions")
+
+    def touch(self, session_id: str, last_activity: float) -> bool:
+        # last_activity lives in the serialized record; only the expiry is rewritten here
+        now = self.clock()
+        return self._execute(
+            "UPDATE sessions SET expires_at = ? WHERE session_id = ? AND expires_at > ?",
+            (now + self.ttl_seconds, session_id, now)
+        ) > 0
+
+    def delete(self, session_id: str):
+        self._execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def count(self) -> int:
+        return self._fetchone("SELECT COUNT(*) FROM sessions WHERE expires_at > ?", (self.clock(),))[0]
+
+    def all_stats(self) -> List[dict]:
+        with self._lock:
+            rows = self._db.execute("SELECT stats FROM sessions WHERE expires_at > ?", (self.clock(),)).fetchall()
+        return [json.loads(stats) for (stats,) in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def create_session_store(config) -> SessionStore:
+    """Build the session store selected by the configuration.
+
+    Args:
+        config: Config instance
+
+    Returns:
+        Session store
+    """
+    ttl_seconds = config.session_timeout_minutes * 60
+    if config.session_store == 'sqlite':
+        return SQLiteSessionStore(config.session_db_path, ttl_seconds)
+    return InMemorySessionStore(ttl_seconds)
@@ -0,0 +1,192 @@
+"""Stand-in for the e-commerce backend, for load tests and offline development.
+
+Implements the endpoints the tools use (``/api/products``,
+``/api/products/{id}`` and ``/api/cart``) over a generated catalog, with an
+optional delay on every response. Run it in place of the real backend:
+
+    python stub_backend.py --products 500 --latency 0.05 --port 5000
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import random
+from typing import Dict, List, Optional
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+logger = logging.getLogger(__name__)
+
+# Categories and sample names, matching the ones in the agent's system prompt
+PRODUCT_TEMPLATES = {
+    "Electronics": [("Wireless Mouse", "🖱️"), ("Mechanical Keyboard", "⌨️"), ("USB-C Hub", "🔌"), ("Noise-Cancelling Headphones", "🎧")],
+    "Home": [("Desk Lamp", "💡"), ("Ceramic Mug", "☕"), ("Throw Blanket", "🛋️"), ("Wall Clock", "🕰️")],
+    "Furniture": [("Office Chair", "🪑"), ("Standing Desk", "🗄️"), ("Bookshelf", "📚"), ("Side Table", "🪵")],
+    "Accessories": [("Laptop Sleeve", "💼"), ("Leather Wallet", "👛"), ("Sunglasses", "🕶️"), ("Water Bottle", "🧴")],
+    "Sports": [("Yoga Mat", "🧘"), ("Running Shoes", "👟"), ("Dumbbell Set", "🏋️"), ("Tennis Racket", "🎾")],
+    "Books": [("Python Cookbook", "📘"), ("Mystery Novel", "📕"), ("Travel Guide", "🗺️"), ("Cooking Basics", "📗")],
+}
+
+ADJECTIVES = ["Classic", "Compact", "Deluxe", "Eco", "Pro", "Smart", "Travel", "Ultra"]
+
+
+def make_catalog(size: int = 100, seed: int = 0) -> List[dict]:
+    """Generate a product catalog.
+
+    Args:
+        size: Number of products
+        seed: Random seed, so the same arguments give the same catalog
+
+    Returns:
+        List of products in the backend's JSON format
+    """
+    rng = random.Random(seed)
+    categories = list(PRODUCT_TEMPLATES)
+    products = []
+    for product_id in range(1, size + 1):
+        category = categories[(product_id - 1) % len(categories)]
+        name, emoji = rng.choice(PRODUCT_TEMPLATES[category])
+        adjective = rng.choice(ADJECTIVES)
+        products.append({
+            "id": product_id,
+            "name": f"{adjective} {name}",
+            "category": category,
+            "price": round(rng.uniform(5, 500), 2),
+            "emoji": emoji,
+            "description": f"{adjective.lower()} {name.lower()} for everyday use in the {category.lower()} range",
+        })
+    return products
+
+
+class StubBackend:
+    """State and request handlers of the stand-in backend.
+
+    The cart is shared by every caller, as in the real backend.
+    """
+
+    def __init__(self, products: int = 100, latency: float = 0.0, jitter: float = 0.0, seed: int = 0):
+        """Initialize the backend.
+
+        Args:
+            products: Catalog size
+            latency: Seconds to wait before every response
+            jitter: Extra random delay of up to this many seconds
+            seed: Random seed for the catalog
+        """
+        self.products = make_catalog(products, seed)
+        self.by_id: Dict[int, dict] = {p['id']: p for p in self.products}
+        self.latency = latency
+        self.jitter = jitter
+        self.cart: Dict[int, int] = {}
+        self.requests = 0
+        body = json.dumps(self.products).encode()
+        self._products_body = body
+        self._etag = f'"{hashlib.sha1(body).hexdigest()}"'
+
+    async def _delay(self):
+        self.requests += 1
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def _product_id(self, value) -> Optional[int]:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    async def health(self, request: Request) -> JSONResponse:
+        return JSONResponse({"status": "healthy", "service": "stub-backend", "products": len(self.products)})
+
+    async def list_products(self, request: Request) -> Response:
+        await self._delay()
+        if request.headers.get('if-none-match') == self._etag:
+            return Response(status_code=304, headers={"ETag": self._etag})
+        return Response(self._products_body, media_type="application/json", headers={"ETag": self._etag})
+
+    async def get_product(self, request: Request) -> JSONResponse:
+        await self._delay()
+        product = self.by_id.get(self._product_id(request.path_params['product_id']))
+        if product is None:
+            return JSONResponse({"error": "Product not found"}, status_code=404)
+        return JSONResponse(product)
+
+    async def view_cart(self, request: Request) -> JSONResponse:
+        await self._delay()
+        return JSONResponse([
+            {"productId": product_id, "quantity": quantity, "product": self.by_id[product_id]}
+            for product_id, quantity in self.cart.items()
+        ])
+
+    async def add_to_cart(self, request: Request) -> JSONResponse:
+        await self._delay()
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            return JSONResponse({"error": "Request body must be a JSON object"}, status_code=400)
+        product_id = self._product_id(data.get('productId'))
+        quantity = self._product_id(data.get('quantity', 1))
+        if product_id not in self.by_id:
+            return JSONResponse({"error": "Product not found"}, status_code=404)
+        if quantity is None or quantity < 1:
+            return JSONResponse({"error": "Quantity must be at least 1"}, status_code=400)
+        self.cart[product_id] = self.cart.get(product_id, 0) + quantity
+        return JSONResponse({"productId": product_id, "quantity": self.cart[product_id]}, status_code=201)
+
+    async def remove_from_cart(self, request: Request) -> JSONResponse:
+        await self._delay()
+        product_id = self._product_id(request.path_params['product_id'])
+        if self.cart.pop(product_id, None) is None:
+            return JSONResponse({"error": "Product not in cart"}, status_code=404)
+        return JSONResponse({"removed": product_id})
+
+
+def create_stub_backend(products: int = 100, latency: float = 0.0, jitter: float = 0.0,
+                        seed: int = 0) -> Starlette:
+    """Create the stand-in backend app.
+
+    Args:
+        products: Catalog size
+        latency: Seconds to wait before every response
+        jitter: Extra random delay of up to this many seconds
+        seed: Random seed for the catalog
+
+    Returns:
+        Starlette app; its StubBackend is ``app.state.backend``
+    """
+    backend = StubBackend(products, latency, jitter, seed)
+    app = Starlette(routes=[
+        Route('/api/health', backend.health, methods=['GET']),
+        Route('/api/products', backend.list_products, methods=['GET']),
+        Route('/api/products/{product_id}', backend.get_product, methods=['GET']),
+        Route('/api/cart', backend.view_cart, methods=['GET']),
+        Route('/api/cart', backend.add_to_cart, methods=['POST']),
+        Route('/api/cart/{product_id}', backend.remove_from_cart, methods=['DELETE']),
+    ])
+    app.state.backend = backend
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in e-commerce backend")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--products', type=int, default=100, help="catalog size")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="extra random delay of up to this many seconds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    logger.info(f"Stub backend with {args.products} products and {args.latency * 1000:.0f}ms latency")
+    uvicorn.run(create_stub_backend(args.products, args.latency, args.jitter),
+                host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""Tests for admission control: agent slots, the wait queue and per-session rate limits."""
+import asyncio
+import threading
+import time
+import pytest
+from starlette.testclient import TestClient
+import admission
+from admission import (
+    QUEUE_FULL, QUEUE_TIMEOUT, RATE_LIMITED, AdmissionController, AdmissionRejected, SessionRateLimiter
+)
+from asgi import create_asgi_app
+from chatbot_service import ChatbotService
+from server import create_app
+from session_manager import SessionManager
+
+
+def echo_factory(messages):
+    return lambda prompt: f"echo: {prompt}"
+
+
+def make_service(**limits):
+    return ChatbotService(echo_factory, SessionManager(), admission=AdmissionController(**limits))
+
+
+def test_rate_limiter_allows_bursts_then_refills(monkeypatch, clock):
+    monkeypatch.setattr(admission.time, 'monotonic', clock)
+    limiter = SessionRateLimiter(per_minute=6, burst=2)
+
+    assert limiter.acquire("a") == 0 and limiter.acquire("a") == 0
+    assert limiter.acquire("a") == pytest.approx(10)
+    assert limiter.acquire("b") == 0
+
+    clock.advance(10)
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") > 0
+
+
+def test_queue_is_bounded_and_waits_time_out():
+    controller = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=0.2)
+    waiting = threading.Event()
+    outcome = []
+
+    def queued_turn():
+        waiting.set()
+        try:
+            with controller.slot():
+                outcome.append("ran")
+        except AdmissionRejected as e:
+            outcome.append(e.reason)
+
+    with controller.slot():
+        worker = threading.Thread(target=queued_turn)
+        worker.start()
+        waiting.wait()
+        while controller.stats()["queued"] == 0:
+            time.sleep(0.01)
+        with pytest.raises(AdmissionRejected) as rejected:
+            with controller.slot():
+                pass
+        worker.join()
+
+    assert rejected.value.reason == QUEUE_FULL and rejected.value.status == 503
+    assert outcome == [QUEUE_TIMEOUT]
+    stats = controller.stats()
+    assert (stats["active"], stats["queued"]) == (0, 0)
+    assert stats["rejections"] == {RATE_LIMITED: 0, QUEUE_FULL: 1, QUEUE_TIMEOUT: 1}
+
+
+def test_async_slots_queue_until_free():
+    controller = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=1)
+
+    async def turn(results, hold):
+        try:
+            async with controller.slot_async():
+                results.append(controller.stats()["active"])
+                await asyncio.sleep(hold)
+        except AdmissionRejected as e:
+            results.append(e.reason)
+
+    async def main():
+        results = []
+        await asyncio.gather(turn(results, 0.05), turn(results, 0), turn(results, 0))
+        return results
+
+    assert asyncio.run(main()) == [1, QUEUE_FULL, 1]
+    assert controller.stats()["queued"] == 0
+
+
+def test_rate_limited_session_gets_429():
+    service = make_service(session_rate=60, session_burst=1)
+    with TestClient(create_asgi_app(service)) as client:
+        first = client.post("/api/chat", json={"message": "hi"})
+        session_id = first.json()["sessionId"]
+        second = client.post("/api/chat", json={"message": "again", "sessionId": session_id})
+        other = client.post("/api/chat", json={"message": "hi"})
+        stream = client.post("/api/chat/stream", json={"message": "again", "sessionId": session_id})
+
+    assert first.status_code == 200 and other.status_code == 200
+    assert second.status_code == 429 and stream.status_code == 429
+    assert second.json()["error"]["code"] == "RATE_LIMITED"
+    assert 1 <= int(second.headers["Retry-After"]) <= 2
+
+
+def test_saturated_service_answers_503():
+    service = make_service(max_concurrency=1, max_queue=0, queue_timeout=1)
+    client = create_app(service).test_client()
+    with service.admission.slot():
+        busy = client.post("/api/chat", json={"message": "hi"})
+        stream = client.post("/api/chat/stream", json={"message": "hi"})
+        metrics = client.get("/api/metrics").get_data(as_text=True)
+
+    assert busy.status_code == 503 and stream.status_code == 503
+    assert busy.get_json()["error"]["code"] == "SERVER_BUSY"
+    assert busy.headers["Retry-After"] == "1"
+    assert 'chatbot_admission_rejections_total{reason="queue_full"} 2' in metrics
+    assert 'chatbot_agents_active 1' in metrics
+    assert client.post("/api/chat", json={"message": "hi"}).status_code == 200
+
+
+def test_stream_that_times_out_in_queue_ends_with_error_event():
+    service = make_service(max_concurrency=1, max_queue=1, queue_timeout=0.05)
+    with service.admission.slot():
+        _, events = service.stream_message("hi")
+        events = list(events)
+
+    assert events[-1] == {
+        "type": "error",
+        "message": "The assistant is busy right now. Please try again in a few seconds.",
+        "code": "SERVER_BUSY",
+        "retryAfter": 1
+    }
+    assert service.get_metrics()["admission"]["rejections"][QUEUE_TIMEOUT] == 1
@@ -0,0 +1,156 @@
+"""Tests for the ASGI server and the async chat entry points."""
+import asyncio
+import threading
+import time
+import pytest
+from starlette.testclient import TestClient
+import asgi
+from asgi import create_asgi_app
+from test_streaming import cart_responder, make_service, parse_sse
+
+
+@pytest.fixture
+def client_for(monkeypatch, make_service):
+    monkeypatch.setattr(asgi, "close_backend_client", lambda: None)
+    clients = []
+
+    def build(responder, **model_kwargs):
+        service, session_manager = make_service(responder, **model_kwargs)
+        client = TestClient(create_asgi_app(service))
+        client.__enter__()
+        clients.append(client)
+        return client, session_manager
+
+    yield build
+    for client in clients:
+        client.__exit__(None, None, None)
+
+
+def test_chat_runs_agent_and_tools(client_for):
+    client, session_manager = client_for(cart_responder)
+
+    response = client.post('/api/chat', json={"message": "what's in my cart?"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["reply"] == "Your cart is empty right now."
+
+    second = client.post('/api/chat', json={"message": "thanks", "sessionId": body["sessionId"]}).json()
+    assert second["sessionId"] == body["sessionId"]
+    assert len(session_manager.get_session_messages(body["sessionId"])) == 4
+
+
+def test_stream_matches_flask_events(client_for):
+    client, session_manager = client_for(cart_responder)
+
+    response = client.post('/api/chat/stream', json={"message": "what's in my cart?"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+
+    events = parse_sse(response.text)
+    names = [name for name, _ in events]
+    assert names[0] == "session"
+    assert names[-1] == "done"
+    assert names.index("tool_call") < names.index("tool_result") < names.index("token")
+    assert events[-1][1]["reply"] == "Your cart is empty right now."
+    assert len(session_manager.get_session_messages(events[0][1]["sessionId"])) == 2
+
+
+@pytest.mark.parametrize("kwargs, status, code", [
+    ({"json": {"message": ""}}, 400, "INVALID_MESSAGE"),
+    ({"json": {"text": "hi"}}, 400, "MISSING_FIELD"),
+    ({"content": "hi", "headers": {"content-type": "text/plain"}}, 400, "INVALID_FORMAT"),
+])
+def test_invalid_requests_use_standard_errors(client_for, kwargs, status, code):
+    client, _ = client_for(lambda messages: "unused")
+    for path in ('/api/chat', '/api/chat/stream'):
+        response = client.post(path, **kwargs)
+        assert response.status_code == status
+        assert response.json()["error"]["code"] == code
+
+
+def test_wrong_method_and_cors(client_for):
+    client, _ = client_for(lambda messages: "unused")
+    assert client.get('/api/chat').json()["error"]["code"] == "METHOD_NOT_ALLOWED"
+
+    preflight = client.options('/api/chat', headers={
+        "Origin": "http://localhost:3000",
+        "Access-Control-Request-Method": "POST",
+    })
+    assert preflight.headers["access-control-allow-origin"] == "http://localhost:3000"
+
+
+def test_shutdown_closes_session_store(monkeypatch, make_service):
+    closed = []
+    monkeypatch.setattr(asgi, "close_backend_client", lambda: closed.append("backend"))
+    service, session_manager = make_service(lambda messages: "hi")
+    monkeypatch.setattr(session_manager.store, "close", lambda: closed.append("sessions"))
+
+    with TestClient(create_asgi_app(service)) as client:
+        assert client.get('/api/health').json()["status"] == "healthy"
+        assert closed == []
+
+    assert closed == ["sessions", "backend"]
+
+
+def test_async_turns_share_one_event_loop(make_service):
+    service, session_manager = make_service(lambda messages: f"{len(messages)} earlier", latency=0.05)
+    session_id, _ = session_manager.get_or_create_session()
+
+    async def run():
+        same_session = [service.process_message_async(f"message {i}", session_id) for i in range(3)]
+        other = [service.process_message_async("hello") for _ in range(3)]
+        start = time.perf_counter()
+        results = await asyncio.gather(*same_session, *other)
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(run())
+
+    # Other sessions overlap with each other; turns for one session still take turns
+    assert elapsed < 6 * 0.05
+    assert sorted(reply for reply, sid in results if sid == session_id) == ["1 earlier", "3 earlier", "5 earlier"]
+    assert len(session_manager.get_session_messages(session_id)) == 6
+    assert len(service._async_session_locks) == 0
+
+
+def test_closing_async_stream_cancels_turn(make_service):
+    service, session_manager = make_service(lambda messages: "word " * 200, token_delay=0.01)
+
+    async def run():
+        session_id, events = await service.stream_message_async("tell me a story")
+        first = await events.__anext__()
+        await events.aclose()
+        return session_id, first
+
+    session_id, first = asyncio.run(run())
+
+    assert first["type"] == "token"
+    assert session_manager.get_session_messages(session_id) == []
+    assert len(service._async_session_locks) == 0
+
+
+def test_async_turns_keep_session_store_calls_off_the_loop(monkeypatch, make_service):
+    service, session_manager = make_service(lambda messages: "hi")
+    threads = []
+
+    def recording(method):
+        def call(*args, **kwargs):
+            threads.append((method.__name__, threading.current_thread()))
+            return method(*args, **kwargs)
+        return call
+
+    for name in ("get_or_create_session", "get_session_messages", "append_messages"):
+        monkeypatch.setattr(session_manager, name, recording(getattr(session_manager, name)))
+
+    async def run():
+        loop_thread = threading.current_thread()
+        _, session_id = await service.process_message_async("hello")
+        _, events = await service.stream_message_async("again", session_id)
+        async for _ in events:
+            pass
+        return loop_thread
+
+    loop_thread = asyncio.run(run())
+
+    assert {name for name, _ in threads} == {"get_or_create_session", "get_session_messages", "append_messages"}
+    assert all(thread is not loop_thread for _, thread in threads)
@@ -0,0 +1,111 @@
+"""Tests for the shared backend client and the tools that use it."""
+import asyncio
+import time
+import httpx
+import pytest
+from tools import backend_client, list_products, view_cart, add_to_cart
+from tools.backend_client import BackendClient
+
+PRODUCTS = [
+    {"id": 1, "name": "Wireless Mouse", "category": "Electronics", "price": 25.0, "emoji": "🖱️", "description": "Ergonomic mouse"},
+    {"id": 2, "name": "Desk Lamp", "category": "Home", "price": 40.0, "emoji": "💡", "description": "LED lamp"},
+]
+
+
+def make_client(handler, **kwargs):
+    kwargs.setdefault('retries', 2)
+    return BackendClient('http://backend.test', transport=httpx.MockTransport(handler), **kwargs)
+
+
+@pytest.fixture
+def use_client(mock_backend, monkeypatch):
+    """Install a client backed by a mock transport as the shared client."""
+    monkeypatch.setattr(backend_client, 'RETRY_BACKOFF', 0)
+
+    def install(handler, **kwargs):
+        kwargs.setdefault('retries', 2)
+        return mock_backend(handler, **kwargs)
+
+    return install
+
+
+def test_concurrent_requests_overlap(use_client):
+    async def handler(request):
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json=[])
+
+    use_client(handler)
+
+    async def run():
+        return await asyncio.gather(*(view_cart() for _ in range(5)))
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+
+    assert all("empty" in r for r in results)
+    assert elapsed < 0.6
+
+
+def test_client_survives_across_event_loops(use_client):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(200, json=[])
+
+    use_client(handler)
+    # Strands runs each agent invocation on a new event loop
+    for _ in range(3):
+        assert asyncio.run(view_cart()) == "🛒 Your shopping cart is empty."
+    assert calls == ["/api/cart"] * 3
+
+
+def test_get_retries_on_gateway_errors(use_client):
+    statuses = [503, 502, 200]
+
+    def handler(request):
+        return httpx.Response(statuses.pop(0), json=PRODUCTS)
+
+    use_client(handler)
+    assert "Found 2 products" in asyncio.run(list_products())
+    assert statuses == []
+
+
+def test_post_is_not_retried(use_client):
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        if request.method == 'GET':
+            return httpx.Response(200, json=PRODUCTS[0])
+        return httpx.Response(503)
+
+    use_client(handler)
+    result = asyncio.run(add_to_cart(product_id=1))
+
+    assert "error occurred" in result
+    assert calls == ['GET', 'POST']
+
+
+def test_connection_error_message(use_client):
+    def handler(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    use_client(handler)
+    assert "Unable to connect to the product catalog" in asyncio.run(list_products()).text
+
+
+def test_timeout_message(use_client):
+    def handler(request):
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    use_client(handler)
+    assert "taking too long" in asyncio.run(view_cart()).text
+
+
+def test_closed_client_rejects_requests():
+    client = make_client(lambda request: httpx.Response(200))
+    client.close()
+    with pytest.raises(RuntimeError):
+        asyncio.run(client.get("/api/products"))
@@ -0,0 +1,198 @@
+"""Tests for the product catalog cache."""
+import asyncio
+import random
+import threading
+import httpx
+import pytest
+from tools.backend_client import BackendClient
+from tools.catalog import CatalogSnapshot, ProductCatalog
+
+CATEGORIES = ["Electronics", "Home", "Furniture", "Accessories", "Sports", "Books"]
+
+
+def make_products(count, seed=1):
+    rng = random.Random(seed)
+    return [
+        {"id": i, "name": f"Product {i}", "category": rng.choice(CATEGORIES),
+         "price": round(rng.uniform(5, 500), 2), "emoji": "", "description": ""}
+        for i in range(1, count + 1)
+    ]
+
+
+class Backend:
+    """Mock /api/products endpoint that counts requests and supports ETag."""
+
+    def __init__(self, products, etag=None):
+        self.products = products
+        self.etag = etag
+        self.requests = []
+        self.fail = False
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, request):
+        self.requests.append(request)
+        self.release.wait(5)
+        if self.fail:
+            raise httpx.ConnectError("connection refused", request=request)
+        if self.etag and request.headers.get('If-None-Match') == self.etag:
+            return httpx.Response(304)
+        headers = {'ETag': self.etag} if self.etag else {}
+        return httpx.Response(200, json=self.products, headers=headers)
+
+
+@pytest.fixture
+def backend():
+    return Backend(make_products(50), etag='"v1"')
+
+
+@pytest.fixture
+def catalog(backend, clock):
+    client = BackendClient('http://backend.test', transport=httpx.MockTransport(backend), retries=0)
+    catalog = ProductCatalog(client_factory=lambda: client, ttl=60, max_stale=600, clock=clock)
+    yield catalog
+    client.close()
+
+
+def wait_for_refresh(catalog):
+    future = catalog._refreshing
+    if future is not None:
+        future.result(timeout=5)
+
+
+def test_filter_matches_linear_scan():
+    products = make_products(500)
+    snapshot = CatalogSnapshot(products, version=1)
+
+    for category in [None, "electronics", "BOOKS", "Toys"]:
+        for max_price in [None, 0, 50, 123.45, 1000]:
+            expected = [
+                p for p in products
+                if (not category or p['category'].lower() == category.lower())
+                and (max_price is None or p['price'] <= max_price)
+            ]
+            assert snapshot.filter(category, max_price) == expected
+
+
+def test_lookup_by_id_accepts_string_ids():
+    snapshot = CatalogSnapshot(make_products(5), version=1)
+    assert snapshot.get(3)['name'] == "Product 3"
+    assert snapshot.get("3")['name'] == "Product 3"
+    assert snapshot.get(99) is None
+
+
+def test_fresh_catalog_served_from_memory(catalog, backend):
+    first = asyncio.run(catalog.get_snapshot())
+    for _ in range(10):
+        assert asyncio.run(catalog.get_snapshot()) is first
+    assert len(backend.requests) == 1
+    assert first.version == 1
+
+
+def test_stale_catalog_served_while_revalidating(catalog, backend):
+    first = asyncio.run(catalog.get_snapshot())
+    backend.products = make_products(60, seed=2)
+    backend.etag = '"v2"'
+    backend.release.clear()
+    catalog.clock.advance(61)
+
+    # The stale snapshot is returned immediately; only one refresh is started
+    assert asyncio.run(catalog.get_snapshot()) is first
+    assert asyncio.run(catalog.get_snapshot()) is first
+    backend.release.set()
+    wait_for_refresh(catalog)
+
+    updated = asyncio.run(catalog.get_snapshot())
+    assert len(updated) == 60
+    assert updated.version == 2
+    assert len(backend.requests) == 2
+
+
+def test_not_modified_keeps_version(catalog, backend):
+    first = asyncio.run(catalog.get_snapshot())
+    catalog.clock.advance(601)
+
+    again = asyncio.run(catalog.get_snapshot())
+
+    assert backend.requests[-1].headers['If-None-Match'] == '"v1"'
+    assert again.version == first.version
+    assert catalog.clock.now - again.fetched_at == 0
+
+
+def test_versions_are_not_reused_after_invalidate(catalog, backend):
+    first = asyncio.run(catalog.get_snapshot())
+    catalog.invalidate()
+    assert catalog.version == 0
+
+    backend.products = make_products(60, seed=2)
+    backend.etag = '"v2"'
+    again = asyncio.run(catalog.get_snapshot())
+    assert again.version > first.version
+
+
+def test_failed_refresh_serves_stale(catalog, backend):
+    first = asyncio.run(catalog.get_snapshot())
+    backend.fail = True
+    catalog.clock.advance(601)
+
+    assert asyncio.run(catalog.get_snapshot()) is first
+
+
+def test_failed_first_fetch_raises(catalog, backend):
+    backend.fail = True
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(catalog.get_snapshot())
+
+
+class CartBackend(Backend):
+    """Adds /api/products/{id} and /api/cart to the mock backend."""
+
+    def __call__(self, request):
+        path = request.url.path
+        if path == "/api/products":
+            return super().__call__(request)
+        self.requests.append(request)
+        if path.startswith("/api/products/"):
+            product_id = int(path.rsplit("/", 1)[1])
+            for product in self.products:
+                if product["id"] == product_id:
+                    return httpx.Response(200, json=product)
+            return httpx.Response(404, json={"error": "not found"})
+        return httpx.Response(200, json={})
+
+
+@pytest.fixture
+def cart_backend(monkeypatch):
+    from tools import backend_client, catalog as catalog_module
+    backend = CartBackend(make_products(10))
+    client = BackendClient('http://backend.test', transport=httpx.MockTransport(backend), retries=0)
+    monkeypatch.setattr(backend_client, '_client', client)
+    monkeypatch.setattr(catalog_module, '_catalog', ProductCatalog(client_factory=lambda: client))
+    yield backend
+    client.close()
+
+
+def requests_made(backend):
+    return [(r.method, r.url.path) for r in backend.requests]
+
+
+def test_cart_actions_use_cached_products(cart_backend):
+    from tools import add_to_cart, remove_from_cart, list_products
+    asyncio.run(list_products())
+    cart_backend.requests.clear()
+
+    assert "Product 3" in asyncio.run(add_to_cart(product_id=3, quantity=2))
+    assert "Removed  Product 3" in asyncio.run(remove_from_cart(product_id=3))
+    assert requests_made(cart_backend) == [("POST", "/api/cart"), ("DELETE", "/api/cart/3")]
+
+
+def test_cart_actions_fall_back_on_cache_miss(cart_backend):
+    from tools import add_to_cart, remove_from_cart
+    assert "Product 4" in asyncio.run(add_to_cart(product_id=4))
+    assert "not found" in asyncio.run(add_to_cart(product_id=99))
+    assert "Product 5" in asyncio.run(remove_from_cart(product_id=5))
+    assert requests_made(cart_backend) == [
+        ("GET", "/api/products/4"), ("POST", "/api/cart"),
+        ("GET", "/api/products/99"),
+        ("DELETE", "/api/cart/5"),
+    ]
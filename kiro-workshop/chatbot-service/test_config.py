@@ -0,0 +1,82 @@
+"""Tests for the process-wide configuration."""
+import os
+import signal
+import threading
+import pytest
+import config
+from config import Config, get_config, set_config, reload_config, on_config_reload
+
+
+@pytest.fixture
+def env(monkeypatch):
+    """Provide the required variables and restore the published config afterwards."""
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'test-key')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'test-secret')
+    monkeypatch.setenv('ECOMMERCE_API_URL', 'http://backend.test')
+    monkeypatch.setattr(config, 'load_dotenv', lambda **kwargs: None)
+    monkeypatch.setattr(config, '_current_config', None)
+    monkeypatch.setattr(config, '_reload_callbacks', [])
+    return monkeypatch
+
+
+def test_config_is_read_only(env):
+    cfg = Config()
+    with pytest.raises(AttributeError):
+        cfg.ecommerce_api_url = 'http://elsewhere'
+
+
+def test_get_config_builds_once(env):
+    first = get_config()
+    assert get_config() is first
+
+
+def test_backend_client_uses_published_config(env):
+    from tools import backend_client
+    env.setattr(backend_client, '_client', None)
+    set_config(Config())
+    env.setenv('ECOMMERCE_API_URL', 'http://changed.test')
+    try:
+        # Changing the environment alone has no effect until a reload
+        assert backend_client.get_backend_client().base_url == 'http://backend.test'
+    finally:
+        backend_client.close_backend_client()
+
+
+def test_reload_swaps_config_and_notifies(env):
+    set_config(Config())
+    seen = []
+    on_config_reload(seen.append)
+    env.setenv('ECOMMERCE_API_URL', 'http://changed.test')
+
+    new = reload_config()
+
+    assert get_config() is new
+    assert new.ecommerce_api_url == 'http://changed.test'
+    assert seen == [new]
+
+
+def test_failed_reload_keeps_current(env):
+    current = Config()
+    set_config(current)
+    env.delenv('AWS_ACCESS_KEY_ID')
+
+    assert reload_config() is current
+    assert get_config() is current
+
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGHUP'), reason="SIGHUP not available")
+def test_sighup_triggers_reload(env):
+    set_config(Config())
+    previous = signal.getsignal(signal.SIGHUP)
+    try:
+        assert config.install_reload_handler()
+        env.setenv('ECOMMERCE_API_URL', 'http://changed.test')
+        # Hold the config lock as if the signal arrived inside get_config; the reload must not deadlock
+        with config._config_lock:
+            os.kill(os.getpid(), signal.SIGHUP)
+        for thread in threading.enumerate():
+            if thread.name == 'config-reload':
+                thread.join(timeout=5)
+        assert get_config().ecommerce_api_url == 'http://changed.test'
+    finally:
+        signal.signal(signal.SIGHUP, previous)
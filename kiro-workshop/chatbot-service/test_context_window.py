@@ -0,0 +1,111 @@
+"""Tests for history windowing and summarization."""
+from chatbot_service import ChatbotService
+from context_window import SUMMARY_HEADER, ContextWindow, estimate_tokens, with_summary
+from session_manager import SessionManager
+
+
+def turn(i, size=200):
+    return [
+        {"role": "user", "content": [{"text": f"question {i} " + "q" * size}]},
+        {"role": "assistant", "content": [{"text": f"answer {i} " + "a" * size}]},
+    ]
+
+
+def history(turns, size=200):
+    return [message for i in range(turns) for message in turn(i, size)]
+
+
+def test_short_history_is_untouched():
+    window = ContextWindow(max_tokens=1000)
+    messages = history(2)
+    assert window.apply(messages, None) == (messages, None, 0)
+
+
+def test_oldest_turns_are_summarized_to_fit_budget():
+    window = ContextWindow(max_tokens=300)
+    messages, summary, turns = window.apply(history(6), None)
+
+    assert sum(estimate_tokens(m) for m in messages) <= 300
+    assert messages[0]["role"] == "user"
+    assert messages[-1]["content"][0]["text"].startswith("answer 5")
+    assert turns == 6 - len(messages) // 2
+    assert summary.count("\n") == turns - 1
+    assert summary.startswith("- User: question 0")
+
+
+def test_latest_turn_is_always_kept():
+    window = ContextWindow(max_tokens=10)
+    messages, summary, turns = window.apply(history(2, size=400), None)
+    assert [m["content"][0]["text"][:8] for m in messages] == ["question", "answer 1"]
+    assert turns == 1
+
+
+def test_tool_messages_stay_with_their_turn():
+    tool_turn = [
+        {"role": "user", "content": [{"text": "what's in my cart?"}]},
+        {"role": "assistant", "content": [{"toolUse": {"toolUseId": "t1", "name": "view_cart", "input": {}}}]},
+        {"role": "user", "content": [{"toolResult": {"toolUseId": "t1", "content": [{"text": "empty"}]}}]},
+        {"role": "assistant", "content": [{"text": "Your cart is empty."}]},
+    ]
+    window = ContextWindow(max_tokens=150)
+    messages, summary, _ = window.apply(tool_turn + history(1, size=300), None)
+
+    assert messages == history(1, size=300)
+    assert "what's in my cart?" in summary and "Your cart is empty." in summary
+
+
+def test_summary_stays_within_its_budget():
+    window = ContextWindow(max_tokens=200, summary_max_tokens=100)
+    summary = None
+    for i in range(20):
+        _, summary, _ = window.apply(turn(i) + turn(i + 100), summary)
+
+    assert len(summary) // 4 <= 100
+    # The newest summarized turns survive
+    assert "question 19 " in summary and "question 0 " not in summary
+
+
+def test_session_manager_windows_history_and_reports_metrics():
+    manager = SessionManager(context_window=ContextWindow(max_tokens=300))
+    session_id, _ = manager.get_or_create_session()
+    manager.update_session(session_id, history(8))
+    manager.stop()
+
+    stored = manager.get_session_messages(session_id)
+    summary = manager.get_session_summary(session_id)
+    stats = manager.get_session_stats(session_id)
+    assert len(stored) < 16 and summary
+    assert stats["messages"] == len(stored)
+    assert stats["summarized_turns"] == 8 - len(stored) // 2
+    assert stats["prompt_tokens"] > sum(estimate_tokens(m) for m in stored)
+
+    metrics = manager.get_metrics()
+    assert metrics["sessions"] == 1
+    assert metrics["max_prompt_tokens"] == stats["prompt_tokens"]
+    assert metrics["memory_bytes"] == stats["memory_bytes"] > 0
+
+
+def test_agent_sees_summary_before_recent_turns():
+    seen = []
+
+    def factory(messages):
+        seen.append(messages)
+        return lambda prompt: "ok " + "r" * 400
+
+    manager = SessionManager(context_window=ContextWindow(max_tokens=250))
+    service = ChatbotService(factory, manager)
+    session_id, _ = manager.get_or_create_session()
+    for i in range(5):
+        service.process_message(f"message {i} " + "m" * 400, session_id)
+    manager.stop()
+
+    last = seen[-1]
+    assert last[0]["content"][0]["text"].startswith(SUMMARY_HEADER)
+    # Only the previous turn is sent verbatim, however long the conversation gets
+    assert [m["content"][0]["text"][:9] for m in last[2:]] == ["message 3", "ok rrrrrr"]
+    assert manager.get_session_stats(session_id)["summarized_turns"] == 4
+
+
+def test_with_summary_without_summary_returns_messages():
+    messages = history(1)
+    assert with_summary(messages, None) is messages
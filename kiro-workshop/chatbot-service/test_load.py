@@ -0,0 +1,117 @@
+"""Concurrency and load tests for ChatbotService.
+
+Run directly for a throughput table:
+
+    python test_load.py
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from chatbot_service import ChatbotService
+from session_manager import SessionManager
+
+# Simulated model latency per turn (seconds)
+MODEL_LATENCY = 0.05
+
+
+class FakeAgentFactory:
+    """Builds agents that sleep like a model call and echo their input."""
+
+    def __init__(self, latency=MODEL_LATENCY):
+        self.latency = latency
+        self.active = 0
+        self.peak = 0
+        self.histories = []
+        self._lock = threading.Lock()
+
+    def __call__(self, messages):
+        self.histories.append(list(messages))
+
+        def agent(prompt):
+            with self._lock:
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            try:
+                time.sleep(self.latency)
+                return f"echo: {prompt} ({len(messages)} earlier messages)"
+            finally:
+                with self._lock:
+                    self.active -= 1
+
+        return agent
+
+
+def run_load(max_concurrency, sessions=16, turns=2, clients=16):
+    """Send `turns` messages for each of `sessions` sessions from `clients` threads.
+
+    Returns:
+        Tuple of (requests per second, service, factory)
+    """
+    factory = FakeAgentFactory()
+    session_manager = SessionManager(timeout_minutes=30)
+    service = ChatbotService(factory, session_manager, max_concurrency=max_concurrency)
+    session_ids = [session_manager.get_or_create_session()[0] for _ in range(sessions)]
+    work = [session_id for _ in range(turns) for session_id in session_ids]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(lambda session_id: service.process_message("hello", session_id), work))
+    elapsed = time.perf_counter() - start
+    session_manager.stop()
+    return len(work) / elapsed, service, factory
+
+
+def test_agents_run_in_parallel_up_to_the_limit():
+    # Counts agents running at once rather than timing the run; the
+    # throughput numbers are in the table printed by ``python test_load.py``
+    _, _, serial = run_load(max_concurrency=1)
+    _, _, parallel = run_load(max_concurrency=8)
+
+    assert serial.peak == 1
+    assert parallel.peak == 8
+
+
+def test_concurrency_limit_is_respected():
+    _, _, factory = run_load(max_concurrency=3)
+    assert factory.peak == 3
+
+
+def test_same_session_requests_serialize():
+    factory = FakeAgentFactory()
+    session_manager = SessionManager()
+    service = ChatbotService(factory, session_manager, max_concurrency=8)
+    session_id, _ = session_manager.get_or_create_session()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda i: service.process_message(f"message {i}", session_id), range(4)))
+    session_manager.stop()
+
+    # One agent at a time for the session, each seeing every earlier turn
+    assert factory.peak == 1
+    assert sorted(len(h) for h in factory.histories) == [0, 2, 4, 6]
+    assert len(session_manager.get_session_messages(session_id)) == 8
+    assert len(service._session_locks) == 0
+
+
+def test_sessions_do_not_share_history():
+    factory = FakeAgentFactory(latency=0)
+    session_manager = SessionManager()
+    service = ChatbotService(factory, session_manager)
+    first, _ = session_manager.get_or_create_session()
+    second, _ = session_manager.get_or_create_session()
+
+    service.process_message("for the first session", first)
+    reply, _ = service.process_message("for the second session", second)
+    session_manager.stop()
+
+    assert reply == "echo: for the second session (0 earlier messages)"
+    assert factory.histories[1] == []
+
+
+if __name__ == '__main__':
+    print(f"{'max agents':>10} {'req/s':>8} {'speedup':>8}")
+    baseline = None
+    for concurrency in (1, 2, 4, 8, 16):
+        rps, _, _ = run_load(max_concurrency=concurrency)
+        baseline = baseline or rps
+        print(f"{concurrency:>10} {rps:>8.1f} {rps / baseline:>7.1f}x")
@@ -0,0 +1,105 @@
+"""Tests for queued logging, sampling and the access log."""
+import json
+import logging
+import logging.handlers
+import pytest
+from starlette.testclient import TestClient
+import logging_setup
+from asgi import create_asgi_app
+from logging_setup import SAMPLED, SamplingFilter, access_log, setup_logging, stop_logging
+from server import create_app
+
+
+@pytest.fixture
+def root_logger():
+    """Restore the root logger's handlers and level after the test."""
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield root
+    stop_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def access_records(caplog):
+    return [r for r in caplog.records if r.name == 'access']
+
+
+def test_json_lines_written_by_listener_thread(root_logger, capsys):
+    setup_logging('INFO', 'json', sample_rate=0.0)
+    assert isinstance(root_logger.handlers[0], logging.handlers.QueueHandler)
+
+    log = logging.getLogger('chatbot_service')
+    log.info("kept")
+    log.info("dropped", extra=SAMPLED)
+    log.warning("sampled warnings are kept", extra=SAMPLED)
+    log.debug("below level")
+    access_log('POST', '/api/chat', 200, 0.25, ttfb=0.2, session_id='abc')
+    stop_logging()
+
+    lines = [json.loads(line) for line in capsys.readouterr().err.splitlines()]
+    assert [line["message"] for line in lines[:2]] == ["kept", "sampled warnings are kept"]
+    assert lines[0]["level"] == "INFO" and lines[0]["logger"] == "chatbot_service"
+    access = lines[2]
+    assert access["message"] == "POST /api/chat 200 duration_ms=250.0 ttfb_ms=200.0 session_id=abc"
+    assert (access["status"], access["duration_ms"], access["session_id"]) == (200, 250.0, 'abc')
+
+
+def test_json_exceptions_are_formatted_by_the_writer(root_logger, capsys):
+    setup_logging('INFO', 'json')
+    try:
+        raise ValueError("bad input")
+    except ValueError:
+        logging.getLogger('chatbot_service').error("turn %s failed", 7, exc_info=True)
+    stop_logging()
+
+    line = json.loads(capsys.readouterr().err)
+    assert line["message"] == "turn 7 failed"
+    assert line["exception"].startswith("Traceback") and "ValueError: bad input" in line["exception"]
+
+
+def test_sampling_keeps_everything_at_debug(root_logger, monkeypatch):
+    monkeypatch.setattr(logging_setup.random, 'random', lambda: 0.5)
+    sampler = SamplingFilter(rate=0.25)
+    record = logging.LogRecord('x', logging.INFO, '', 0, 'event', None, None)
+    record.sampled = True
+
+    root_logger.setLevel(logging.INFO)
+    assert not sampler.filter(record)
+    assert SamplingFilter(rate=0.75).filter(record)
+    root_logger.setLevel(logging.DEBUG)
+    assert sampler.filter(record)
+
+
+def test_flask_writes_one_access_line_per_request(caplog, scripted_service):
+    client = create_app(scripted_service()).test_client()
+    with caplog.at_level(logging.INFO):
+        # The WSGI server closes each response once it is sent, which writes the line
+        response = client.post("/api/chat", json={"message": "hi"})
+        reply = response.get_json()
+        response.close()
+        stream = client.post("/api/chat/stream", json={"message": "hi"})
+        assert b"event: done" in stream.data
+        stream.close()
+
+    chat, streamed = access_records(caplog)
+    assert (chat.http_method, chat.path, chat.status) == ('POST', '/api/chat', 200)
+    assert chat.session_id == reply["sessionId"]
+    assert streamed.path == '/api/chat/stream' and streamed.ttfb_ms <= streamed.duration_ms
+    assert not [r for r in caplog.records if r.name == 'server' and 'session' in r.getMessage()]
+
+
+def test_asgi_access_line_covers_the_stream(caplog, scripted_service):
+    service = scripted_service()
+    with TestClient(create_asgi_app(service)) as client, caplog.at_level(logging.INFO):
+        session_id = client.post("/api/chat", json={"message": "hi"}).json()["sessionId"]
+        client.post("/api/chat/stream", json={"message": "hi", "sessionId": session_id})
+        client.get("/api/nowhere")
+
+    chat, streamed, missing = access_records(caplog)
+    assert chat.status == 200 and chat.session_id == session_id
+    assert streamed.session_id == session_id and streamed.ttfb_ms <= streamed.duration_ms
+    assert missing.status == 404 and not hasattr(missing, 'session_id')
@@ -0,0 +1,153 @@
+"""Tests for the Prometheus metrics endpoint."""
+import asyncio
+import re
+import httpx
+import pytest
+from starlette.testclient import TestClient
+import tracing
+from asgi import create_asgi_app
+from metrics import Counter, Histogram, PrometheusText
+from scripted_model import last_tool_results
+from server import create_app
+from tools import backend_client, view_cart
+from tools.backend_client import BackendClient
+
+SAMPLE = re.compile(r'^(\w+)(?:\{(.*)\})? (\S+)$')
+
+
+def parse(text):
+    """Samples of an exposition as {(name, labels): value}."""
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith('#'):
+            continue
+        name, labels, value = SAMPLE.match(line).groups()
+        samples[(name, labels or '')] = float(value)
+    return samples
+
+
+def cart_responder(messages):
+    if last_tool_results(messages):
+        return "Your cart is empty."
+    return {"tool": "view_cart", "input": {}}
+
+
+@pytest.fixture
+def make_service(mock_backend, scripted_service):
+    """Tracing set up, the tools talking to a mock backend, and a builder for cart-checking services."""
+    tracing.setup_tracing()
+    mock_backend()
+    return lambda responder=cart_responder: scripted_service(responder, tools=[view_cart])
+
+
+def test_exposition_format():
+    requests = Counter(('path',))
+    requests.inc('/a "b"')
+    requests.inc('/a "b"', amount=2)
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 3.0):
+        histogram.observe(value)
+
+    text = PrometheusText('chatbot_')
+    text.counter('requests_total', "Requests", requests.samples(), ('path',))
+    text.gauge('sessions', "Sessions", {(): 4})
+    text.histogram('latency_seconds', "Latency", {('/a',): histogram}, ('path',))
+    lines = text.render().splitlines()
+
+    assert lines[:3] == [
+        '# HELP chatbot_requests_total Requests',
+        '# TYPE chatbot_requests_total counter',
+        'chatbot_requests_total{path="/a \\"b\\""} 3',
+    ]
+    assert 'chatbot_sessions 4' in lines
+    assert lines[-5:] == [
+        'chatbot_latency_seconds_bucket{path="/a",le="0.1"} 1',
+        'chatbot_latency_seconds_bucket{path="/a",le="1"} 2',
+        'chatbot_latency_seconds_bucket{path="/a",le="+Inf"} 3',
+        'chatbot_latency_seconds_sum{path="/a"} 3.55',
+        'chatbot_latency_seconds_count{path="/a"} 3',
+    ]
+    with pytest.raises(ValueError):
+        requests.inc()
+
+
+def test_prometheus_endpoint(make_service):
+    service = make_service()
+    with TestClient(create_asgi_app(service)) as client:
+        before = parse(client.get("/api/metrics").text)
+        assert client.post("/api/chat", json={"message": "What's in my cart?"}).status_code == 200
+        assert client.get("/api/nowhere").status_code == 404
+        response = client.get("/api/metrics")
+
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    after = parse(response.text)
+
+    def delta(name, labels=''):
+        return after.get((name, labels), 0) - before.get((name, labels), 0)
+
+    assert after[('chatbot_active_sessions', '')] == 1
+    assert after[('chatbot_session_messages_avg', '')] == 2
+    assert delta('chatbot_http_requests_total', 'method="POST",endpoint="/api/chat",status="200"') == 1
+    assert delta('chatbot_http_requests_total', 'method="GET",endpoint="unmatched",status="404"') == 1
+    assert delta('chatbot_http_request_duration_seconds_count', 'method="POST",endpoint="/api/chat"') == 1
+    assert delta('chatbot_tool_calls_total', 'tool="view_cart",status="success"') == 1
+    assert delta('chatbot_tool_duration_seconds_count', 'tool="view_cart"') == 1
+    assert delta('chatbot_stage_duration_seconds_count', 'stage="agent"') == 1
+    assert after[('chatbot_agent_errors_total', 'kind="agent"')] == 0
+    assert after[('chatbot_backend_pool_max_connections', '')] == backend_client.MAX_CONNECTIONS
+    assert after[('chatbot_backend_pool_utilization', '')] == 0
+
+
+def test_unrouted_paths_share_one_endpoint_label(make_service):
+    preflight = {"Origin": "http://localhost:3000", "Access-Control-Request-Method": "POST"}
+    service = make_service()
+    with TestClient(create_asgi_app(service)) as client:
+        for i in range(5):
+            assert client.options(f"/api/random{i}", headers=preflight).status_code == 200
+        asgi_text = client.get("/api/metrics").text
+    flask_client = create_app(service).test_client()
+    for i in range(5):
+        flask_client.options(f"/api/random{i}", headers=preflight)
+    flask_client.post("/api/chat", json={"message": "What's in my cart?"})
+    flask_text = flask_client.get("/api/metrics").get_data(as_text=True)
+
+    for text in (asgi_text, flask_text):
+        assert '/api/random' not in text
+        assert 'method="OPTIONS",endpoint="unmatched"' in text
+    assert 'method="POST",endpoint="/api/chat",status="200"' in flask_text
+
+
+def test_agent_errors_are_counted(make_service):
+    def failing(messages):
+        raise RuntimeError("model unavailable")
+
+    service = make_service(failing)
+    asyncio.run(service.process_message_async("Hello"))
+    service.process_message("Hello")
+    list(service.stream_message("Hello")[1])
+
+    assert service.get_metrics()["errors"] == {"agent": 3, "service": 0}
+    assert ('chatbot_agent_errors_total', 'kind="agent"') in parse(service.get_prometheus_metrics())
+
+
+def test_pool_stats_count_requests_in_flight():
+    seen = []
+
+    def handler(request):
+        seen.append(client.pool_stats())
+        return httpx.Response(200, json=[])
+
+    client = BackendClient('http://backend.test', max_connections=4, transport=httpx.MockTransport(handler))
+    try:
+        client.submit(client.get('/api/cart')).result(timeout=5)
+        assert seen == [{"in_flight": 1, "max_connections": 4, "utilization": 0.25}]
+        assert client.pool_stats()["in_flight"] == 0
+    finally:
+        client.close()
+
+
+def test_json_on_request(make_service):
+    client = create_app(make_service()).test_client()
+    assert client.get("/api/metrics").content_type.startswith("text/plain")
+    assert client.get("/api/metrics?format=json").get_json()["sessions"]["sessions"] == 0
+    assert "errors" in client.get("/api/metrics", headers={"Accept": "application/json"}).get_json()
@@ -0,0 +1,76 @@
+"""Tests for the inverted-index recommendation engine."""
+import random
+import threading
+from tools import recommender
+from tools.catalog import CatalogSnapshot
+from tools.recommender import RecommendationIndex, get_recommendation_index, tokenize
+
+PRODUCTS = [
+    {"id": 1, "name": "Ergonomic Office Chair", "category": "Furniture", "description": "Adjustable lumbar support"},
+    {"id": 2, "name": "Standing Desk", "category": "Furniture", "description": "Electric desk for the home office"},
+    {"id": 3, "name": "Yoga Mat", "category": "Sports", "description": "Non-slip mat for fitness and yoga"},
+    {"id": 4, "name": "Gaming Mouse", "category": "Electronics", "description": "RGB mouse with programmable buttons"},
+    {"id": 5, "name": "Mechanical Keyboard", "category": "Electronics", "description": "Keyboard for gaming and typing"},
+]
+
+WORDS = ("wireless ergonomic office chair desk lamp gaming mouse keyboard yoga mat running shoe "
+         "novel cookbook headphone speaker monitor cable organizer bottle fitness tracker backpack").split()
+
+
+def ids(products):
+    return [p["id"] for p in products]
+
+
+def test_tokenize_folds_plurals_and_drops_stop_words():
+    assert tokenize("Chairs for the Home-Office") == ["chair", "home", "office"]
+    assert tokenize("glass") == ["glass"]
+
+
+def test_multi_word_preferences_match_individual_terms():
+    index = RecommendationIndex(PRODUCTS)
+    # The old substring scoring found nothing for "home office"
+    assert set(ids(index.search("home office", 5))) == {1, 2}
+    assert ids(index.search("gaming", 5)) == [4, 5]
+    assert index.search("kayak", 5) == []
+
+
+def test_top_k_matches_exhaustive_scoring():
+    rng = random.Random(7)
+    products = [
+        {"id": i, "name": " ".join(rng.sample(WORDS, 3)), "description": " ".join(rng.sample(WORDS, 6)),
+         "category": rng.choice(["Home", "Sports", "Electronics"])}
+        for i in range(5000)
+    ]
+    index = RecommendationIndex(products)
+
+    for query in ["office chair", "wireless gaming mouse", "yoga fitness tracker shoes"]:
+        terms = [t for t in dict.fromkeys(tokenize(query)) if t in index.postings]
+        scores = {}
+        for term in terms:
+            for doc_id, weight in index.postings[term].items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+        expected = sorted(scores.values(), reverse=True)[:10]
+
+        found = [scores[p["id"]] for p in index.search(query, 10)]
+        assert found == expected
+
+
+def test_index_rebuilt_in_background_after_refresh(monkeypatch):
+    monkeypatch.setattr(recommender, "_index", None)
+    monkeypatch.setattr(recommender, "_building", None)
+    first = CatalogSnapshot(PRODUCTS, version=1)
+    index = get_recommendation_index(first)
+    assert get_recommendation_index(first) is index
+
+    release = threading.Event()
+    build = recommender._build
+    monkeypatch.setattr(recommender, "_build", lambda snapshot: release.wait(5) and build(snapshot))
+
+    second = CatalogSnapshot(PRODUCTS[:2], version=2)
+    # The previous index answers while the new one builds
+    assert get_recommendation_index(second) is index
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == "recommendation-index":
+            thread.join(5)
+    assert len(get_recommendation_index(second)) == 2
@@ -0,0 +1,139 @@
+"""Tests for the first-turn response cache."""
+from strands import Agent
+from chatbot_service import ChatbotService
+from response_cache import ResponseCache, normalize_message
+from scripted_model import ScriptedModel
+from session_manager import SessionManager
+
+
+class CountingFactory:
+    """Agents that answer with a count of model calls and report the given tool calls and results."""
+
+    def __init__(self, tools=(), status="success"):
+        self.calls = 0
+        self.tools = tools
+        self.status = status
+
+    def __call__(self, messages):
+        factory = self
+
+        class Agent:
+            def __init__(self):
+                self.messages = list(messages)
+
+            def __call__(self, prompt):
+                factory.calls += 1
+                self.messages.append({"role": "assistant", "content": [
+                    {"toolUse": {"toolUseId": f"t{i}", "name": name, "input": {}}}
+                    for i, name in enumerate(factory.tools)
+                ]})
+                self.messages.append({"role": "user", "content": [
+                    {"toolResult": {"toolUseId": f"t{i}", "status": factory.status, "content": [{"text": "..."}]}}
+                    for i, _ in enumerate(factory.tools)
+                ]})
+                return f"answer {factory.calls}"
+
+        return Agent()
+
+
+def make(tools=("list_products",), version=None, **cache_kwargs):
+    catalog = {"version": 1}
+    cache = ResponseCache(version=version or (lambda: catalog["version"]), **cache_kwargs)
+    factory = CountingFactory(tools)
+    manager = SessionManager()
+    return ChatbotService(factory, manager, response_cache=cache), factory, cache, catalog
+
+
+def test_normalize_message():
+    assert normalize_message("  Show me   BOOKS?? ") == normalize_message("show me books")
+    assert normalize_message("ｓｈｏｗ books") == "show books"
+
+
+def test_opening_questions_are_answered_from_cache():
+    service, factory, cache, _ = make()
+
+    first, _ = service.process_message("What books do you have?")
+    second, session_id = service.process_message("what books do you have")
+
+    assert first == second == "answer 1"
+    assert factory.calls == 1
+    # The cached answer still becomes part of the new conversation
+    assert len(service.session_manager.get_session_messages(session_id)) == 2
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "hit_rate": 0.5, "evictions": 0}
+
+
+def test_follow_up_turns_always_reach_the_agent():
+    service, factory, cache, _ = make()
+    _, session_id = service.process_message("show me electronics")
+    service.process_message("show me electronics", session_id)
+
+    assert factory.calls == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_new_catalog_version_misses():
+    service, factory, _, catalog = make()
+    service.process_message("show me toys")
+    catalog["version"] = 2
+    reply, _ = service.process_message("show me toys")
+
+    assert reply == "answer 2"
+
+
+def test_turns_using_cart_tools_are_not_cached():
+    service, factory, cache, _ = make(tools=("list_products", "add_to_cart"))
+    service.process_message("add the yoga mat to my cart")
+    service.process_message("add the yoga mat to my cart")
+
+    assert factory.calls == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_replies_after_failed_tool_calls_are_not_cached():
+    service, factory, cache, _ = make()
+    factory.status = "error"
+    service.process_message("show me electronics")
+    service.process_message("show me electronics")
+
+    assert factory.calls == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_unknown_catalog_version_is_not_cached():
+    service, factory, cache, _ = make(version=lambda: 0)
+    service.process_message("show me toys")
+    service.process_message("show me toys")
+    assert factory.calls == 2
+
+
+def test_lru_and_ttl_eviction(clock):
+    cache = ResponseCache(max_entries=2, ttl=10, version=lambda: 1, clock=clock)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    cache.get("a")
+    cache.put("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    clock.advance(11)
+    assert cache.get("c") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_streaming_uses_cache():
+    model = ScriptedModel(lambda messages: "Here are our books.")
+    session_manager = SessionManager()
+    service = ChatbotService(
+        lambda messages: Agent(model=model, messages=list(messages), callback_handler=None),
+        session_manager,
+        response_cache=ResponseCache(version=lambda: 1)
+    )
+
+    for _ in range(2):
+        _, events = service.stream_message("what books do you have?")
+        events = list(events)
+        assert "".join(e["text"] for e in events if e["type"] == "token") == "Here are our books."
+        assert events[-1]["reply"] == "Here are our books."
+    session_manager.stop()
+
+    assert model.calls == 1
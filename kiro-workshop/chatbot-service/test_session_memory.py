@@ -0,0 +1,87 @@
+"""Memory use of stored sessions.
+
+Run directly for a bytes-per-session table at 10k and 100k sessions:
+
+    python test_session_memory.py
+"""
+import gc
+import tracemalloc
+from session_manager import SessionManager
+from session_records import MessageView, TextMessage
+from session_store import InMemorySessionStore
+
+
+class DictSessionStore(InMemorySessionStore):
+    """Stores sessions as plain dicts with copied message lists, for comparison."""
+
+    def _pack(self, record):
+        return dict(record, messages=list(record['messages']), context=dict(record['context']))
+
+    def _unpack(self, stored):
+        return self._pack(stored)
+
+    def _with_activity(self, stored, last_activity):
+        stored['last_activity'] = last_activity
+        return stored
+
+
+def bytes_per_session(store_class, sessions, turns=2):
+    """Allocated bytes per session for `sessions` sessions of `turns` turns each."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    manager = SessionManager(store=store_class(ttl_seconds=3600))
+    for i in range(sessions):
+        session_id, _ = manager.get_or_create_session()
+        messages = []
+        for turn in range(turns):
+            messages.append({"role": "user", "content": [{"text": f"Do you have office chairs under ${i % 500}?"}]})
+            messages.append({"role": "assistant", "content": [{"text": f"Yes, {turn + 1} chairs fit your budget."}]})
+        if messages:
+            manager.update_session(session_id, messages)
+
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / sessions
+
+
+def test_compact_records_use_less_memory():
+    compact = bytes_per_session(InMemorySessionStore, 2000)
+    plain = bytes_per_session(DictSessionStore, 2000)
+    assert compact < plain * 0.75
+
+    idle_compact = bytes_per_session(InMemorySessionStore, 2000, turns=0)
+    idle_plain = bytes_per_session(DictSessionStore, 2000, turns=0)
+    assert idle_compact < idle_plain
+
+
+def test_history_is_a_shared_read_only_view():
+    manager = SessionManager()
+    session_id, _ = manager.get_or_create_session()
+    manager.update_session(session_id, [
+        {"role": "user", "content": [{"text": "hi"}]},
+        {"role": "assistant", "content": [{"text": "hello"}]},
+    ])
+
+    history = manager.get_session_messages(session_id)
+    assert isinstance(history, MessageView)
+    assert not hasattr(history, "append")
+
+    # Extending the history reuses the stored records
+    extended = history + [{"role": "user", "content": [{"text": "more"}]}]
+    manager.update_session(session_id, extended)
+    stored = manager.get_session_messages(session_id)
+    assert stored._items[:2] == history._items
+    assert all(a is b for a, b in zip(stored._items, history._items))
+    assert isinstance(stored._items[2], TextMessage) and stored._items[2].role is stored._items[0].role
+
+
+if __name__ == '__main__':
+    print(f"{'sessions':>9} {'turns':>6} {'dict B/session':>15} {'compact B/session':>18} {'saving':>7}")
+    for sessions in (10_000, 100_000):
+        for turns in (0, 2):
+            plain = bytes_per_session(DictSessionStore, sessions, turns)
+            compact = bytes_per_session(InMemorySessionStore, sessions, turns)
+            print(f"{sessions:>9} {turns:>6} {plain:>15.0f} {compact:>18.0f} {1 - compact / plain:>6.0%}")
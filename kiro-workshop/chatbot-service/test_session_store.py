@@ -0,0 +1,195 @@
+"""Tests for the session storage backends."""
+import json
+import threading
+import pytest
+from chatbot_service import ChatbotService
+from session_manager import SessionManager
+from session_store import (
+    FakeSessionStore, InMemorySessionStore, SQLiteSessionStore, decode_record, encode_record
+)
+
+
+def record(session_id="s1", messages=None, **stats):
+    return {
+        'session_id': session_id,
+        'created_at': 1.0,
+        'last_activity': 2.0,
+        'messages': messages or [],
+        'context': {},
+        'stats': dict({'messages': 0, 'prompt_tokens': 0, 'memory_bytes': 0, 'summarized_turns': 0}, **stats),
+    }
+
+
+CONVERSATION = [
+    {"role": "user", "content": [{"text": "show me chairs"}]},
+    {"role": "assistant", "content": [{"toolUse": {"toolUseId": "t1", "name": "list_products", "input": {}}}]},
+    {"role": "user", "content": [{"toolResult": {"toolUseId": "t1", "content": [{"text": "3 chairs"}]}}]},
+    {"role": "assistant", "content": [{"text": "I found 3 chairs."}]},
+]
+
+
+@pytest.fixture(params=["memory", "fake", "sqlite"])
+def store_and_clock(request, tmp_path, clock):
+    if request.param == "memory":
+        store = InMemorySessionStore(60, clock=clock)
+    elif request.param == "fake":
+        store = FakeSessionStore(60)
+        clock = store
+    else:
+        store = SQLiteSessionStore(str(tmp_path / "sessions.db"), 60, clock=clock)
+    yield store, clock
+    store.close()
+
+
+def test_encoding_round_trips_and_is_compact():
+    original = record(messages=CONVERSATION * 20, context={"summary": "earlier"})
+    encoded = encode_record(original)
+
+    assert decode_record(encoded) == original
+    assert len(encoded) < len(json.dumps(original)) / 4
+
+    small = record(messages=CONVERSATION[:1])
+    assert encode_record(small)[:1] == b'J'
+    assert decode_record(encode_record(small)) == small
+
+
+def test_store_round_trip_and_isolation(store_and_clock):
+    store, _ = store_and_clock
+    store.save(record(messages=list(CONVERSATION)))
+
+    loaded = store.load("s1")
+    assert loaded["messages"] == CONVERSATION
+    for message in loaded["messages"]:
+        message["content"][0]["changed"] = True
+    loaded["context"]["summary"] = "changed"
+    assert store.load("s1")["messages"] == CONVERSATION
+    assert store.load("s1")["context"] == {}
+    assert store.load("missing") is None
+
+
+def test_sessions_expire_after_ttl_without_activity(store_and_clock):
+    store, clock = store_and_clock
+    store.save(record("s1"))
+    store.save(record("s2"))
+
+    clock.advance(50)
+    assert store.touch("s1", 3.0)
+    clock.advance(20)
+
+    # s2 has been idle for 70s; s1 was touched 20s ago
+    assert store.load("s2") is None
+    assert store.load("s1") is not None
+    assert not store.touch("s2", 4.0)
+    assert store.count() == 1
+    assert len(store.all_stats()) == 1
+
+    store.delete("s1")
+    assert store.count() == 0
+
+
+def test_expired_sessions_are_dropped_from_every_shard(clock):
+    store = InMemorySessionStore(60, clock=clock, shards=4)
+    for i in range(100):
+        store.save(record(f"idle-{i}"))
+        store.touch(f"idle-{i}", 3.0)
+    clock.advance(30)
+    store.save(record("active"))
+    clock.advance(31)
+
+    assert store.count() == 1
+    assert sum(len(shard.entries) for shard in store._shards) == 1
+    assert all(len(shard.heap) <= 1 for shard in store._shards)
+
+
+def test_expiry_skips_sessions_touched_since_scheduling(clock):
+    store = InMemorySessionStore(60, clock=clock, shards=1)
+    store.save(record("s1"))
+    clock.advance(50)
+    store.touch("s1", 3.0)
+    clock.advance(20)
+
+    # The heap entry from the save has come due, but the touch extended the session
+    assert store.load("s1") is not None
+    assert [expires_at for expires_at, _ in store._shards[0].heap] == [1110.0]
+
+
+def test_stale_heap_entries_are_compacted(clock):
+    store = InMemorySessionStore(60, clock=clock, shards=1)
+    store.save(record("s1"))
+    for _ in range(1000):
+        clock.advance(0.01)
+        store.touch("s1", 3.0)
+
+    assert len(store._shards[0].heap) <= 2 + 64
+
+
+def test_sqlite_sessions_are_shared_between_stores(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    first = SessionManager(store=SQLiteSessionStore(path, 60))
+    second = SessionManager(store=SQLiteSessionStore(path, 60))
+
+    def factory(messages):
+        return lambda prompt: f"{len(messages)} earlier messages"
+
+    session_id, _ = first.get_or_create_session()
+    ChatbotService(factory, first).process_message("hi", session_id)
+    reply, continued = ChatbotService(factory, second).process_message("again", session_id)
+    count = second.get_session_count()
+    first.stop()
+    second.stop()
+
+    # The second process continues the conversation started by the first
+    assert continued == session_id
+    assert reply == "2 earlier messages"
+    assert count == 1
+
+
+def test_session_manager_serializes_every_update():
+    store = FakeSessionStore(ttl_seconds=60)
+    manager = SessionManager(store=store)
+    session_id, _ = manager.get_or_create_session()
+    manager.update_session(session_id, list(CONVERSATION))
+
+    assert store.saves == 2
+    assert manager.get_session_messages(session_id) == CONVERSATION
+    assert manager.get_session_stats(session_id)["messages"] == 4
+
+    store.advance(61)
+    assert manager.get_session_messages(session_id) == []
+    new_id, session = manager.get_or_create_session(session_id)
+    assert new_id == session_id and session["messages"] == []
+
+
+def test_update_changes_the_stored_record(store_and_clock):
+    store, _ = store_and_clock
+    store.save(record(messages=CONVERSATION[:1]))
+
+    def change(session):
+        session["messages"] = session["messages"] + CONVERSATION[1:2]
+
+    assert store.update("s1", change)["messages"] == CONVERSATION[:2]
+    assert store.load("s1")["messages"] == CONVERSATION[:2]
+    assert store.update("missing", change) is None
+
+
+def test_sqlite_appends_from_several_processes_are_all_kept(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    stores = [SQLiteSessionStore(path, 60) for _ in range(2)]
+    managers = [SessionManager(store=store) for store in stores]
+    session_id, _ = managers[0].get_or_create_session()
+
+    def append_turns(manager, worker):
+        for turn in range(10):
+            manager.append_messages(session_id, [{"role": "user", "content": [{"text": f"{worker}-{turn}"}]}])
+
+    # Each store is one process; several request threads share its connection
+    threads = [threading.Thread(target=append_turns, args=(managers[i % 2], i)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    texts = [m["content"][0]["text"] for m in managers[1].get_session_messages(session_id)]
+    for manager in managers:
+        manager.stop()
+    assert sorted(texts) == sorted(f"{worker}-{turn}" for worker in range(8) for turn in range(10))
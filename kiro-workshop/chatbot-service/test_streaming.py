@@ -0,0 +1,165 @@
+"""Tests for streaming chat responses over Server-Sent Events."""
+import asyncio
+import json
+import threading
+import time
+import pytest
+from pydantic import BaseModel, ValidationError
+from strands import tool
+import chatbot_service
+from scripted_model import ScriptedModel, last_tool_results
+from server import create_app
+
+
+@tool
+async def view_cart() -> str:
+    """View the current contents of the shopping cart."""
+    return "🛒 Your shopping cart is empty."
+
+
+def cart_responder(messages):
+    if last_tool_results(messages):
+        return "Your cart is empty right now."
+    return {"tool": "view_cart", "input": {}}
+
+
+@pytest.fixture
+def make_service(scripted_service):
+    def build(responder, **model_options):
+        service = scripted_service(responder, tools=[view_cart], model_options=model_options)
+        return service, service.session_manager
+    return build
+
+
+def parse_sse(body):
+    events = []
+    for frame in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.fixture
+def client_for(make_service):
+    def build(responder, **model_options):
+        service, session_manager = make_service(responder, **model_options)
+        return create_app(service).test_client(), session_manager
+    return build
+
+
+def test_stream_relays_tokens_and_tool_events(client_for):
+    client, session_manager = client_for(cart_responder)
+
+    response = client.post('/api/chat/stream', json={"message": "what's in my cart?"})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+
+    events = parse_sse(response.get_data(as_text=True))
+    names = [name for name, _ in events]
+    assert names[0] == "session"
+    assert names[-1] == "done"
+    assert names.index("tool_call") < names.index("tool_result") < names.index("token")
+
+    tool_call = dict(events)["tool_call"]
+    assert tool_call["name"] == "view_cart"
+    assert dict(events)["tool_result"] == {"type": "tool_result", "toolUseId": tool_call["toolUseId"], "status": "success"}
+
+    tokens = "".join(data["text"] for name, data in events if name == "token")
+    done = events[-1][1]
+    assert tokens == done["reply"] == "Your cart is empty right now."
+
+    # The session is updated once the stream completes
+    history = session_manager.get_session_messages(done["sessionId"])
+    assert [m["role"] for m in history] == ["user", "assistant"]
+    assert history[1]["content"][0]["text"] == done["reply"]
+
+
+def test_stream_continues_existing_session(client_for):
+    client, session_manager = client_for(lambda messages: f"{len(messages)} messages so far")
+
+    first = parse_sse(client.post('/api/chat/stream', json={"message": "hi"}).get_data(as_text=True))
+    session_id = first[0][1]["sessionId"]
+    second = parse_sse(client.post('/api/chat/stream', json={"message": "again", "sessionId": session_id})
+                       .get_data(as_text=True))
+
+    assert second[-1][1]["reply"] == "3 messages so far"
+    assert len(session_manager.get_session_messages(session_id)) == 4
+
+
+def test_stream_validates_request(client_for):
+    client, _ = client_for(lambda messages: "unused")
+    response = client.post('/api/chat/stream', json={"message": ""})
+    assert response.status_code == 400
+    assert response.get_json()["error"]["code"] == "INVALID_MESSAGE"
+
+
+def test_stream_reports_agent_errors_without_saving(client_for):
+    def failing(messages):
+        raise RuntimeError("model unavailable")
+
+    client, session_manager = client_for(failing)
+    events = parse_sse(client.post('/api/chat/stream', json={"message": "hi"}).get_data(as_text=True))
+
+    assert [name for name, _ in events] == ["session", "error"]
+    assert session_manager.get_session_messages(events[0][1]["sessionId"]) == []
+
+
+def test_closing_stream_cancels_turn(make_service):
+    service, session_manager = make_service(lambda messages: "word " * 200, token_delay=0.01)
+    session_id, events = service.stream_message("tell me a story")
+
+    first = next(events)
+    assert first["type"] == "token"
+    events.close()
+
+    # Nothing is saved and the session is free for the next request
+    assert session_manager.get_session_messages(session_id) == []
+    assert len(service._session_locks) == 0
+    assert not [t for t in threading.enumerate() if t.name.startswith("agent-stream-")]
+
+
+def test_non_streaming_turn_uses_same_agent_flow(make_service):
+    service, session_manager = make_service(cart_responder)
+    reply, session_id = service.process_message("what's in my cart?")
+
+    assert reply == "Your cart is empty right now."
+    assert len(session_manager.get_session_messages(session_id)) == 2
+
+
+def test_stream_gives_up_on_agents_that_ignore_cancel(monkeypatch, scripted_service, caplog):
+    class StubbornAgent:
+        async def stream_async(self, message, cancel_signal):
+            yield {"data": "Once"}
+            time.sleep(0.5)  # Blocks the worker's loop, so the cancel goes unseen
+            yield {"data": " upon a time"}
+
+    monkeypatch.setattr(chatbot_service, "STREAM_WORKER_JOIN_TIMEOUT", 0.05)
+    service = scripted_service()
+    service.agent_factory = lambda messages: StubbornAgent()
+    session_id, events = service.stream_message("tell me a story")
+
+    assert next(events) == {"type": "token", "text": "Once"}
+    start = time.perf_counter()
+    events.close()
+
+    assert time.perf_counter() - start < 0.4
+    assert len(service._session_locks) == 0
+    assert "still running" in caplog.text
+
+
+class Pick(BaseModel):
+    product_id: int
+    reason: str
+
+
+def test_scripted_model_validates_structured_output():
+    async def first(model, responder_output):
+        model.responder = lambda messages: responder_output
+        async for event in model.structured_output(Pick, [{"role": "user", "content": [{"text": "pick one"}]}]):
+            return event["output"]
+
+    model = ScriptedModel()
+    assert asyncio.run(first(model, {"product_id": 3, "reason": "cheap"})) == Pick(product_id=3, reason="cheap")
+    assert asyncio.run(first(model, '{"product_id": 4, "reason": "fast"}')).product_id == 4
+    with pytest.raises(ValidationError):
+        asyncio.run(first(model, {"product_id": "three"}))
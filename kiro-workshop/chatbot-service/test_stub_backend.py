@@ -0,0 +1,92 @@
+"""Tests for the stand-in backend, the scripted shopping model and the load generator."""
+import asyncio
+import pytest
+from starlette.testclient import TestClient
+import config
+import load_test
+from load_test import LocalStack, percentile, run_load, summarize
+from scripted_model import shopping_responder
+from stub_backend import create_stub_backend, make_catalog
+from tools import backend_client, catalog
+
+
+def user(text):
+    return [{"role": "user", "content": [{"text": text}]}]
+
+
+@pytest.fixture
+def backend():
+    return TestClient(create_stub_backend(products=12))
+
+
+def test_catalog_is_deterministic():
+    products = make_catalog(50, seed=1)
+    assert products == make_catalog(50, seed=1)
+    assert [p['id'] for p in products] == list(range(1, 51))
+    assert {p['category'] for p in products} == {"Electronics", "Home", "Furniture", "Accessories", "Sports", "Books"}
+
+
+def test_products_support_etags(backend):
+    response = backend.get("/api/products")
+    assert response.status_code == 200 and len(response.json()) == 12
+
+    again = backend.get("/api/products", headers={"If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_product_lookup(backend):
+    assert backend.get("/api/products/3").json()["id"] == 3
+    assert backend.get("/api/products/99").status_code == 404
+    assert backend.get("/api/products/abc").status_code == 404
+
+
+def test_cart_round_trip(backend):
+    assert backend.get("/api/cart").json() == []
+    assert backend.post("/api/cart", json={"productId": 2, "quantity": 2}).status_code == 201
+    backend.post("/api/cart", json={"productId": 2})
+
+    items = backend.get("/api/cart").json()
+    assert [(i["productId"], i["quantity"], i["product"]["id"]) for i in items] == [(2, 3, 2)]
+
+    assert backend.delete("/api/cart/2").status_code == 200
+    assert backend.delete("/api/cart/2").status_code == 404
+    assert backend.post("/api/cart", json={"productId": 99}).status_code == 404
+    assert backend.post("/api/cart", json={"productId": 1, "quantity": 0}).status_code == 400
+
+
+def test_shopping_responder_picks_tools():
+    assert shopping_responder(user("Please add 3 to my cart")) == {"tool": "add_to_cart", "input": {"product_id": 3}}
+    assert shopping_responder(user("remove 7")) == {"tool": "remove_from_cart", "input": {"product_id": 7}}
+    assert shopping_responder(user("show me books")) == [{"tool": "list_products", "input": {"category": "Books"}}]
+    assert [c["tool"] for c in shopping_responder(user("what's in my cart? suggest more"))] == [
+        "view_cart", "get_recommendations"
+    ]
+    assert isinstance(shopping_responder(user("hello")), str)
+
+
+def test_percentiles():
+    samples = [i / 100 for i in range(1, 101)]
+    assert percentile(samples, 50) == 0.5
+    assert percentile(samples, 99) == 0.99
+    assert percentile([], 95) == 0.0
+
+    report = summarize(samples, errors=2, elapsed=2.0)
+    assert report["requests"] == 102 and report["rps"] == 51.0
+    assert (report["p50_ms"], report["p95_ms"], report["max_ms"]) == (500.0, 950.0, 1000.0)
+
+
+def test_local_stack_load_run(monkeypatch):
+    monkeypatch.setattr(config, '_current_config', None)
+    monkeypatch.setattr(backend_client, '_client', None)
+    monkeypatch.setattr(catalog, '_catalog', None)
+    for name in ('ECOMMERCE_API_URL', 'AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+        monkeypatch.setenv(name, 'unset')
+    monkeypatch.setattr(load_test, 'CONVERSATION', ["Show me electronics", "Please add 3 to my cart", "What's in my cart?"])
+
+    with LocalStack(products=20) as stack:
+        report = asyncio.run(run_load(stack.url, users=3, turns=3))
+        streamed = asyncio.run(run_load(stack.url, users=2, turns=2, stream=True))
+
+    assert report["requests"] == 9 and report["errors"] == 0
+    assert streamed["requests"] == 4 and streamed["errors"] == 0
+    assert report["p50_ms"] <= report["p95_ms"] <= report["p99_ms"]
@@ -0,0 +1,166 @@
+"""Tests for running a step's tool calls with ReadParallelToolExecutor.
+
+Run directly to compare turn latency with the sequential executor against a
+backend that answers every request after a fixed delay:
+
+    python test_tool_executor.py
+"""
+import asyncio
+import inspect
+import time
+import httpx
+import pytest
+from strands.tools.executors import ConcurrentToolExecutor, SequentialToolExecutor
+from strands.tools.executors._executor import ToolExecutor
+from agent import create_agent
+from scripted_model import ScriptedModel, last_tool_results
+from tools import backend_client, catalog
+from tools.backend_client import BackendClient
+from tools.executor import ReadParallelToolExecutor, plan_batches
+
+PRODUCTS = [
+    {"id": 1, "name": "Wireless Mouse", "category": "Electronics", "price": 25.0, "emoji": "🖱️", "description": "Ergonomic mouse"},
+    {"id": 2, "name": "Desk Lamp", "category": "Home", "price": 40.0, "emoji": "💡", "description": "LED lamp for the home office"},
+]
+
+
+def calls(*names):
+    return [{"name": name, "toolUseId": str(i), "input": {}} for i, name in enumerate(names)]
+
+
+def names(batches):
+    return [[tool_use['name'] for tool_use in batch] for batch in batches]
+
+
+def slow_backend(latency):
+    """Backend handler that answers after `latency` seconds and records each request."""
+    requests = []
+    cart = []
+
+    async def handler(request):
+        requests.append((request.method, request.url.path))
+        await asyncio.sleep(latency)
+        if request.url.path == '/api/products':
+            return httpx.Response(200, json=PRODUCTS)
+        if request.method == 'POST':
+            cart.append({"productId": 1, "quantity": 1, "product": PRODUCTS[0]})
+            return httpx.Response(200, json={})
+        return httpx.Response(200, json=cart)
+
+    return handler, requests
+
+
+def install_backend(handler):
+    """Install a backend for the benchmark, which runs outside pytest."""
+    client = BackendClient('http://backend.test', transport=httpx.MockTransport(handler))
+    backend_client._client = client
+    catalog._catalog = None
+    return client
+
+
+@pytest.fixture
+def backend(mock_backend):
+    """Install a backend with 100 ms of latency per request."""
+    handler, requests = slow_backend(0.1)
+    mock_backend(handler)
+    return requests
+
+
+def one_step(*tool_calls):
+    """Responder that makes `tool_calls` in one step, then reports the results."""
+    def responder(messages):
+        results = last_tool_results(messages)
+        if results:
+            return "\n".join(results)
+        return [{"tool": name, "input": tool_input} for name, tool_input in tool_calls]
+    return responder
+
+
+def run_turn(responder, executor, message="hi"):
+    agent = create_agent(model=ScriptedModel(responder), tool_executor=executor)
+    start = time.perf_counter()
+    result = agent(message)
+    return str(result), time.perf_counter() - start
+
+
+def test_private_executor_interface_is_unchanged():
+    # ReadParallelToolExecutor overrides and delegates to this private method;
+    # if Strands changes it, update tools/executor.py and the pin in requirements.txt
+    expected = ['self', 'agent', 'tool_uses', 'tool_results', 'cycle_trace', 'cycle_span',
+                'invocation_state', 'structured_output_context']
+    for executor in (ToolExecutor, ConcurrentToolExecutor, SequentialToolExecutor, ReadParallelToolExecutor):
+        assert list(inspect.signature(executor._execute).parameters) == expected, executor.__name__
+
+
+def test_consecutive_reads_share_a_batch():
+    batches = plan_batches(calls('view_cart', 'get_recommendations', 'add_to_cart', 'view_cart', 'list_products'))
+    assert names(batches) == [['view_cart', 'get_recommendations'], ['add_to_cart'], ['view_cart', 'list_products']]
+
+
+def test_batches_respect_concurrency_cap():
+    batches = plan_batches(calls('list_products', 'view_cart', 'get_recommendations'), max_concurrency=2)
+    assert names(batches) == [['list_products', 'view_cart'], ['get_recommendations']]
+
+
+def test_mutations_run_alone():
+    batches = plan_batches(calls('add_to_cart', 'remove_from_cart'))
+    assert names(batches) == [['add_to_cart'], ['remove_from_cart']]
+
+
+def test_independent_reads_overlap(backend):
+    # With no catalog cached, both tools wait on a backend round trip
+    responder = one_step(("view_cart", {}), ("list_products", {"category": "Home"}))
+
+    reply, parallel = run_turn(responder, ReadParallelToolExecutor())
+    assert "Desk Lamp" in reply and "empty" in reply
+    catalog._catalog = None
+    _, sequential = run_turn(responder, SequentialToolExecutor())
+
+    assert parallel < 0.18
+    assert sequential >= 0.2
+
+
+def test_cart_changes_keep_their_order(backend):
+    responder = one_step(("view_cart", {}), ("add_to_cart", {"product_id": 1}), ("view_cart", {}))
+
+    reply, _ = run_turn(responder, ReadParallelToolExecutor())
+
+    cart_calls = [request for request in backend if request[1] == '/api/cart']
+    assert cart_calls == [('GET', '/api/cart'), ('POST', '/api/cart'), ('GET', '/api/cart')]
+    assert "empty" in reply and "Wireless Mouse" in reply
+
+
+def bench(latency=0.1, turns=10, cold_catalog=True):
+    """Mean turn time with each executor for a step of three independent reads.
+
+    With ``cold_catalog`` the catalog cache is dropped before every turn, as
+    on the first turn after startup or after an expired refresh; otherwise
+    only ``view_cart`` reaches the backend.
+    """
+    handler, _ = slow_backend(latency)
+    client = install_backend(handler)
+    responder = one_step(("view_cart", {}), ("get_recommendations", {"preferences": "home office"}),
+                         ("list_products", {"category": "Electronics"}))
+    try:
+        results = {}
+        for label, executor in (("sequential", SequentialToolExecutor()),
+                                ("read-parallel", ReadParallelToolExecutor())):
+            total = 0.0
+            for _ in range(turns):
+                if cold_catalog:
+                    catalog._catalog = None
+                total += run_turn(responder, executor)[1]
+            results[label] = total / turns
+        return results
+    finally:
+        client.close()
+
+
+if __name__ == '__main__':
+    print(f"{'catalog':>8} {'backend latency':>16} {'sequential':>11} {'read-parallel':>14} {'speedup':>8}")
+    for cold_catalog in (True, False):
+        for latency in (0.05, 0.1, 0.25):
+            results = bench(latency, cold_catalog=cold_catalog)
+            print(f"{'cold' if cold_catalog else 'warm':>8} {latency * 1000:>14.0f}ms "
+                  f"{results['sequential'] * 1000:>9.0f}ms {results['read-parallel'] * 1000:>12.0f}ms "
+                  f"{results['sequential'] / results['read-parallel']:>7.1f}x")
@@ -0,0 +1,123 @@
+"""Tests for request tracing and per-stage latency histograms."""
+import asyncio
+import json
+import pytest
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from starlette.testclient import TestClient
+import tracing
+from asgi import create_asgi_app
+from metrics import Histogram
+from scripted_model import last_tool_results
+from server import create_app
+from tools import view_cart
+from tracing import FileSpanExporter, setup_tracing
+
+
+@pytest.fixture
+def spans(mock_backend):
+    """Collect finished spans in memory."""
+    setup_tracing()
+    exporter = InMemorySpanExporter()
+    tracing._provider.add_span_processor(SimpleSpanProcessor(exporter))
+    mock_backend()
+    yield exporter
+    exporter.shutdown()
+
+
+def cart_responder(messages):
+    if last_tool_results(messages):
+        return "Your cart is empty."
+    return {"tool": "view_cart", "input": {}}
+
+
+@pytest.fixture
+def make_service(scripted_service):
+    return lambda: scripted_service(cart_responder, tools=[view_cart], model_options={'latency': 0.01})
+
+
+def by_name(exporter):
+    return {span.name: span for span in exporter.get_finished_spans()}
+
+
+def ancestors(span, spans):
+    """Names of a span's ancestors, nearest first."""
+    index = {s.context.span_id: s for s in spans}
+    names = []
+    while span.parent is not None and span.parent.span_id in index:
+        span = index[span.parent.span_id]
+        names.append(span.name)
+    return names
+
+
+def test_histogram_quantiles():
+    histogram = Histogram(buckets=(0.1, 0.2, 0.5, 1.0))
+    for value in [0.05] * 50 + [0.15] * 45 + [0.8] * 5:
+        histogram.observe(value)
+
+    assert histogram.count == 100
+    assert histogram.quantile(0.5) == pytest.approx(0.1)
+    assert 0.1 < histogram.quantile(0.9) <= 0.2
+    assert 0.5 < histogram.quantile(0.99) <= 0.8
+    assert histogram.cumulative_counts() == [50, 95, 95, 100, 100]
+    assert Histogram().snapshot()["p50"] is None
+
+
+def test_turn_spans_form_one_trace(spans, make_service):
+    service = make_service()
+    reply, session_id = asyncio.run(service.process_message_async("What's in my cart?"))
+    service.session_manager.stop()
+
+    assert reply == "Your cart is empty."
+    finished = spans.get_finished_spans()
+    named = by_name(spans)
+    for name in ('chat.turn', 'session.lock', 'session.fetch', 'session.save', 'agent.invoke', 'chat',
+                 'execute_tool view_cart', 'backend.request'):
+        assert name in named, name
+    assert named['chat.turn'].attributes['session.id'] == session_id
+
+    # The backend request belongs to the tool call, inside the agent run
+    backend = ancestors(named['backend.request'], finished)
+    assert backend[0] == 'execute_tool view_cart'
+    assert 'agent.invoke' in backend
+    assert len({span.context.trace_id for span in finished}) == 1
+    assert named['backend.request'].attributes['http.response.status_code'] == 200
+
+
+def test_stage_histograms_on_metrics_endpoint(spans, make_service):
+    service = make_service()
+    with TestClient(create_asgi_app(service)) as client:
+        assert client.post("/api/chat", json={"message": "What's in my cart?"}).status_code == 200
+        stages = client.get("/api/metrics", headers={"Accept": "application/json"}).json()["stages"]
+
+    for stage in ('request', 'turn', 'session_lock', 'session_fetch', 'agent', 'model', 'model_ttft',
+                  'tool.view_cart', 'backend'):
+        assert stages[stage]["count"] >= 1, stage
+
+    # The histograms are process-wide; compare this request's own spans
+    request, agent = by_name(spans)['POST /api/chat'], by_name(spans)['agent.invoke']
+    assert agent.end_time - agent.start_time <= request.end_time - request.start_time
+    assert request.attributes['http.response.status_code'] == 200
+    assert 'POST /api/chat' in ancestors(by_name(spans)['agent.invoke'], spans.get_finished_spans())
+
+
+def test_threaded_stream_joins_request_trace(spans, make_service):
+    client = create_app(make_service()).test_client()
+    response = client.post("/api/chat/stream", json={"message": "What's in my cart?"})
+    assert b"event: done" in response.data
+
+    finished = spans.get_finished_spans()
+    tool = by_name(spans)['execute_tool view_cart']
+    assert ancestors(tool, finished)[-1] == 'POST /api/chat/stream'
+
+
+def test_file_exporter_writes_json_lines(tmp_path, spans):
+    path = tmp_path / "traces.jsonl"
+    exporter = FileSpanExporter(str(path))
+    with tracing.tracer.start_as_current_span('session.fetch'):
+        pass
+    exporter.export(spans.get_finished_spans()[-1:])
+    exporter.shutdown()
+
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert json.loads(lines[-1])["name"] == 'session.fetch'
@@ -0,0 +1,162 @@
+"""Tests for memoizing tool results within an agent turn."""
+import asyncio
+import httpx
+import pytest
+from scripted_model import last_tool_results
+from tools import add_to_cart, list_products, view_cart
+from tools.turn_cache import ErrorReply, memoize_in_turn, turn_scope
+
+PRODUCTS = [
+    {"id": 1, "name": "Wireless Mouse", "category": "Electronics", "price": 25.0, "emoji": "🖱️", "description": "Ergonomic mouse"},
+]
+
+
+@pytest.fixture
+def backend(mock_backend):
+    """Install a mock backend and record the requests it receives."""
+    requests = []
+    cart = []
+
+    def handler(request):
+        requests.append((request.method, request.url.path))
+        if request.url.path == '/api/products':
+            return httpx.Response(200, json=PRODUCTS)
+        if request.method == 'POST':
+            cart.append({"productId": 1, "quantity": 1, "product": PRODUCTS[0]})
+            return httpx.Response(200, json={})
+        return httpx.Response(200, json=cart)
+
+    mock_backend(handler)
+    return requests
+
+
+def cart_reads(requests):
+    return requests.count(('GET', '/api/cart'))
+
+
+def test_repeated_reads_in_a_turn_hit_the_backend_once(backend):
+    async def turn():
+        with turn_scope() as cache:
+            first = await view_cart()
+            second = await view_cart()
+        return first, second, cache
+
+    first, second, cache = asyncio.run(turn())
+
+    assert first == second
+    assert cart_reads(backend) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_arguments_are_part_of_the_key(backend):
+    async def turn():
+        with turn_scope() as cache:
+            await list_products(category="Electronics")
+            await list_products(category="Electronics", max_price=None)
+            await list_products(category="Home")
+        return cache
+
+    cache = asyncio.run(turn())
+
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_cart_mutation_invalidates_reads(backend):
+    async def turn():
+        with turn_scope():
+            before = await view_cart()
+            await add_to_cart(product_id=1)
+            after = await view_cart()
+        return before, after
+
+    before, after = asyncio.run(turn())
+
+    assert "empty" in before
+    assert "Wireless Mouse" in after
+    assert cart_reads(backend) == 2
+
+
+def test_reads_are_not_memoized_outside_a_turn(backend):
+    async def calls():
+        await view_cart()
+        await view_cart()
+
+    asyncio.run(calls())
+
+    assert cart_reads(backend) == 2
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    calls = []
+
+    @memoize_in_turn
+    async def slow_lookup(product_id: int) -> str:
+        calls.append(product_id)
+        await asyncio.sleep(0.05)
+        return f"product {product_id}"
+
+    async def turn():
+        with turn_scope():
+            return await asyncio.gather(*(slow_lookup(7) for _ in range(3)))
+
+    assert asyncio.run(turn()) == ["product 7"] * 3
+    assert calls == [7]
+
+
+def test_failed_calls_are_not_memoized():
+    calls = []
+
+    @memoize_in_turn
+    async def flaky() -> str:
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("backend down")
+        return "ok"
+
+    async def turn():
+        with turn_scope():
+            with pytest.raises(RuntimeError):
+                await flaky()
+            return await flaky()
+
+    assert asyncio.run(turn()) == "ok"
+    assert len(calls) == 2
+
+
+def test_backend_errors_are_not_memoized(mock_backend):
+    statuses = [500, 200]
+
+    def handler(request):
+        return httpx.Response(statuses.pop(0), json=[])
+
+    mock_backend(handler)
+
+    async def turn():
+        with turn_scope() as cache:
+            first = await view_cart()
+            second = await view_cart()
+        return first, second, cache
+
+    first, second, cache = asyncio.run(turn())
+
+    assert isinstance(first, ErrorReply)
+    assert second == "🛒 Your shopping cart is empty."
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_agent_turn_reuses_tool_results(backend, scripted_service):
+    def responder(messages):
+        # Check the cart twice before answering, as the model sometimes does
+        results = sum(len(last_tool_results([m])) for m in messages)
+        if results < 2:
+            return {"tool": "view_cart", "input": {}}
+        return "Your cart is empty."
+
+    service = scripted_service(responder, tools=[view_cart])
+    reply, session_id = service.process_message("What's in my cart?")
+    assert reply == "Your cart is empty."
+    assert cart_reads(backend) == 1
+
+    # Each turn starts with an empty cache
+    asyncio.run(service.process_message_async("And now?", session_id))
+    assert cart_reads(backend) == 2
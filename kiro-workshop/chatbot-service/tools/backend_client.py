@@ -0,0 +1,229 @@
+"""Shared async HTTP client for the e-commerce backend."""
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Coroutine, Optional
+import httpx
+from opentelemetry import trace
+from config import Config, get_config, on_config_reload
+from tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Timeouts in seconds
+REQUEST_TIMEOUT = 5.0
+CONNECT_TIMEOUT = 2.0
+
+# Connection pool limits
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = 10
+KEEPALIVE_EXPIRY = 30.0
+
+# Retries for idempotent requests (5xx gateway errors, timeouts, dropped connections)
+MAX_RETRIES = 2
+RETRY_BACKOFF = 0.2
+RETRY_METHODS = frozenset({'GET', 'HEAD'})
+RETRY_STATUS_CODES = frozenset({502, 503, 504})
+
+
+class BackendClient:
+    """Keep-alive connection pool to the e-commerce backend.
+
+    Strands runs every agent invocation on a fresh event loop, and an
+    ``httpx.AsyncClient`` cannot be shared between loops. The client therefore
+    lives on its own background loop; tool coroutines hand requests over to it
+    and await the result, so concurrent tool calls overlap on pooled connections
+    without blocking the caller's loop.
+    """
+
+    def __init__(self, base_url: str, timeout: float = REQUEST_TIMEOUT,
+                 connect_timeout: float = CONNECT_TIMEOUT, max_connections: int = MAX_CONNECTIONS,
+                 max_keepalive_connections: int = MAX_KEEPALIVE_CONNECTIONS, retries: int = MAX_RETRIES,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        """Start the background loop and create the connection pool.
+
+        Args:
+            base_url: E-commerce backend URL
+            timeout: Default per-request timeout in seconds
+            connect_timeout: Timeout for establishing a connection
+            max_connections: Maximum open connections
+            max_keepalive_connections: Maximum idle connections kept open
+            retries: Retries for idempotent requests
+            transport: Optional transport override (for tests)
+        """
+        self.base_url = base_url.rstrip('/')
+        self.retries = retries
+        self.max_connections = max_connections
+        self._closed = False
+        # Requests on the pool right now; only touched on the client's loop
+        self._in_flight = 0
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='backend-client', daemon=True)
+        self._thread.start()
+
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=KEEPALIVE_EXPIRY
+            ),
+            transport=transport or httpx.AsyncHTTPTransport(retries=1)
+        )
+        logger.info(f"Backend client ready for {self.base_url} (max {max_connections} connections)")
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Send a request on the shared pool.
+
+        Args:
+            method: HTTP method
+            path: Path relative to the backend URL (e.g. "/api/products")
+            **kwargs: Passed to ``httpx.AsyncClient.request`` (json, params, timeout, ...)
+
+        Returns:
+            The response, with its body already read
+
+        Raises:
+            httpx.TransportError: If the backend cannot be reached or times out
+        """
+        method = method.upper()
+        # The span is opened on the caller's side so it joins the tool's trace
+        with tracer.start_as_current_span(
+            'backend.request',
+            kind=trace.SpanKind.CLIENT,
+            attributes={'http.request.method': method, 'url.path': path, 'server.address': self.base_url}
+        ) as span:
+            response = await asyncio.wrap_future(self.submit(self._send(method, path, **kwargs)))
+            span.set_attribute('http.response.status_code', response.status_code)
+            return response
+
+    async def get(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request('GET', path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request('POST', path, **kwargs)
+
+    async def delete(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request('DELETE', path, **kwargs)
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """Schedule a coroutine on the client's loop without waiting for it.
+
+        Use this for work that must outlive the caller's event loop, such as
+        background refreshes.
+
+        Args:
+            coro: Coroutine to run
+
+        Returns:
+            Future for the coroutine's result
+        """
+        if self._closed:
+            coro.close()
+            raise RuntimeError("Backend client is closed")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def _send(self, method: str, path: str, **kwargs) -> httpx.Response:
+        attempts = self.retries + 1 if method in RETRY_METHODS else 1
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            try:
+                response = await self._pooled_request(method, path, **kwargs)
+            except httpx.TransportError as e:
+                if last_attempt:
+                    raise
+                logger.warning(f"{method} {path} failed ({type(e).__name__}), retrying")
+            else:
+                if last_attempt or response.status_code not in RETRY_STATUS_CODES:
+                    return response
+                logger.warning(f"{method} {path} returned {response.status_code}, retrying")
+            await asyncio.sleep(RETRY_BACKOFF * (2 ** attempt))
+
+    async def _pooled_request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        self._in_flight += 1
+        try:
+            return await self._client.request(method, path, **kwargs)
+        finally:
+            self._in_flight -= 1
+
+    def pool_stats(self) -> dict:
+        """Requests on the connection pool and the share of connections they use.
+
+        Each request holds one connection for its duration, so requests
+        beyond ``max_connections`` are waiting for a free one.
+
+        Returns:
+            Dict of in-flight requests, connection limit and utilization (0-1)
+        """
+        in_flight = self._in_flight
+        return {
+            "in_flight": in_flight,
+            "max_connections": self.max_connections,
+            "utilization": round(min(in_flight, self.max_connections) / self.max_connections, 3)
+        }
+
+    def close(self):
+        """Close pooled connections and stop the background loop."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result(timeout=5)
+        except Exception as e:
+            logger.warning(f"Error closing backend client: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+        logger.info("Backend client closed")
+
+
+_client: Optional[BackendClient] = None
+_client_lock = threading.Lock()
+
+
+def get_backend_client() -> BackendClient:
+    """Get the process-wide backend client, creating it on first use.
+
+    Returns:
+        Shared BackendClient for the configured ECOMMERCE_API_URL
+    """
+    global _client
+    client = _client
+    if client is None:
+        with _client_lock:
+            if _client is None:
+                _client = BackendClient(get_config().ecommerce_api_url)
+            client = _client
+    return client
+
+
+def get_backend_pool_stats() -> Optional[dict]:
+    """Pool statistics of the shared backend client, or None before its first use."""
+    client = _client
+    return client.pool_stats() if client else None
+
+
+def close_backend_client():
+    """Close the shared backend client (called on shutdown)."""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client:
+        client.close()
+
+
+def _on_config_reload(config: Config):
+    """Reconnect when ECOMMERCE_API_URL changes."""
+    global _client
+    with _client_lock:
+        old = _client
+        if old is None or old.base_url == config.ecommerce_api_url.rstrip('/'):
+            return
+        _client = BackendClient(config.ecommerce_api_url)
+    # Requests already in flight on the old pool are abandoned with it
+    old.close()
+
+
+on_config_reload(_on_config_reload)
@@ -1,19 +1,18 @@
 """Shopping cart tools for the shopping assistant."""
 import logging
-import requests
+import httpx
+from typing import Union
 from strands import tool
+from logging_setup import SAMPLED
+from .backend_client import get_backend_client
+from .catalog import get_catalog
+from .turn_cache import ErrorReply, invalidates_turn, memoize_in_turn
 
 logger = logging.getLogger(__name__)
 
 
-def get_api_url() -> str:
-    """Get the e-commerce API URL from config."""
-    from config import Config
-    config = Config()
-    return config.ecommerce_api_url
-
-
 @tool
+@invalidates_turn
 async def add_to_cart(product_id: int, quantity: int = 1) -> str:
     """Add a product to the shopping cart.
     
@@ -21,26 +20,21 @@ async def add_to_cart(product_id: int, quantity: int = 1) -> str:
         product_id: The ID of the product to add
         quantity: Number of items to add (default: 1)
     """
-    logger.info(f"add_to_cart called with product_id={product_id}, quantity={quantity}")
+    logger.debug(f"add_to_cart called with product_id={product_id}, quantity={quantity}")
     
     if quantity < 1:
         return "Quantity must be at least 1."
     
     try:
-        api_url = get_api_url()
-        
-        # First, verify the product exists
-        product_response = requests.get(f"{api_url}/api/products/{product_id}", timeout=5)
-        if product_response.status_code == 404:
+        # Verify the product exists (from the catalog cache, or the backend on a miss)
+        product = await get_catalog().lookup(product_id)
+        if product is None:
             return f"Product with ID {product_id} not found."
-        product_response.raise_for_status()
-        product = product_response.json()
         
         # Add to cart
-        response = requests.post(
-            f"{api_url}/api/cart",
-            json={"productId": product_id, "quantity": quantity},
-            timeout=5
+        response = await get_backend_client().post(
+            "/api/cart",
+            json={"productId": product_id, "quantity": quantity}
         )
         response.raise_for_status()
         
@@ -48,7 +42,7 @@ async def add_to_cart(product_id: int, quantity: int = 1) -> str:
         product_emoji = product.get('emoji', '')
         product_price = product.get('price', 0)
         
-        logger.info(f"Successfully added {quantity}x {product_name} to cart")
+        logger.info(f"Successfully added {quantity}x {product_name} to cart", extra=SAMPLED)
         
         return (
             f"✅ Added {quantity}x {product_emoji} {product_name} to your cart!\n"
@@ -56,11 +50,11 @@ async def add_to_cart(product_id: int, quantity: int = 1) -> str:
             f"Subtotal: ${product_price * quantity:.2f}"
         )
         
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         error_msg = "Unable to connect to the shopping cart service. Please try again later."
         logger.error("Connection error to e-commerce backend")
         return error_msg
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         error_msg = "The shopping cart service is taking too long to respond. Please try again."
         logger.error("Timeout connecting to e-commerce backend")
         return error_msg
@@ -71,45 +65,42 @@ async def add_to_cart(product_id: int, quantity: int = 1) -> str:
 
 
 @tool
+@invalidates_turn
 async def remove_from_cart(product_id: int) -> str:
     """Remove a product from the shopping cart.
     
     Args:
         product_id: The ID of the product to remove
     """
-    logger.info(f"remove_from_cart called with product_id={product_id}")
+    logger.debug(f"remove_from_cart called with product_id={product_id}")
     
     try:
-        api_url = get_api_url()
-        
-        # Get product name before removing
-        try:
-            product_response = requests.get(f"{api_url}/api/products/{product_id}", timeout=5)
-            product_response.raise_for_status()
-            product = product_response.json()
+        # Product name for the reply comes from the catalog cache only
+        product = get_catalog().cached_product(product_id)
+        if product:
             product_name = product.get('name', 'Unknown Product')
             product_emoji = product.get('emoji', '')
-        except:
+        else:
             product_name = f"Product {product_id}"
             product_emoji = ''
         
         # Remove from cart
-        response = requests.delete(f"{api_url}/api/cart/{product_id}", timeout=5)
+        response = await get_backend_client().delete(f"/api/cart/{product_id}")
         
         if response.status_code == 404:
             return f"Product {product_id} is not in your cart."
         
         response.raise_for_status()
         
-        logger.info(f"Successfully removed {product_name} from cart")
+        logger.info(f"Successfully removed {product_name} from cart", extra=SAMPLED)
         
         return f"✅ Removed {product_emoji} {product_name} from your cart."
         
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         error_msg = "Unable to connect to the shopping cart service. Please try again later."
         logger.error("Connection error to e-commerce backend")
         return error_msg
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         error_msg = "The shopping cart service is taking too long to respond. Please try again."
         logger.error("Timeout connecting to e-commerce backend")
         return error_msg
@@ -120,17 +111,17 @@ async def remove_from_cart(product_id: int) -> str:
 
 
 @tool
-async def view_cart() -> str:
+@memoize_in_turn
+async def view_cart() -> Union[str, ErrorReply]:
     """View the current contents of the shopping cart."""
-    logger.info("view_cart called")
+    logger.debug("view_cart called")
     
     try:
-        api_url = get_api_url()
-        response = requests.get(f"{api_url}/api/cart", timeout=5)
+        response = await get_backend_client().get("/api/cart")
         response.raise_for_status()
         
         cart_items = response.json()
-        logger.info(f"Retrieved {len(cart_items)} items from cart")
+        logger.debug(f"Retrieved {len(cart_items)} items from cart")
         
         if not cart_items:
             return "🛒 Your shopping cart is empty."
@@ -160,15 +151,15 @@ async def view_cart() -> str:
         
         return "\n\n".join(cart_lines)
         
-    except requests.exceptions.ConnectionError:
-        error_msg = "Unable to connect to the shopping cart service. Please try again later."
+    except httpx.ConnectError:
+        error_msg = ErrorReply("Unable to connect to the shopping cart service. Please try again later.")
         logger.error("Connection error to e-commerce backend")
         return error_msg
-    except requests.exceptions.Timeout:
-        error_msg = "The shopping cart service is taking too long to respond. Please try again."
+    except httpx.TimeoutException:
+        error_msg = ErrorReply("The shopping cart service is taking too long to respond. Please try again.")
         logger.error("Timeout connecting to e-commerce backend")
         return error_msg
     except Exception as e:
-        error_msg = "An error occurred while retrieving your cart. Please try again."
+        error_msg = ErrorReply("An error occurred while retrieving your cart. Please try again.")
         logger.error(f"Error in view_cart: {e}", exc_info=True)
         return error_msg
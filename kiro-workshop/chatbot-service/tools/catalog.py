@@ -0,0 +1,304 @@
+"""In-process product catalog cache with precomputed indexes."""
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+from bisect import bisect_right
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from config import Config, on_config_reload
+from .backend_client import BackendClient, get_backend_client
+
+logger = logging.getLogger(__name__)
+
+# Seconds a fetched catalog is served without checking the backend
+CATALOG_TTL = 60.0
+# Up to this age a stale catalog is still served while a refresh runs in the
+# background; older catalogs are refreshed before answering
+CATALOG_MAX_STALE = 600.0
+
+
+class _PriceIndex:
+    """Catalog positions sorted by price, for ``max_price`` lookups via bisect."""
+
+    __slots__ = ('prices', 'positions')
+
+    def __init__(self, entries: List[Tuple[float, int]]):
+        entries.sort()
+        self.prices = [price for price, _ in entries]
+        self.positions = [position for _, position in entries]
+
+    def at_most(self, max_price: float) -> List[int]:
+        """Catalog positions with price <= max_price, in catalog order."""
+        return sorted(self.positions[:bisect_right(self.prices, max_price)])
+
+
+def _price(product: Dict[str, Any]) -> float:
+    try:
+        return float(product.get('price', float('inf')))
+    except (TypeError, ValueError):
+        return float('inf')
+
+
+class CatalogSnapshot:
+    """Read-only view of the catalog contents at one point in time.
+
+    Attributes:
+        products: Products in backend order
+        version: Increases every time the catalog content changes
+        etag: ETag returned by the backend, if any
+        fetched_at: Monotonic time the snapshot was last confirmed current
+    """
+
+    def __init__(self, products: Sequence[Dict[str, Any]], version: int,
+                 etag: Optional[str] = None, fetched_at: float = 0.0):
+        self.products = tuple(products)
+        self.version = version
+        self.etag = etag
+        self.fetched_at = fetched_at
+
+        self.by_id: Dict[Any, Dict[str, Any]] = {}
+        category_positions: Dict[str, List[int]] = {}
+        all_prices = []
+        category_prices: Dict[str, List[Tuple[float, int]]] = {}
+        for position, product in enumerate(self.products):
+            if 'id' in product:
+                self.by_id.setdefault(product['id'], product)
+            category = str(product.get('category', '')).lower()
+            category_positions.setdefault(category, []).append(position)
+            price = _price(product)
+            all_prices.append((price, position))
+            category_prices.setdefault(category, []).append((price, position))
+
+        self.by_category = {
+            category: tuple(self.products[i] for i in positions)
+            for category, positions in category_positions.items()
+        }
+        self._price_index = _PriceIndex(all_prices)
+        self._category_price_index = {
+            category: _PriceIndex(entries) for category, entries in category_prices.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def get(self, product_id: Any) -> Optional[Dict[str, Any]]:
+        """Look up a product by id."""
+        product = self.by_id.get(product_id)
+        if product is None and isinstance(product_id, (int, str)):
+            # The model may pass "3" for 3 or vice versa
+            alternate = str(product_id) if isinstance(product_id, int) else _as_int(product_id)
+            if alternate is not None:
+                product = self.by_id.get(alternate)
+        return product
+
+    def filter(self, category: Optional[str] = None, max_price: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Products matching a category (case-insensitive) and price ceiling, in catalog order.
+
+        Args:
+            category: Category name, or None for all categories
+            max_price: Maximum price, or None for no limit
+
+        Returns:
+            Matching products
+        """
+        if category:
+            key = category.lower()
+            if max_price is None:
+                return list(self.by_category.get(key, ()))
+            index = self._category_price_index.get(key)
+            if index is None:
+                return []
+        else:
+            if max_price is None:
+                return list(self.products)
+            index = self._price_index
+        return [self.products[i] for i in index.at_most(max_price)]
+
+
+def _as_int(value: str) -> Optional[int]:
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+class ProductCatalog:
+    """Caches ``/api/products`` with a TTL and stale-while-revalidate refresh.
+
+    Fresh snapshots are returned straight from memory. Once the TTL passes the
+    current snapshot is still returned while one refresh runs in the background
+    (conditional on the ETag when the backend provides one). Only a missing or
+    very stale catalog makes the caller wait for the backend.
+    """
+
+    def __init__(self, client_factory: Callable[[], BackendClient] = get_backend_client,
+                 ttl: float = CATALOG_TTL, max_stale: float = CATALOG_MAX_STALE,
+                 clock: Callable[[], float] = time.monotonic):
+        """Create the catalog cache.
+        
+        Args:
+            client_factory: Returns the backend client to fetch with
+            ttl: Seconds a snapshot is considered fresh
+            max_stale: Seconds a stale snapshot may still be served
+            clock: Monotonic clock (overridable for tests)
+        """
+        self.client_factory = client_factory
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.clock = clock
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._refreshing: Optional[concurrent.futures.Future] = None
+        self._lock = threading.Lock()
+        # Last version handed out; never reused, even after invalidate()
+        self._last_version = 0
+
+    @property
+    def version(self) -> int:
+        """Version of the cached catalog (0 when nothing is cached).
+
+        Versions increase with every change of content and are never reused,
+        so a version identifies one catalog content for the process lifetime.
+        """
+        snapshot = self._snapshot
+        return snapshot.version if snapshot else 0
+
+    def peek(self) -> Optional[CatalogSnapshot]:
+        """Current snapshot without triggering any refresh."""
+        return self._snapshot
+
+    def cached_product(self, product_id: Any) -> Optional[Dict[str, Any]]:
+        """Look up a product in the cached catalog without any network access.
+
+        Args:
+            product_id: Product id
+
+        Returns:
+            The product, or None if it is not cached
+        """
+        snapshot = self._snapshot
+        return snapshot.get(product_id) if snapshot is not None else None
+
+    async def lookup(self, product_id: Any) -> Optional[Dict[str, Any]]:
+        """Find a product, asking the backend only if it is not cached.
+
+        Args:
+            product_id: Product id
+
+        Returns:
+            The product, or None if the backend does not know it
+
+        Raises:
+            httpx.HTTPError: If the backend lookup fails
+        """
+        product = self.cached_product(product_id)
+        if product is not None:
+            return product
+
+        response = await self.client_factory().get(f"/api/products/{product_id}")
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    async def get_snapshot(self) -> CatalogSnapshot:
+        """Get the catalog, refreshing it if needed.
+
+        Returns:
+            Current CatalogSnapshot
+
+        Raises:
+            httpx.HTTPError: If there is no usable cached catalog and the fetch fails
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            age = self.clock() - snapshot.fetched_at
+            if age < self.ttl:
+                return snapshot
+            if age < self.max_stale:
+                self._start_refresh()
+                return snapshot
+
+        try:
+            return await asyncio.wrap_future(self._start_refresh())
+        except Exception as e:
+            if snapshot is None:
+                raise
+            logger.warning(f"Catalog refresh failed, serving stale catalog: {e}")
+            return snapshot
+
+    def invalidate(self):
+        """Drop the cached catalog so the next call fetches it again."""
+        with self._lock:
+            self._snapshot = None
+
+    def _start_refresh(self) -> concurrent.futures.Future:
+        """Start a refresh unless one is already running; returns its future."""
+        with self._lock:
+            if self._refreshing is not None:
+                return self._refreshing
+            client = self.client_factory()
+            future = self._refreshing = client.submit(self._fetch(client))
+        future.add_done_callback(self._refresh_done)
+        return future
+
+    def _refresh_done(self, future: concurrent.futures.Future):
+        with self._lock:
+            if self._refreshing is future:
+                self._refreshing = None
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning(f"Catalog refresh failed: {future.exception()}")
+
+    async def _fetch(self, client: BackendClient) -> CatalogSnapshot:
+        current = self._snapshot
+        headers = {}
+        if current is not None and current.etag:
+            headers['If-None-Match'] = current.etag
+
+        response = await client.get("/api/products", headers=headers)
+        now = self.clock()
+        if response.status_code == 304 and current is not None:
+            snapshot = current
+            snapshot.fetched_at = now
+            logger.debug("Catalog not modified")
+        else:
+            response.raise_for_status()
+            products = response.json()
+            if current is not None and list(current.products) == products:
+                snapshot = current
+                snapshot.fetched_at = now
+            else:
+                with self._lock:
+                    self._last_version += 1
+                    version = self._last_version
+                snapshot = CatalogSnapshot(products, version, response.headers.get('ETag'), now)
+                logger.info(f"Catalog loaded: {len(snapshot)} products (version {version})")
+
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+
+_catalog: Optional[ProductCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> ProductCatalog:
+    """Get the process-wide product catalog cache."""
+    global _catalog
+    catalog = _catalog
+    if catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = ProductCatalog()
+            catalog = _catalog
+    return catalog
+
+
+def _on_config_reload(config: Config):
+    """The backend may have changed, so fetch the catalog again."""
+    if _catalog is not None:
+        _catalog.invalidate()
+
+
+on_config_reload(_on_config_reload)
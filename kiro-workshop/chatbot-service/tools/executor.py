@@ -0,0 +1,85 @@
+"""Tool executor that runs independent reads concurrently and writes in order.
+
+Strands has no public base class for tool executors, so this module uses
+its private ``ToolExecutor`` and ``_execute`` interfaces. requirements.txt
+pins Strands to the release range these were tested against.
+"""
+import logging
+from typing import Any, AsyncGenerator, List
+from strands.tools.executors import ConcurrentToolExecutor, SequentialToolExecutor
+from strands.tools.executors._executor import ToolExecutor
+from strands.types._events import ToolInterruptEvent
+
+logger = logging.getLogger(__name__)
+
+# Tools that only read state, so their order within a step does not matter
+READ_ONLY_TOOLS = frozenset({'list_products', 'get_recommendations', 'view_cart'})
+
+DEFAULT_TOOL_CONCURRENCY = 4
+
+
+def plan_batches(tool_uses: List[dict], max_concurrency: int = DEFAULT_TOOL_CONCURRENCY,
+                 read_only: frozenset = READ_ONLY_TOOLS) -> List[List[dict]]:
+    """Split one step's tool calls into batches that run one after another.
+
+    Consecutive read-only calls share a batch of up to ``max_concurrency``
+    calls that run together; every other call gets a batch of its own, so
+    a read placed after a cart change sees the change.
+
+    Args:
+        tool_uses: Tool calls in the order the model emitted them
+        max_concurrency: Maximum number of calls in a batch
+        read_only: Names of the tools that may run concurrently
+
+    Returns:
+        List of batches in execution order
+    """
+    batches: List[List[dict]] = []
+    for tool_use in tool_uses:
+        last = batches[-1] if batches else None
+        if (tool_use['name'] in read_only and last and last[0]['name'] in read_only
+                and len(last) < max_concurrency):
+            last.append(tool_use)
+        else:
+            batches.append([tool_use])
+    return batches
+
+
+class ReadParallelToolExecutor(ToolExecutor):
+    """Runs independent read-only tools concurrently and state-changing tools in order.
+
+    Strands' default executor runs every tool call of a step at once, which
+    lets ``view_cart`` race ``add_to_cart``; the sequential executor is safe
+    but makes ``view_cart`` plus ``get_recommendations`` wait on each other.
+    This executor batches the calls with :func:`plan_batches` and runs each
+    batch with the concurrent or sequential executor.
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_TOOL_CONCURRENCY,
+                 read_only: frozenset = READ_ONLY_TOOLS):
+        """Initialize the executor.
+
+        Args:
+            max_concurrency: Maximum number of tools running at once in a step
+            read_only: Names of the tools that may run concurrently
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.read_only = read_only
+        self._concurrent = ConcurrentToolExecutor()
+        self._sequential = SequentialToolExecutor()
+
+    async def _execute(self, agent, tool_uses, tool_results, cycle_trace, cycle_span,
+                       invocation_state: dict, structured_output_context=None) -> AsyncGenerator[Any, None]:
+        batches = plan_batches(tool_uses, self.max_concurrency, self.read_only)
+        if len(batches) > 1:
+            logger.debug(f"Running {len(tool_uses)} tool calls in {len(batches)} batches")
+
+        for batch in batches:
+            executor = self._concurrent if len(batch) > 1 else self._sequential
+            interrupted = False
+            async for event in executor._execute(agent, batch, tool_results, cycle_trace, cycle_span,
+                                                 invocation_state, structured_output_context):
+                interrupted = interrupted or isinstance(event, ToolInterruptEvent)
+                yield event
+            if interrupted:
+                break
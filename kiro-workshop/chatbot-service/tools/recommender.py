@@ -0,0 +1,210 @@
+"""Inverted-index product recommendations."""
+import heapq
+import logging
+import math
+import re
+import threading
+import time
+from itertools import islice
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from .catalog import CatalogSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Field weights mirror the old substring scoring (name > description > category)
+FIELD_WEIGHTS = {'name': 3.0, 'description': 2.0, 'category': 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOP_WORDS = frozenset({
+    'a', 'an', 'and', 'any', 'are', 'but', 'for', 'from', 'i', 'in', 'into', 'is', 'it',
+    'me', 'my', 'of', 'on', 'or', 'some', 'something', 'that', 'the', 'this', 'to',
+    'want', 'with', 'you', 'your'
+})
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase index terms.
+
+    Stop words are dropped and simple plurals are folded onto their singular
+    ("chairs" -> "chair"), so queries and product text meet on the same terms.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of terms
+    """
+    terms = []
+    for word in _TOKEN_RE.findall(text.lower()):
+        if word in STOP_WORDS:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+class RecommendationIndex:
+    """BM25 inverted index over a catalog snapshot.
+
+    Each posting stores the term's complete BM25 contribution for that product,
+    so queries never recompute weights. Postings are dicts (product -> weight)
+    filled in descending weight order: single-term queries take the first k
+    entries, and multi-term queries walk the lists in parallel and stop as soon
+    as no unseen product can beat the current top k (Fagin's threshold
+    algorithm), using the dicts for random access.
+    """
+
+    def __init__(self, products: Sequence[Dict[str, Any]]):
+        """Build the index.
+
+        Args:
+            products: Catalog products
+        """
+        self.products = products
+        term_freqs: List[Dict[str, float]] = []
+        lengths = []
+        doc_freqs: Dict[str, int] = {}
+        for product in products:
+            freqs: Dict[str, float] = {}
+            for field, weight in FIELD_WEIGHTS.items():
+                for term in tokenize(str(product.get(field) or '')):
+                    freqs[term] = freqs.get(term, 0.0) + weight
+            for term in freqs:
+                doc_freqs[term] = doc_freqs.get(term, 0) + 1
+            term_freqs.append(freqs)
+            lengths.append(sum(freqs.values()))
+
+        count = len(products)
+        avg_length = (sum(lengths) / count) if count else 0.0
+        idf = {
+            term: math.log(1 + (count - df + 0.5) / (df + 0.5))
+            for term, df in doc_freqs.items()
+        }
+
+        postings: Dict[str, List[Tuple[float, int]]] = {}
+        for doc_id, freqs in enumerate(term_freqs):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc_id] / avg_length) if avg_length else BM25_K1
+            for term, tf in freqs.items():
+                weight = idf[term] * tf * (BM25_K1 + 1) / (tf + norm)
+                postings.setdefault(term, []).append((weight, doc_id))
+
+        # Highest weight first; ties keep catalog order
+        self.postings: Dict[str, Dict[int, float]] = {}
+        for term, entries in postings.items():
+            entries.sort(key=lambda entry: (-entry[0], entry[1]))
+            self.postings[term] = {doc_id: weight for weight, doc_id in entries}
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Products best matching a free-text query.
+
+        Args:
+            query: Preferences such as "home office" or "fitness gear"
+            limit: Maximum number of products
+
+        Returns:
+            Matching products, best first (empty if no term matches)
+        """
+        terms = [term for term in dict.fromkeys(tokenize(query)) if term in self.postings]
+        if not terms or limit <= 0:
+            return []
+
+        if len(terms) == 1:
+            top = islice(self.postings[terms[0]], limit)
+            return [self.products[doc_id] for doc_id in top]
+        return [self.products[doc_id] for doc_id in self._top_k(terms, limit)]
+
+    def _top_k(self, terms: List[str], limit: int) -> List[int]:
+        postings = [self.postings[term] for term in terms]
+        cursors = [iter(p.items()) for p in postings]
+        heap: List[Tuple[float, int]] = []  # (score, -doc_id), smallest first
+        seen = set()
+        while cursors:
+            threshold = 0.0
+            for cursor in list(cursors):
+                entry = next(cursor, None)
+                if entry is None:
+                    cursors.remove(cursor)
+                    continue
+                doc_id, weight = entry
+                threshold += weight
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                item = (sum(p.get(doc_id, 0.0) for p in postings), -doc_id)
+                if len(heap) < limit:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+            # Unseen products score at most the sum of the weights just read
+            if len(heap) == limit and heap[0][0] >= threshold:
+                break
+        return [-neg_id for _, neg_id in sorted(heap, reverse=True)]
+
+
+_index: Optional[Tuple[CatalogSnapshot, RecommendationIndex]] = None
+_building: Optional[CatalogSnapshot] = None
+_index_lock = threading.Lock()
+
+
+def get_recommendation_index(snapshot: CatalogSnapshot) -> RecommendationIndex:
+    """Get the index for a catalog snapshot, building it once per catalog refresh.
+
+    The first index is built in the caller. When the catalog is refreshed
+    afterwards, the new index is built on a background thread and the previous
+    one keeps answering until it is ready, so large catalogs never stall a turn.
+
+    Args:
+        snapshot: Current catalog snapshot
+
+    Returns:
+        RecommendationIndex for that snapshot, or the previous one while it builds
+    """
+    global _index, _building
+    cached = _index
+    if cached is not None and cached[0] is snapshot:
+        return cached[1]
+
+    if cached is None:
+        with _index_lock:
+            if _index is None:
+                _index = (snapshot, _build(snapshot))
+            return _index[1]
+
+    with _index_lock:
+        if _building is not snapshot:
+            _building = snapshot
+            threading.Thread(target=_build_in_background, args=(snapshot,),
+                             name='recommendation-index', daemon=True).start()
+    return cached[1]
+
+
+def _build(snapshot: CatalogSnapshot) -> RecommendationIndex:
+    start = time.perf_counter()
+    index = RecommendationIndex(snapshot.products)
+    logger.info(
+        f"Built recommendation index for {len(index)} products "
+        f"(catalog version {snapshot.version}) in {(time.perf_counter() - start) * 1000:.0f} ms"
+    )
+    return index
+
+
+def _build_in_background(snapshot: CatalogSnapshot):
+    global _index, _building
+    try:
+        index = _build(snapshot)
+    except Exception as e:
+        logger.error(f"Failed to build recommendation index: {e}", exc_info=True)
+        index = None
+    with _index_lock:
+        # A newer catalog may have arrived while this one was building
+        if _building is snapshot:
+            if index is not None:
+                _index = (snapshot, index)
+            _building = None
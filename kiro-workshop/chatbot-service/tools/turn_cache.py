@@ -0,0 +1,159 @@
+"""Memoization of tool results within one agent turn.
+
+:func:`turn_scope` opens a cache for the duration of a turn. Read-only tools
+decorated with :func:`memoize_in_turn` return the earlier result when called
+again with the same arguments in that turn; tools decorated with
+:func:`invalidates_turn` (the cart mutations) clear it. Outside a turn scope
+the decorators do nothing. Tools report backend failures by returning an
+:class:`ErrorReply`, which is handed back but not memoized, so a later call
+in the same turn tries the backend again.
+"""
+import asyncio
+import functools
+import inspect
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ErrorReply(dict):
+    """Tool result for a call that could not do its job; never memoized.
+
+    It is a Strands tool result with status ``error``, so the agent's
+    messages record the failure along with the message for the model.
+    """
+
+    def __init__(self, text: str):
+        super().__init__(status='error', content=[{'text': text}])
+
+    @property
+    def text(self) -> str:
+        return self['content'][0]['text']
+
+
+class TurnCache:
+    """Tool results for one turn, keyed by tool name and arguments."""
+
+    def __init__(self):
+        self.results: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        """Forget every result, including calls still in flight."""
+        self.results.clear()
+
+
+_current: ContextVar[Optional[TurnCache]] = ContextVar('tool_turn_cache', default=None)
+
+
+@contextmanager
+def turn_scope():
+    """Memoize tool results for the duration of the block.
+
+    Tasks and threads started inside the block (the agent's event loop and
+    tool executor) inherit the scope through the context.
+
+    Yields:
+        The TurnCache for the block
+    """
+    cache = TurnCache()
+    token = _current.set(cache)
+    try:
+        yield cache
+    finally:
+        if cache.hits or cache.misses:
+            logger.debug(f"Turn tool cache: {cache.hits} hits, {cache.misses} misses")
+        try:
+            _current.reset(token)
+        except ValueError:
+            # Closed from another context (e.g. an abandoned async generator)
+            _current.set(None)
+
+
+def _call_key(func: Callable, signature: inspect.Signature, args: tuple, kwargs: dict) -> Optional[Hashable]:
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    key = (func.__name__, tuple(bound.arguments.items()))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def memoize_in_turn(func: Callable) -> Callable:
+    """Reuse an async tool's result for repeated calls with the same arguments in a turn.
+
+    Concurrent identical calls share one execution. Exceptions and
+    :class:`ErrorReply` results are passed to those callers but not kept.
+
+    Args:
+        func: Async, read-only tool function
+
+    Returns:
+        Wrapped function (apply ``@tool`` on top)
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs) -> Any:
+        cache = _current.get()
+        key = _call_key(func, signature, args, kwargs) if cache is not None else None
+        if key is None:
+            return await func(*args, **kwargs)
+
+        pending = cache.results.get(key)
+        if pending is not None:
+            cache.hits += 1
+            logger.debug(f"{func.__name__} answered from the turn cache")
+            result = await asyncio.shield(pending)
+            # Strands tags a result dict with its call's toolUseId, so each call gets its own
+            return ErrorReply(result.text) if isinstance(result, ErrorReply) else result
+
+        cache.misses += 1
+        pending = cache.results[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await func(*args, **kwargs)
+        except BaseException as e:
+            if cache.results.get(key) is pending:
+                del cache.results[key]
+            if isinstance(e, Exception):
+                pending.set_exception(e)
+                # Waiters see the error; retrieve it so an unawaited future does not warn
+                pending.exception()
+            else:
+                pending.cancel()
+            raise
+        if isinstance(result, ErrorReply) and cache.results.get(key) is pending:
+            del cache.results[key]
+        pending.set_result(result)
+        return result
+
+    return wrapper
+
+
+def invalidates_turn(func: Callable) -> Callable:
+    """Clear the turn's memoized results around an async tool that changes state.
+
+    Args:
+        func: Async tool function with side effects
+
+    Returns:
+        Wrapped function (apply ``@tool`` on top)
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs) -> Any:
+        cache = _current.get()
+        if cache is not None:
+            cache.clear()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            if cache is not None:
+                cache.clear()
+
+    return wrapper
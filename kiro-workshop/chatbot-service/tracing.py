@@ -0,0 +1,274 @@
+"""Request tracing with OpenTelemetry spans and per-stage latency histograms.
+
+A chat turn produces a tree of spans:
+
+- the HTTP request (:class:`TracingMiddleware`, or the Flask request hooks)
+- ``chat.turn``: the turn in :class:`chatbot_service.ChatbotService`
+- ``session.lock``: waiting for the session's lock
+- ``admission.wait``: waiting in the queue for an agent slot
+- ``session.fetch`` / ``session.save``: reading and writing the history
+- ``agent.invoke``: the agent run, with Strands' own spans below it for the
+  model calls (``chat``, carrying the time to first token) and each tool
+  (``execute_tool <name>``)
+- ``backend.request``: each HTTP request to the e-commerce backend
+
+:func:`setup_tracing` installs the tracer provider. Every finished span is
+timed into a histogram for its stage (:class:`StageMetrics`, reported on
+``/api/metrics``), with request and tool call counts; spans are also exported to the console or a JSON-lines
+file when an exporter is configured. No collector is needed.
+"""
+import json
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+from opentelemetry import context, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SpanExporter
+from opentelemetry.trace import StatusCode
+from metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = 'shopping-assistant-chatbot'
+
+# Stage of the spans created by this service and by Strands, by span name
+STAGE_SPANS = {
+    'chat.turn': 'turn',
+    'session.lock': 'session_lock',
+    'admission.wait': 'admission_wait',
+    'session.fetch': 'session_fetch',
+    'session.save': 'session_save',
+    'agent.invoke': 'agent',
+    'chat': 'model',
+    'backend.request': 'backend',
+}
+TOOL_SPAN_PREFIX = 'execute_tool '
+
+# Attribute Strands sets on model spans, in milliseconds
+TIME_TO_FIRST_TOKEN_ATTRIBUTE = 'gen_ai.server.time_to_first_token'
+
+# Endpoint label for requests that matched no route, so stray paths add no series
+UNMATCHED_ENDPOINT = 'unmatched'
+
+# Server span attribute with the route template the request matched
+ROUTE_ATTRIBUTE = 'http.route'
+
+tracer = trace.get_tracer(__name__)
+
+
+def stage_of(span: ReadableSpan) -> Optional[str]:
+    """The stage a finished span is reported under, or None to skip it."""
+    stage = STAGE_SPANS.get(span.name)
+    if stage:
+        return stage
+    if span.name.startswith(TOOL_SPAN_PREFIX):
+        return f"tool.{span.name[len(TOOL_SPAN_PREFIX):]}"
+    if span.kind == trace.SpanKind.SERVER:
+        return 'request'
+    return None
+
+
+class StageMetrics(SpanProcessor):
+    """Span processor that times finished spans into one histogram per stage.
+
+    HTTP requests are also counted by method, endpoint and status and timed
+    per endpoint, and tool calls are counted by outcome.
+    """
+
+    def __init__(self):
+        self._histograms: Dict[str, Histogram] = {}
+        self._endpoint_histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._lock = threading.Lock()
+        self.requests = Counter(('method', 'endpoint', 'status'))
+        self.tool_calls = Counter(('tool', 'status'))
+
+    def observe(self, stage: str, seconds: float):
+        """Record a duration for a stage."""
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, Histogram())
+        histogram.observe(seconds)
+
+    def on_end(self, span: ReadableSpan):
+        stage = stage_of(span)
+        if stage is None or span.end_time is None or span.start_time is None:
+            return
+        seconds = (span.end_time - span.start_time) / 1e9
+        attributes = span.attributes or {}
+        self.observe(stage, seconds)
+        if stage == 'request':
+            self._observe_request(attributes, seconds)
+        elif stage == 'model':
+            ttft = attributes.get(TIME_TO_FIRST_TOKEN_ATTRIBUTE)
+            if ttft:
+                self.observe('model_ttft', ttft / 1000)
+        elif stage.startswith('tool.'):
+            failed = span.status is not None and span.status.status_code == StatusCode.ERROR
+            self.tool_calls.inc(stage[len('tool.'):], 'error' if failed else 'success')
+
+    def _observe_request(self, attributes, seconds: float):
+        method = attributes.get('http.request.method', '')
+        status = attributes.get('http.response.status_code', '')
+        # Label by route template; paths no route handled (404s, CORS preflights) share one label
+        endpoint = attributes.get(ROUTE_ATTRIBUTE) or UNMATCHED_ENDPOINT
+        self.requests.inc(method, endpoint, status)
+        key = (method, endpoint)
+        histogram = self._endpoint_histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._endpoint_histograms.setdefault(key, Histogram())
+        histogram.observe(seconds)
+
+    def histograms(self) -> Dict[str, Histogram]:
+        """Histograms by stage name."""
+        with self._lock:
+            return dict(self._histograms)
+
+    def endpoint_histograms(self) -> Dict[Tuple[str, str], Histogram]:
+        """Request latency histograms by (method, endpoint)."""
+        with self._lock:
+            return dict(self._endpoint_histograms)
+
+    def snapshot(self) -> dict:
+        """Latency summary in seconds for every stage seen so far."""
+        return {stage: histogram.snapshot() for stage, histogram in sorted(self.histograms().items())}
+
+
+class FileSpanExporter(ConsoleSpanExporter):
+    """Appends finished spans to a file, one JSON object per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+        super().__init__(
+            service_name=SERVICE_NAME,
+            out=self._file,
+            formatter=lambda span: json.dumps(json.loads(span.to_json()), ensure_ascii=False) + "\n"
+        )
+
+    def shutdown(self):
+        self._file.close()
+
+
+def create_span_exporter(name: str, path: str = 'traces.jsonl') -> Optional[SpanExporter]:
+    """Create the span exporter selected by TRACE_EXPORTER.
+
+    Args:
+        name: One of :data:`config.TRACE_EXPORTERS`
+        path: Output file for the 'file' exporter
+
+    Returns:
+        SpanExporter, or None for 'none'
+    """
+    if name == 'console':
+        return ConsoleSpanExporter(service_name=SERVICE_NAME)
+    if name == 'file':
+        return FileSpanExporter(path)
+    return None
+
+
+_provider: Optional[TracerProvider] = None
+_stage_metrics: Optional[StageMetrics] = None
+_setup_lock = threading.Lock()
+
+
+def setup_tracing(exporter: Optional[SpanExporter] = None) -> StageMetrics:
+    """Install the tracer provider, once per process.
+
+    Later calls reuse the provider and only add their exporter.
+
+    Args:
+        exporter: Optional exporter for finished spans
+
+    Returns:
+        The process-wide StageMetrics
+    """
+    global _provider, _stage_metrics
+    with _setup_lock:
+        if _provider is None:
+            _stage_metrics = StageMetrics()
+            _provider = TracerProvider(resource=Resource.create({'service.name': SERVICE_NAME}))
+            _provider.add_span_processor(_stage_metrics)
+            trace.set_tracer_provider(_provider)
+            logger.info("Tracing enabled")
+        if exporter is not None:
+            _provider.add_span_processor(BatchSpanProcessor(exporter))
+            logger.info(f"Exporting spans with {type(exporter).__name__}")
+        return _stage_metrics
+
+
+def get_stage_metrics() -> Optional[StageMetrics]:
+    """The process-wide StageMetrics, or None if tracing is not set up."""
+    return _stage_metrics
+
+
+def flush_tracing():
+    """Export spans still buffered (called on shutdown; exporters close at exit)."""
+    if _provider is not None:
+        _provider.force_flush()
+
+
+class TracingMiddleware:
+    """ASGI middleware that wraps each HTTP request, body included, in a server span."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope['method'], scope['path']
+        with tracer.start_as_current_span(
+            f"{method} {path}",
+            kind=trace.SpanKind.SERVER,
+            attributes={'http.request.method': method, 'url.path': path}
+        ) as span:
+            async def send_with_status(message):
+                if message['type'] == 'http.response.start':
+                    span.set_attribute('http.response.status_code', message['status'])
+                    # The router has matched the request by now; unmatched requests have no route
+                    route = scope.get('route')
+                    if route is not None:
+                        span.set_attribute(ROUTE_ATTRIBUTE, route.path)
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
+
+
+def start_request_span(method: str, path: str, route: Optional[str] = None):
+    """Start a server span for a request handled outside ASGI (Flask); end it with :func:`end_request_span`.
+
+    Args:
+        method: HTTP method
+        path: Request path
+        route: Route template the request matched, None if it matched none
+
+    Returns:
+        Tuple of (span, context token)
+    """
+    attributes = {'http.request.method': method, 'url.path': path}
+    if route is not None:
+        attributes[ROUTE_ATTRIBUTE] = route
+    span = tracer.start_span(f"{method} {path}", kind=trace.SpanKind.SERVER, attributes=attributes)
+    return span, context.attach(trace.set_span_in_context(span))
+
+
+def end_request_span(span, token, status: Optional[int] = None, end: bool = True):
+    """Detach a span started by :func:`start_request_span` and end it.
+
+    Args:
+        span: The request span
+        token: Context token returned with it
+        status: HTTP status of the response
+        end: False to leave the span open for a response that is still
+            streaming (end it with ``trace.use_span(span, end_on_exit=True)``)
+    """
+    if status is not None:
+        span.set_attribute('http.response.status_code', status)
+    if end:
+        span.end()
+    context.detach(token)